@@ -0,0 +1,122 @@
+"""
+Persistent cache of LLM call analyses shared by the call-analysis scripts
+
+Entries are keyed by a hash of the exact chat request (rendered prompt with the
+transcript, model, temperature, max tokens), so any change to the prompt wording
+or the transcript is a miss. Prompts that embed a date (the age-81 cutoff) render
+differently once the date changes, so their entries stop matching on their own;
+they are stored with an expiry at the next local midnight so stale rows get purged.
+
+Entries live in one SQLite file (ANALYSIS_CACHE_PATH) that every script can share.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join("analysis_cache", "analyses.sqlite3"))
+
+logger = logging.getLogger("TranscriptionApp")
+
+
+def request_key(data):
+    """Hash of a chat completion request; options that don't change the answer are ignored"""
+    payload = {k: v for k, v in data.items() if k != "stream"}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def next_midnight():
+    """Timestamp of the next local midnight, when date-based prompts change"""
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(tomorrow, datetime.time()).timestamp()
+
+
+class AnalysisCache:
+    """LLM responses keyed by request hash, with optional per-entry expiry"""
+
+    def __init__(self, path=ANALYSIS_CACHE_PATH):
+        self.enabled = True
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        """Open the database on first use and purge expired rows"""
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            self.conn.execute("DELETE FROM analyses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            self.conn.commit()
+        return self.conn
+
+    def get(self, data):
+        """Cached response for a chat request, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with self.lock:
+                row = self._connect().execute(
+                    "SELECT response FROM analyses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (request_key(data), time.time()),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache read failed: {e}")
+            return None
+        logger.info("Analysis cache hit")
+        return row[0]
+
+    def put(self, data, response, expires_at=None):
+        """Store a response for a chat request; expires_at is a Unix timestamp or None"""
+        if not self.enabled:
+            return
+        try:
+            with self.lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO analyses (key, model, response, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (request_key(data), data.get("model"), response, time.time(), expires_at),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache write failed: {e}")
+
+    def stats(self):
+        """Hit/miss counts for this run"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def add_cache_args(parser):
+    """Add the analysis cache's command-line flags to a script's parser"""
+    parser.add_argument('--no-analysis-cache', action='store_true',
+                        help="Re-run the DeepSeek analysis for every call, bypassing the analysis cache")
+
+
+def apply_cache_args(cache, args):
+    """Enable or disable the cache from parsed add_cache_args flags"""
+    cache.enabled = not args.no_analysis_cache
+
+
+def report_cache_stats(cache):
+    """Log this run's hit/miss counts"""
+    stats = cache.stats()
+    logger.info(f"Analysis cache: {stats['hits']} hits, {stats['misses']} misses")
@@ -0,0 +1,51 @@
+"""Add sale amount totals to hourly metrics
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-11-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'call_metrics_hourly',
+        sa.Column('priced_sales', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.add_column(
+        'call_metrics_hourly',
+        sa.Column('sale_amount_cents_total', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    
+    # Backfill from existing calls so AOV can be served from the rollup
+    op.execute("""
+        UPDATE call_metrics_hourly m
+        SET priced_sales = c.priced_sales,
+            sale_amount_cents_total = c.sale_amount_cents_total
+        FROM (
+            SELECT date_trunc('hour', started_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+                   account_id,
+                   partner_id,
+                   count(*) AS priced_sales,
+                   sum(sale_amount_cents) AS sale_amount_cents_total
+            FROM calls
+            WHERE sale_made AND sale_amount_cents <> 0
+            GROUP BY 1, 2, 3
+        ) c
+        WHERE m.bucket_start = c.bucket_start
+          AND m.account_id = c.account_id
+          AND m.partner_id = c.partner_id;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('call_metrics_hourly', 'sale_amount_cents_total')
+    op.drop_column('call_metrics_hourly', 'priced_sales')
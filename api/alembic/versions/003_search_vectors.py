@@ -0,0 +1,51 @@
+"""Add tsvector search columns and phone-number digit indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-11-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated tsvector columns (summary text weighted above transcript text)
+    op.add_column(
+        'transcripts',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("setweight(to_tsvector('english', coalesce(text, '')), 'B')", persisted=True),
+        ),
+    )
+    op.add_column(
+        'summaries',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("setweight(to_tsvector('english', coalesce(summary, '')), 'A')", persisted=True),
+        ),
+    )
+    op.create_index('ix_transcripts_search_vector', 'transcripts', ['search_vector'], postgresql_using='gin')
+    op.create_index('ix_summaries_search_vector', 'summaries', ['search_vector'], postgresql_using='gin')
+    
+    # Digits-only phone number lookups
+    op.execute(r"CREATE INDEX ix_calls_account_ani_digits ON calls (account_id, regexp_replace(ani, '\D', '', 'g'));")
+    op.execute(r"CREATE INDEX ix_calls_account_dnis_digits ON calls (account_id, regexp_replace(dnis, '\D', '', 'g'));")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_account_dnis_digits', table_name='calls')
+    op.drop_index('ix_calls_account_ani_digits', table_name='calls')
+    op.drop_index('ix_summaries_search_vector', table_name='summaries')
+    op.drop_index('ix_transcripts_search_vector', table_name='transcripts')
+    op.drop_column('summaries', 'search_vector')
+    op.drop_column('transcripts', 'search_vector')
@@ -0,0 +1,83 @@
+"""Store word-level timings in packed form
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-11-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    op.add_column('transcripts', sa.Column('word_timings', sa.LargeBinary(), nullable=True))
+    
+    # Pack existing word timings in batches, keyed on id so each batch is a seek
+    from app.core.word_timings import pack_words
+    
+    conn = op.get_bind()
+    transcripts = sa.table(
+        'transcripts',
+        sa.column('id'),
+        sa.column('text', sa.Text()),
+        sa.column('words_json', sa.JSON()),
+        sa.column('word_timings', sa.LargeBinary()),
+    )
+    last_id = None
+    while True:
+        query = (
+            sa.select(transcripts.c.id, transcripts.c.text, transcripts.c.words_json)
+            .where(transcripts.c.words_json.isnot(None))
+            .order_by(transcripts.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(transcripts.c.id > last_id)
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+        
+        for row in rows:
+            # words_json is only cleared when the blob unpacks to it exactly
+            words_json, word_timings = pack_words(row.words_json, row.text)
+            if word_timings is not None:
+                conn.execute(
+                    transcripts.update()
+                    .where(transcripts.c.id == row.id)
+                    .values(words_json=words_json, word_timings=word_timings)
+                )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # Unpack timings back into words_json before dropping the column
+    from app.core.word_timings import WordTimings
+    
+    conn = op.get_bind()
+    transcripts = sa.table(
+        'transcripts',
+        sa.column('id'),
+        sa.column('text', sa.Text()),
+        sa.column('words_json', sa.JSON()),
+        sa.column('word_timings', sa.LargeBinary()),
+    )
+    rows = conn.execute(
+        sa.select(transcripts.c.id, transcripts.c.text, transcripts.c.word_timings)
+        .where(transcripts.c.word_timings.isnot(None))
+        .execution_options(stream_results=True)
+    )
+    for row in rows:
+        conn.execute(
+            transcripts.update()
+            .where(transcripts.c.id == row.id)
+            .values(words_json=WordTimings(row.word_timings, row.text).to_words_json())
+        )
+    op.drop_column('transcripts', 'word_timings')
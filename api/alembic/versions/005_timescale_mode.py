@@ -0,0 +1,102 @@
+"""TimescaleDB mode: calls hypertable, hourly continuous aggregate, compression and retention
+
+Only applies when ENABLE_TIMESCALE is set; otherwise this revision is a no-op.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-11-28 10:00:00.000000
+
+"""
+from alembic import op
+from app.core.config import settings
+from app.core.timescale import METRICS_HOURLY_VIEW
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not settings.ENABLE_TIMESCALE:
+        return
+    
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb;")
+    
+    # Hypertables can't be referenced by foreign keys, and every unique index
+    # must include the time column
+    op.drop_constraint('transcripts_call_id_fkey', 'transcripts', type_='foreignkey')
+    op.drop_constraint('summaries_call_id_fkey', 'summaries', type_='foreignkey')
+    op.drop_constraint('calls_pkey', 'calls', type_='primary')
+    op.create_primary_key('calls_pkey', 'calls', ['id', 'started_at'])
+    
+    op.execute(f"""
+        SELECT create_hypertable(
+            'calls', 'started_at',
+            chunk_time_interval => INTERVAL '{settings.TIMESCALE_CHUNK_INTERVAL_DAYS} days',
+            migrate_data => TRUE,
+            if_not_exists => TRUE
+        );
+    """)
+    
+    # Hourly rollup maintained by TimescaleDB; counters match app.core.metrics_rollup
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW {METRICS_HOURLY_VIEW}
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT time_bucket(INTERVAL '1 hour', started_at) AS bucket_start,
+               account_id,
+               partner_id,
+               count(*) AS total_calls,
+               count(*) FILTER (WHERE billable) AS billable_calls,
+               count(*) FILTER (WHERE sale_made) AS sales,
+               count(*) FILTER (WHERE disposition = 'connected') AS answers,
+               count(*) FILTER (WHERE disposition = 'connected') AS connected,
+               count(*) FILTER (WHERE sale_made AND sale_amount_cents <> 0) AS priced_sales,
+               sum(sale_amount_cents) FILTER (WHERE sale_made AND sale_amount_cents <> 0)
+                   AS sale_amount_cents_total
+        FROM calls
+        GROUP BY 1, 2, 3
+        WITH NO DATA;
+    """)
+    op.execute(f"""
+        SELECT add_continuous_aggregate_policy(
+            '{METRICS_HOURLY_VIEW}',
+            start_offset => INTERVAL '{settings.TIMESCALE_REFRESH_LOOKBACK_DAYS} days',
+            end_offset => INTERVAL '1 hour',
+            schedule_interval => INTERVAL '15 minutes'
+        );
+    """)
+    
+    # Compress old chunks; segmenting by account keeps per-account scans cheap
+    op.execute("""
+        ALTER TABLE calls SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'account_id',
+            timescaledb.compress_orderby = 'started_at DESC, id'
+        );
+    """)
+    op.execute(
+        f"SELECT add_compression_policy('calls', INTERVAL '{settings.TIMESCALE_COMPRESS_AFTER_DAYS} days');"
+    )
+    
+    if settings.TIMESCALE_RETENTION_DAYS:
+        # The continuous aggregate keeps hourly metrics for dropped chunks
+        op.execute(
+            f"SELECT add_retention_policy('calls', INTERVAL '{settings.TIMESCALE_RETENTION_DAYS} days');"
+        )
+    
+    # Materialize existing history; refreshes can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(f"CALL refresh_continuous_aggregate('{METRICS_HOURLY_VIEW}', NULL, NULL);")
+
+
+def downgrade() -> None:
+    if not settings.ENABLE_TIMESCALE:
+        return
+    
+    # TimescaleDB can't turn a hypertable back into a plain table, so calls stays
+    # a hypertable keyed on (id, started_at); only the policies and aggregate go
+    op.execute("SELECT remove_retention_policy('calls', if_exists => TRUE);")
+    op.execute("SELECT remove_compression_policy('calls', if_exists => TRUE);")
+    op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {METRICS_HOURLY_VIEW};")
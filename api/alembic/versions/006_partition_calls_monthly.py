@@ -0,0 +1,127 @@
+"""Partition calls by month on started_at (plain PostgreSQL)
+
+Only applies when CALLS_PARTITIONING is set and ENABLE_TIMESCALE is not;
+otherwise this revision is a no-op.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-12-01 10:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+from app.core.partitioning import (
+    add_months, month_start, create_partition_sql, create_default_partition_sql,
+)
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# Indexes on the unpartitioned table (001, 003)
+LEGACY_INDEXES = (
+    'ix_calls_account_id',
+    'ix_calls_partner_id',
+    'ix_calls_external_call_id',
+    'ix_calls_billable',
+    'ix_calls_sale_made',
+    'ix_calls_account_started',
+    'ix_calls_partner_started',
+    'ix_calls_account_ani_digits',
+    'ix_calls_account_dnis_digits',
+)
+
+
+def _enabled() -> bool:
+    return settings.CALLS_PARTITIONING and not settings.ENABLE_TIMESCALE
+
+
+def _create_call_indexes(partitioned: bool) -> None:
+    if partitioned:
+        # account_id/partner_id are covered by the (.., started_at) indexes and the
+        # boolean flags are too unselective to be worth maintaining on every insert
+        op.create_index('ix_calls_account_external_call_id', 'calls', ['account_id', 'external_call_id'])
+    else:
+        op.create_index('ix_calls_account_id', 'calls', ['account_id'])
+        op.create_index('ix_calls_partner_id', 'calls', ['partner_id'])
+        op.create_index('ix_calls_external_call_id', 'calls', ['external_call_id'])
+        op.create_index('ix_calls_billable', 'calls', ['billable'])
+        op.create_index('ix_calls_sale_made', 'calls', ['sale_made'])
+    op.create_index('ix_calls_account_started', 'calls', ['account_id', 'started_at'])
+    op.create_index('ix_calls_partner_started', 'calls', ['partner_id', 'started_at'])
+    op.execute(r"CREATE INDEX ix_calls_account_ani_digits ON calls (account_id, regexp_replace(ani, '\D', '', 'g'));")
+    op.execute(r"CREATE INDEX ix_calls_account_dnis_digits ON calls (account_id, regexp_replace(dnis, '\D', '', 'g'));")
+
+
+def _create_call_foreign_keys() -> None:
+    op.create_foreign_key('calls_account_id_fkey', 'calls', 'accounts', ['account_id'], ['id'])
+    op.create_foreign_key('calls_partner_id_fkey', 'calls', 'partners', ['partner_id'], ['id'])
+
+
+def upgrade() -> None:
+    if not _enabled():
+        return
+    
+    # A partitioned table can only be referenced through a unique key that
+    # includes started_at, which transcripts/summaries don't carry
+    op.drop_constraint('transcripts_call_id_fkey', 'transcripts', type_='foreignkey')
+    op.drop_constraint('summaries_call_id_fkey', 'summaries', type_='foreignkey')
+    
+    # Move the old table aside, freeing its index and constraint names
+    op.rename_table('calls', 'calls_unpartitioned')
+    for index in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index};")
+    op.execute("ALTER TABLE calls_unpartitioned RENAME CONSTRAINT calls_pkey TO calls_unpartitioned_pkey;")
+    
+    op.execute("""
+        CREATE TABLE calls (LIKE calls_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (started_at);
+    """)
+    op.create_primary_key('calls_pkey', 'calls', ['id', 'started_at'])
+    _create_call_foreign_keys()
+    
+    # One partition per month of existing history plus the months ahead
+    conn = op.get_bind()
+    first, last = conn.execute(
+        sa.text("SELECT min(started_at), max(started_at) FROM calls_unpartitioned")
+    ).one()
+    now = datetime.now(timezone.utc)
+    month = month_start(first or now)
+    last_month = add_months(month_start(max(last or now, now)), settings.CALLS_PARTITIONS_AHEAD)
+    while month <= last_month:
+        op.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    op.execute(create_default_partition_sql())
+    
+    # Indexes on the parent are created on every partition
+    _create_call_indexes(partitioned=True)
+    
+    op.execute("INSERT INTO calls SELECT * FROM calls_unpartitioned;")
+    op.drop_table('calls_unpartitioned')
+
+
+def downgrade() -> None:
+    if not _enabled():
+        return
+    
+    op.rename_table('calls', 'calls_partitioned')
+    op.drop_index('ix_calls_account_external_call_id', table_name='calls_partitioned')
+    for index in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index};")
+    op.execute("ALTER TABLE calls_partitioned RENAME CONSTRAINT calls_pkey TO calls_partitioned_pkey;")
+    
+    op.execute("CREATE TABLE calls (LIKE calls_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+    op.create_primary_key('calls_pkey', 'calls', ['id'])
+    _create_call_foreign_keys()
+    _create_call_indexes(partitioned=False)
+    
+    # Detached partitions are not part of calls_partitioned and are left untouched
+    op.execute("INSERT INTO calls SELECT * FROM calls_partitioned;")
+    op.execute("DROP TABLE calls_partitioned CASCADE;")
+    
+    op.create_foreign_key('transcripts_call_id_fkey', 'transcripts', 'calls', ['call_id'], ['id'])
+    op.create_foreign_key('summaries_call_id_fkey', 'summaries', 'calls', ['call_id'], ['id'])
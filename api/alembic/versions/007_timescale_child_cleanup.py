@@ -0,0 +1,52 @@
+"""TimescaleDB mode: delete transcripts and summaries left behind by dropped call chunks
+
+In TimescaleDB mode transcripts/summaries reference calls without a foreign key
+(see 005), so retention dropping a chunk leaves their rows behind. A scheduled
+job deletes rows whose call no longer exists.
+
+Only applies when ENABLE_TIMESCALE is set; otherwise this revision is a no-op.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-12-04 10:00:00.000000
+
+"""
+from alembic import op
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+CLEANUP_PROCEDURE = "delete_orphaned_call_children"
+
+
+def upgrade() -> None:
+    if not settings.ENABLE_TIMESCALE:
+        return
+    
+    op.execute(f"""
+        CREATE OR REPLACE PROCEDURE {CLEANUP_PROCEDURE}(job_id int, config jsonb)
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM transcripts t
+            WHERE NOT EXISTS (SELECT 1 FROM calls c WHERE c.id = t.call_id);
+            DELETE FROM summaries s
+            WHERE NOT EXISTS (SELECT 1 FROM calls c WHERE c.id = s.call_id);
+        END
+        $$;
+    """)
+    op.execute(f"SELECT add_job('{CLEANUP_PROCEDURE}', INTERVAL '1 day');")
+
+
+def downgrade() -> None:
+    if not settings.ENABLE_TIMESCALE:
+        return
+    
+    op.execute(f"""
+        SELECT delete_job(job_id) FROM timescaledb_information.jobs
+        WHERE proc_name = '{CLEANUP_PROCEDURE}';
+    """)
+    op.execute(f"DROP PROCEDURE IF EXISTS {CLEANUP_PROCEDURE}(int, jsonb);")
@@ -0,0 +1,60 @@
+"""Notify API workers when a user changes so they drop cached auth lookups
+
+Each worker caches resolved users (app.core.dependencies.user_cache). A trigger on
+users sends a user_changed message on the metrics NOTIFY channel whenever a
+user's account, role or email changes or the user is deleted, whatever made the
+change, and every worker's listener evicts that user.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-12-05 10:00:00.000000
+
+"""
+from alembic import op
+from app.core.notifications import METRICS_CHANNEL
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+NOTIFY_FUNCTION = "notify_user_changed"
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {NOTIFY_FUNCTION}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('{METRICS_CHANNEL}', json_build_object(
+                'type', 'user_changed',
+                'user_id', OLD.id
+            )::text);
+            RETURN NULL;
+        END
+        $$;
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_notify_update
+        AFTER UPDATE ON users
+        FOR EACH ROW
+        WHEN (
+            OLD.account_id IS DISTINCT FROM NEW.account_id
+            OR OLD.role IS DISTINCT FROM NEW.role
+            OR OLD.email IS DISTINCT FROM NEW.email
+        )
+        EXECUTE FUNCTION {NOTIFY_FUNCTION}();
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_notify_delete
+        AFTER DELETE ON users
+        FOR EACH ROW
+        EXECUTE FUNCTION {NOTIFY_FUNCTION}();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS users_notify_delete ON users;")
+    op.execute("DROP TRIGGER IF EXISTS users_notify_update ON users;")
+    op.execute(f"DROP FUNCTION IF EXISTS {NOTIFY_FUNCTION}();")
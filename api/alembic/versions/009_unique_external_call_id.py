@@ -0,0 +1,58 @@
+"""Unique index on (account_id, external_call_id) for ingest upserts
+
+Bulk ingest upserts calls on their external id, so concurrent ingests of the same
+call must resolve to one row. On the plain table the index is
+(account_id, external_call_id); a hypertable or partitioned calls table needs the
+time column in every unique index, so there it is
+(account_id, external_call_id, started_at). The layout is read from the catalog.
+
+Fails, listing how to find them, if duplicates already exist.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-12-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'uq_calls_account_external_call_id'
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text("""
+        SELECT count(*) FROM (
+            SELECT 1 FROM calls
+            WHERE external_call_id IS NOT NULL
+            GROUP BY account_id, external_call_id
+            HAVING count(*) > 1
+        ) d
+    """)).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (account_id, external_call_id) pairs have more than one call; "
+            "merge or delete them before upgrading (SELECT account_id, external_call_id "
+            "FROM calls GROUP BY 1, 2 HAVING count(*) > 1)"
+        )
+    
+    # Primary key includes started_at on a hypertable or partitioned table
+    time_keyed = conn.execute(sa.text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+            WHERE c.conrelid = to_regclass('calls') AND c.contype = 'p' AND a.attname = 'started_at'
+        )
+    """)).scalar()
+    columns = ['account_id', 'external_call_id'] + (['started_at'] if time_keyed else [])
+    op.create_index(INDEX_NAME, 'calls', columns, unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name='calls')
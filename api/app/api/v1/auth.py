@@ -1,35 +1,72 @@
 """
 Authentication endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
-from app.core.dependencies import get_current_user
+from app.core.rate_limit import RateLimiter
+from app.core.security import verify_password_async, create_access_token
+from app.core.dependencies import CurrentUser, get_current_user, user_cache
 from app.schemas.auth import LoginRequest, LoginResponse, UserResponse
 from app.models.user import User
 
 router = APIRouter()
 
+# Failed login attempts, by email and by client IP
+login_email_limiter = RateLimiter(
+    limit=settings.LOGIN_MAX_FAILURES_PER_EMAIL,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+)
+login_ip_limiter = RateLimiter(
+    limit=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+)
+
 
 @router.post("/login", response_model=LoginResponse)
 async def login(
     credentials: LoginRequest,
+    request: Request,
     response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """Login endpoint - sets HttpOnly cookie"""
+    # Throttle repeated failures before doing any bcrypt work
+    email_key = credentials.email.lower()
+    ip_key = request.client.host if request.client else "unknown"
+    for limiter, key in ((login_email_limiter, email_key), (login_ip_limiter, ip_key)):
+        retry_after = limiter.retry_after(key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+    
     # Find user
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password_async(credentials.password, user.password_hash):
+        login_email_limiter.hit(email_key)
+        login_ip_limiter.hit(ip_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
     
+    login_email_limiter.reset(email_key)
+    
+    # Prime the user cache so the dashboard's first requests skip the lookup
+    user_cache.set(str(user.id), CurrentUser(
+        id=user.id,
+        account_id=user.account_id,
+        email=user.email,
+        role=user.role,
+    ))
+    
     # Create token
     access_token = create_access_token(data={"sub": str(user.id)})
     
@@ -62,7 +99,7 @@ async def logout(response: Response):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     """Get current user info"""
     return UserResponse(
         id=str(current_user.id),
@@ -1,18 +1,41 @@
 """
 Call endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, text
-from sqlalchemy.orm import selectinload
-from typing import Optional
-from datetime import datetime
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_account
+from sqlalchemy import select, func, and_, or_, case, text, tuple_, literal_column, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload, make_transient
+from pydantic import ValidationError
+from typing import Optional, AsyncIterator
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, read_session_factory
+from app.core.dependencies import CurrentUser, get_current_user, get_current_account
+from app.core.notifications import METRICS_CHANNEL, MAX_PAYLOAD_BYTES, metrics_listener
+from app.core.metrics_rollup import call_snapshot, fold_deltas, apply_deltas, serialize_deltas
+from app.core.partitioning import calls_conflict_elements, calls_partitioned
+from app.core.timescale import refresh_metrics_buckets
+from app.core.export import (
+    CALL_EXPORT_COLUMNS, MEDIA_TYPES, parquet_available, stream_csv, stream_parquet,
+)
+from app.core.word_timings import WordTimings, pack_words, transcript_words_json
+from app.core.search import (
+    TS_CONFIG, HEADLINE_OPTIONS, normalized_digits, phone_digits, build_tsquery,
+)
 from app.models.call import Call
 from app.models.partner import Partner
-from app.schemas.call import CallResponse, CallListResponse, CallIngestRequest
-from app.models.user import User
+from app.schemas.call import (
+    CallResponse, CallListResponse, CallIngestRequest,
+    CallBulkIngestResult, CallBulkIngestResponse,
+    CallSearchResult, CallSearchResponse,
+    TranscriptResponse, SummaryResponse, CallDetailResponse, CallDetailsResponse,
+)
+import base64
+import codecs
+import json
+import re
 import uuid
 
 router = APIRouter()
@@ -22,7 +45,7 @@ router = APIRouter()
 async def ingest_call(
     data: CallIngestRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
     """
@@ -52,20 +75,36 @@ async def ingest_call(
         
         # Create/update call
         # Check if call exists by external_call_id
+        # Lock the existing row so concurrent re-ingests apply metric deltas in turn
         existing_call = None
         if data.external_call_id:
+            await _lock_external_ids(db, account_id, [data.external_call_id])
             result = await db.execute(
                 select(Call).where(
                     and_(
                         Call.external_call_id == data.external_call_id,
                         Call.account_id == uuid.UUID(account_id),
                     )
-                )
+                ).with_for_update()
             )
             existing_call = result.scalar_one_or_none()
         
+        previous = None
         if existing_call:
             # Update existing call
+            previous = call_snapshot(existing_call)
+            # Re-insert under the same id when the partitioned row can't be updated in place
+            if _moves_chunk(existing_call.started_at, data.started_at):
+                await db.execute(
+                    delete(Call).where(
+                        and_(
+                            Call.id == existing_call.id,
+                            Call.started_at == existing_call.started_at,
+                        )
+                    ).execution_options(synchronize_session=False)
+                )
+                make_transient(existing_call)
+                db.add(existing_call)
             call = existing_call
             call.partner_id = partner_id
             call.started_at = data.started_at
@@ -106,16 +145,20 @@ async def ingest_call(
             )
             transcript = result.scalar_one_or_none()
             
+            words_json, word_timings = pack_words(data.transcript.words_json, data.transcript.text)
+            
             if transcript:
                 transcript.language = data.transcript.language
                 transcript.text = data.transcript.text
-                transcript.words_json = data.transcript.words_json
+                transcript.words_json = words_json
+                transcript.word_timings = word_timings
             else:
                 transcript = Transcript(
                     call_id=call.id,
                     language=data.transcript.language,
                     text=data.transcript.text,
-                    words_json=data.transcript.words_json,
+                    words_json=words_json,
+                    word_timings=word_timings,
                 )
                 db.add(transcript)
         
@@ -147,76 +190,609 @@ async def ingest_call(
                 )
                 db.add(summary)
         
-        # Update metrics hourly bucket
-        await update_metrics_hourly(db, call, account_id)
+        # Move the call's contribution in the hourly metrics buckets
+        deltas = fold_deltas([(previous, call_snapshot(call))])
+        await apply_deltas(db, account_id, deltas)
         
-        # Emit NOTIFY for real-time clients
-        await db.execute(
-            text(
-                "SELECT pg_notify('hopwhistle_metrics', :payload)"
-            ).bindparams(
-                payload=f'{{"type":"call_ingested","call_id":"{call.id}","account_id":"{account_id}"}}'
-            )
-        )
-        
-        # Broadcast to WebSocket clients (non-blocking)
-        try:
-            from app.api.v1.websocket import broadcast_metrics_update
-            import asyncio
-            asyncio.create_task(broadcast_metrics_update({
-                "type": "call_ingested",
-                "call_id": str(call.id),
-                "account_id": account_id,
-            }))
-        except Exception as e:
-            # Don't fail the request if WebSocket broadcast fails
-            print(f"WebSocket broadcast error: {e}")
+        # Emit NOTIFY for real-time clients; every worker's listener relays it
+        # to its WebSocket clients once the transaction commits
+        notification = {
+            "type": "call_ingested",
+            "call_id": str(call.id),
+            "account_id": account_id,
+            "count": 1,
+            "buckets": serialize_deltas(deltas),
+        }
+        if not settings.ENABLE_TIMESCALE:
+            await _notify_metrics(db, notification)
+    
+    if settings.ENABLE_TIMESCALE:
+        await _refresh_and_notify(db, notification, deltas)
     
     await db.refresh(call)
     return CallResponse.model_validate(call)
 
 
-async def update_metrics_hourly(db: AsyncSession, call: Call, account_id: str):
-    """Update hourly metrics bucket"""
-    from app.models.call_metrics_hourly import CallMetricsHourly
-    from datetime import timedelta
+@router.post("/ingest/bulk", response_model=CallBulkIngestResponse)
+async def ingest_calls_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """
+    Bulk-ingest calls from a streamed NDJSON body (one CallIngestRequest per line)
+    or a JSON array of CallIngestRequest records; either is parsed as it streams in,
+    and a single record may be at most INGEST_MAX_RECORD_BYTES.
+    Records are written in batches of INGEST_BULK_BATCH_SIZE, each batch in a single
+    transaction with one NOTIFY. Returns a result per record so partial failures are visible.
+    """
+    results: list[CallBulkIngestResult] = []
+    batch: list[tuple[int, CallIngestRequest]] = []
+    received = 0
+    
+    async for index, record in _iter_ingest_records(request):
+        received += 1
+        if isinstance(record, str):
+            results.append(CallBulkIngestResult(index=index, status="error", error=record))
+            continue
+        
+        try:
+            batch.append((index, CallIngestRequest.model_validate(record)))
+        except ValidationError as e:
+            results.append(CallBulkIngestResult(
+                index=index,
+                external_call_id=record.get("external_call_id") if isinstance(record, dict) else None,
+                status="error",
+                error=str(e),
+            ))
+            continue
+        
+        if len(batch) >= settings.INGEST_BULK_BATCH_SIZE:
+            results.extend(await _ingest_batch(db, batch, account_id))
+            batch = []
+    
+    if batch:
+        results.extend(await _ingest_batch(db, batch, account_id))
+    
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.status == "error")
+    return CallBulkIngestResponse(
+        received=received,
+        succeeded=received - failed,
+        failed=failed,
+        results=results,
+    )
+
+
+async def _iter_ingest_records(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """
+    Yield (index, record) pairs from a bulk ingest body.
+    NDJSON is parsed line by line and a JSON array element by element as the body
+    streams in, so only one record is buffered at a time. Unparseable NDJSON lines and
+    records over INGEST_MAX_RECORD_BYTES are yielded as an error message string; a
+    malformed or oversized array element ends the array with one.
+    """
+    buffer = b""
+    is_array = None
+    array = None
+    skip_line = False
+    index = 0
     
-    # Round to hour
-    bucket_start = call.started_at.replace(minute=0, second=0, microsecond=0)
+    async for chunk in request.stream():
+        buffer += chunk
+        if is_array is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            is_array = stripped.startswith(b"[")
+            if is_array:
+                array = _JsonArrayReader()
+        
+        if is_array:
+            error = array.feed(buffer)
+            buffer = b""
+            for record in array.drain():
+                yield index, record
+                index += 1
+            if error:
+                yield index, f"Invalid JSON array: {error}"
+                return
+            continue
+        
+        *lines, buffer = buffer.split(b"\n")
+        if skip_line and lines:
+            # Rest of an oversized line
+            lines = lines[1:]
+            skip_line = False
+        for line in lines:
+            if not line.strip():
+                continue
+            if len(line) > settings.INGEST_MAX_RECORD_BYTES:
+                yield index, "Record exceeds INGEST_MAX_RECORD_BYTES"
+            else:
+                try:
+                    yield index, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield index, f"Invalid JSON: {e}"
+            index += 1
+        if not skip_line and len(buffer) > settings.INGEST_MAX_RECORD_BYTES:
+            yield index, "Record exceeds INGEST_MAX_RECORD_BYTES"
+            index += 1
+            skip_line = True
+        if skip_line:
+            buffer = b""
     
-    result = await db.execute(
-        select(CallMetricsHourly).where(
-            and_(
-                CallMetricsHourly.bucket_start == bucket_start,
-                CallMetricsHourly.account_id == uuid.UUID(account_id),
-                CallMetricsHourly.partner_id == call.partner_id,
+    if is_array:
+        error = array.feed(b"", final=True)
+        for record in array.drain():
+            yield index, record
+            index += 1
+        if error:
+            yield index, f"Invalid JSON array: {error}"
+    elif buffer.strip() and not skip_line:
+        try:
+            yield index, json.loads(buffer)
+        except json.JSONDecodeError as e:
+            yield index, f"Invalid JSON: {e}"
+
+
+class _JsonArrayReader:
+    """
+    Incremental parser for a top-level JSON array.
+    feed() takes the next bytes of the body and returns an error message if the input
+    is malformed; drain() hands over the elements completed so far. Each chunk is
+    scanned once, with the current element's nesting depth and string state carried
+    across chunks, and an element is decoded once its end has arrived. At most one
+    unfinished element is buffered (bounded by INGEST_MAX_RECORD_BYTES).
+    """
+    
+    STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+    STRUCTURE = re.compile(r'["\[\]{}]')
+    SCALAR_END = re.compile(r"[\s,\]]")
+    
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.opened = False
+        self.closed = False
+        self.expect_value = True  # False once an element has been read, until the next comma
+        self.empty = True
+        self.records: list = []
+        
+        # The element being read: text received so far and its scan state
+        self.in_element = False
+        self.parts: list[str] = []
+        self.part_bytes = 0
+        self.scalar = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def drain(self) -> list:
+        records, self.records = self.records, []
+        return records
+    
+    def _element_end(self, text: str, i: int, final: bool) -> Optional[int]:
+        """Offset in text just past the current element, or None if it continues"""
+        if self.scalar:
+            match = self.SCALAR_END.search(text, i)
+            if match:
+                return match.start()
+            return len(text) if final else None
+        
+        while True:
+            if self.in_string:
+                if self.escaped:
+                    if i == len(text):
+                        return None
+                    i += 1
+                    self.escaped = False
+                i = self.STRING_BODY.match(text, i).end()
+                if i == len(text):
+                    return None
+                if text[i] == "\\":
+                    # Escape split across chunks
+                    self.escaped = True
+                    i += 1
+                    continue
+                self.in_string = False
+                i += 1
+                if self.depth == 0:
+                    return i
+                continue
+            
+            match = self.STRUCTURE.search(text, i)
+            if not match:
+                return None
+            char, i = match.group(), match.end()
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth <= 0:
+                    return i
+    
+    def feed(self, data: bytes, final: bool = False) -> Optional[str]:
+        error = None
+        try:
+            text = self.utf8.decode(data, final)
+        except UnicodeDecodeError as e:
+            # Read the elements before the bad byte, then stop
+            text = e.object[:e.start].decode("utf-8")
+            error = f"Invalid UTF-8: {e.reason}"
+            final = False
+        pos = 0
+        
+        while True:
+            if not self.in_element:
+                while pos < len(text) and text[pos] in " \t\r\n":
+                    pos += 1
+                if pos == len(text):
+                    break
+                
+                char = text[pos]
+                if self.closed:
+                    return "Extra data after the array"
+                if not self.opened:
+                    if char != "[":
+                        return "Expected '['"
+                    self.opened = True
+                    pos += 1
+                    continue
+                if char == "]" and (self.empty or not self.expect_value):
+                    self.closed = True
+                    pos += 1
+                    continue
+                if not self.expect_value:
+                    if char != ",":
+                        return f"Expected ',' or ']', got {char!r}"
+                    self.expect_value = True
+                    pos += 1
+                    continue
+                
+                self.in_element = True
+                self.scalar = char not in '{["'
+                self.depth = 0
+                self.in_string = False
+                self.escaped = False
+            
+            end = self._element_end(text, pos, final)
+            if end is None:
+                piece = text[pos:]
+                self.parts.append(piece)
+                self.part_bytes += len(piece.encode())
+                if self.part_bytes > settings.INGEST_MAX_RECORD_BYTES:
+                    return "Record exceeds INGEST_MAX_RECORD_BYTES"
+                if final:
+                    try:
+                        self.decoder.raw_decode("".join(self.parts))
+                    except json.JSONDecodeError as e:
+                        return e.msg
+                    return "Unterminated value"
+                break
+            
+            element = "".join(self.parts) + text[pos:end]
+            self.parts = []
+            self.part_bytes = 0
+            self.in_element = False
+            if len(element.encode()) > settings.INGEST_MAX_RECORD_BYTES:
+                return "Record exceeds INGEST_MAX_RECORD_BYTES"
+            try:
+                record, stop = self.decoder.raw_decode(element)
+            except json.JSONDecodeError as e:
+                return e.msg
+            if stop != len(element):
+                return "Extra data in array element"
+            self.records.append(record)
+            self.expect_value = False
+            self.empty = False
+            pos = end
+        
+        if error:
+            return error
+        if final and not self.closed:
+            return "Unterminated array"
+        return None
+
+
+async def _ingest_batch(
+    db: AsyncSession,
+    batch: list[tuple[int, CallIngestRequest]],
+    account_id: str,
+) -> list[CallBulkIngestResult]:
+    """
+    Write one batch of calls in a single transaction: one partner lookup, one
+    existing-call lookup, one multi-row upsert each for calls, transcripts and
+    summaries, folded metrics updates and a single NOTIFY.
+    """
+    from app.models.transcript import Transcript
+    from app.models.summary import Summary, Sentiment
+    
+    account_uuid = uuid.UUID(account_id)
+    results: list[CallBulkIngestResult] = []
+    
+    # A row can only be upserted once per statement, so the last record wins
+    # for duplicate external_call_ids within a batch
+    latest: dict[str, tuple[int, CallIngestRequest]] = {}
+    for index, data in batch:
+        previous = latest.get(data.external_call_id)
+        if previous:
+            results.append(CallBulkIngestResult(
+                index=previous[0],
+                external_call_id=data.external_call_id,
+                status="error",
+                error=f"Superseded by record {index} with the same external_call_id",
+            ))
+        latest[data.external_call_id] = (index, data)
+    records = list(latest.values())
+    
+    try:
+        # Resolve partner slugs in one query
+        partner_ids: dict[str, Optional[uuid.UUID]] = {}
+        slugs = set()
+        for _, data in records:
+            if data.partner_id and data.partner_id not in partner_ids:
+                try:
+                    partner_ids[data.partner_id] = uuid.UUID(data.partner_id)
+                except ValueError:
+                    slugs.add(data.partner_id)
+        if slugs:
+            result = await db.execute(
+                select(Partner.name, Partner.id).where(
+                    and_(
+                        Partner.account_id == account_uuid,
+                        Partner.name.in_(slugs),
+                    )
+                )
             )
+            partner_ids.update({name: partner_id for name, partner_id in result.all()})
+        
+        # Resolve and lock existing calls in one query, keeping their
+        # previous state for the metric deltas
+        await _lock_external_ids(db, account_id, latest.keys())
+        result = await db.execute(
+            select(
+                Call.external_call_id,
+                Call.id,
+                Call.started_at,
+                Call.created_at,
+                Call.partner_id,
+                Call.billable,
+                Call.sale_made,
+                Call.sale_amount_cents,
+                Call.disposition,
+            ).where(
+                and_(
+                    Call.account_id == account_uuid,
+                    Call.external_call_id.in_(latest.keys()),
+                )
+            ).with_for_update()
         )
+        existing = {row.external_call_id: dict(row._mapping) for row in result.all()}
+        
+        now = datetime.utcnow()
+        call_rows = []
+        transcript_rows = []
+        summary_rows = []
+        for _, data in records:
+            previous = existing.get(data.external_call_id)
+            call_id = previous["id"] if previous else uuid.uuid4()
+            call_rows.append({
+                "id": call_id,
+                "account_id": account_uuid,
+                "partner_id": partner_ids.get(data.partner_id) if data.partner_id else None,
+                "external_call_id": data.external_call_id,
+                "started_at": data.started_at,
+                "ended_at": data.ended_at,
+                "duration_sec": data.duration_sec,
+                "disposition": data.disposition,
+                "billable": data.billable,
+                "sale_made": data.sale_made,
+                "sale_amount_cents": data.sale_amount_cents,
+                "ani": data.ani,
+                "dnis": data.dnis,
+                "agent_name": data.agent_name,
+                "created_at": previous["created_at"] if previous else now,
+                "updated_at": now,
+            })
+            
+            if data.transcript:
+                words_json, word_timings = pack_words(data.transcript.words_json, data.transcript.text)
+                transcript_rows.append({
+                    "id": uuid.uuid4(),
+                    "call_id": call_id,
+                    "language": data.transcript.language,
+                    "text": data.transcript.text,
+                    "words_json": words_json,
+                    "word_timings": word_timings,
+                })
+            
+            if data.summary:
+                sentiment = None
+                if data.summary.sentiment:
+                    try:
+                        sentiment = Sentiment(data.summary.sentiment.lower())
+                    except ValueError:
+                        pass
+                summary_rows.append({
+                    "id": uuid.uuid4(),
+                    "call_id": call_id,
+                    "summary": data.summary.summary,
+                    "key_points": data.summary.key_points,
+                    "sentiment": sentiment,
+                })
+        
+        moved = [
+            (row["id"], existing[row["external_call_id"]]["started_at"])
+            for row in call_rows
+            if row["external_call_id"] in existing
+            and _moves_chunk(existing[row["external_call_id"]]["started_at"], row["started_at"])
+        ]
+        if moved:
+            await db.execute(
+                delete(Call)
+                .where(tuple_(Call.id, Call.started_at).in_(moved))
+                .execution_options(synchronize_session=False)
+            )
+        
+        stmt = insert(Call).values(call_rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=calls_conflict_elements(),
+                set_={
+                    column: stmt.excluded[column]
+                    for column in call_rows[0]
+                    if column not in ("id", "account_id", "external_call_id", "created_at")
+                },
+            )
+        )
+        
+        if transcript_rows:
+            stmt = insert(Transcript).values(transcript_rows)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[Transcript.call_id],
+                    set_={
+                        "language": stmt.excluded.language,
+                        "text": stmt.excluded.text,
+                        "words_json": stmt.excluded.words_json,
+                        "word_timings": stmt.excluded.word_timings,
+                    },
+                )
+            )
+        
+        if summary_rows:
+            stmt = insert(Summary).values(summary_rows)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[Summary.call_id],
+                    set_={
+                        "summary": stmt.excluded.summary,
+                        "key_points": stmt.excluded.key_points,
+                        "sentiment": stmt.excluded.sentiment,
+                    },
+                )
+            )
+        
+        # Move each call's contribution in the hourly metrics buckets
+        deltas = fold_deltas(
+            (
+                call_snapshot(existing[row["external_call_id"]])
+                if row["external_call_id"] in existing else None,
+                call_snapshot(row),
+            )
+            for row in call_rows
+        )
+        await apply_deltas(db, account_id, deltas)
+        
+        # Emit one NOTIFY for the whole batch
+        notification = {
+            "type": "call_ingested",
+            "account_id": account_id,
+            "count": len(call_rows),
+            "buckets": serialize_deltas(deltas),
+        }
+        if not settings.ENABLE_TIMESCALE:
+            await _notify_metrics(db, notification)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        results.extend(
+            CallBulkIngestResult(
+                index=index,
+                external_call_id=data.external_call_id,
+                status="error",
+                error=f"Batch failed: {e}",
+            )
+            for index, data in records
+        )
+        return results
+    
+    if settings.ENABLE_TIMESCALE:
+        await _refresh_and_notify(db, notification, deltas)
+    
+    for (index, data), row in zip(records, call_rows):
+        results.append(CallBulkIngestResult(
+            index=index,
+            external_call_id=data.external_call_id,
+            status="updated" if data.external_call_id in existing else "created",
+            call_id=str(row["id"]),
+        ))
+    return results
+
+
+async def _lock_external_ids(db: AsyncSession, account_id: str, external_call_ids):
+    """
+    Transaction-scoped advisory locks on external call ids, taken in sorted order.
+    FOR UPDATE can't lock a call that doesn't exist yet, so without these two
+    concurrent first ingests of one call would both insert it and both count it
+    in the metrics.
+    """
+    keys = sorted(f"{account_id}:{external_call_id}" for external_call_id in external_call_ids)
+    if not keys:
+        return
+    await db.execute(
+        text("""
+            SELECT pg_advisory_xact_lock(hashtextextended(key, 0))
+            FROM (SELECT unnest(CAST(:keys AS text[])) AS key ORDER BY 1) ordered
+        """).bindparams(keys=keys)
     )
-    metrics = result.scalar_one_or_none()
-    
-    if metrics:
-        metrics.total_calls += 1
-        if call.billable:
-            metrics.billable_calls += 1
-        if call.sale_made:
-            metrics.sales += 1
-        if call.disposition.value == "connected":
-            metrics.connected += 1
-            metrics.answers += 1
-    else:
-        metrics = CallMetricsHourly(
-            bucket_start=bucket_start,
-            account_id=uuid.UUID(account_id),
-            partner_id=call.partner_id,
-            total_calls=1,
-            billable_calls=1 if call.billable else 0,
-            sales=1 if call.sale_made else 0,
-            connected=1 if call.disposition.value == "connected" else 0,
-            answers=1 if call.disposition.value == "connected" else 0,
-            unique_callers=1,  # Simplified - would need deduplication in real implementation
+
+
+def _moves_chunk(old_started_at: datetime, new_started_at: datetime) -> bool:
+    """
+    Whether re-ingesting a call has to delete and re-insert it: when calls is a
+    hypertable or partitioned table the upsert key includes started_at, and
+    hypertable rows can't change chunk by UPDATE.
+    """
+    if not calls_partitioned():
+        return False
+    if new_started_at.tzinfo is None:
+        new_started_at = new_started_at.replace(tzinfo=timezone.utc)
+    return old_started_at != new_started_at
+
+
+async def _refresh_and_notify(db: AsyncSession, message: dict, deltas: dict):
+    """
+    TimescaleDB mode: after the ingest commits, refresh the continuous aggregate
+    over the touched buckets, then NOTIFY, so clients and the metrics cache never
+    re-read a bucket the aggregate hasn't caught up with.
+    """
+    await refresh_metrics_buckets(bucket_start for bucket_start, _ in deltas)
+    await _notify_metrics(db, message)
+    await db.commit()
+
+
+async def _notify_metrics(db: AsyncSession, message: dict):
+    """
+    NOTIFY the metrics channel. If this worker has no LISTEN connection, also
+    broadcast to its own WebSocket clients so single-worker setups keep working.
+    Bucket deltas too large for a NOTIFY payload are dropped; receivers treat
+    a message without buckets as a signal to resync.
+    """
+    payload = json.dumps(message)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        message = {key: value for key, value in message.items() if key != "buckets"}
+        payload = json.dumps(message)
+    
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)").bindparams(
+            channel=METRICS_CHANNEL,
+            payload=payload,
         )
-        db.add(metrics)
+    )
+    
+    if not metrics_listener.is_listening:
+        try:
+            from app.api.v1.websocket import broadcast_metrics_update
+            import asyncio
+            asyncio.create_task(broadcast_metrics_update(message))
+        except Exception as e:
+            # Don't fail the request if WebSocket broadcast fails
+            print(f"WebSocket broadcast error: {e}")
 
 
 @router.get("", response_model=CallListResponse)
@@ -227,11 +803,76 @@ async def list_calls(
     q: Optional[str] = Query(None),  # Full-text search
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    pagination: str = Query("offset", regex="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),  # next_cursor from the previous page
+    total: Optional[str] = Query(None, regex="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
-    """List calls with filters and pagination"""
+    """
+    List calls with filters and pagination.
+    Offset mode (default) pages with page/page_size. Cursor mode (pagination=cursor,
+    or any request carrying a cursor) seeks on (started_at, id) via
+    ix_calls_account_started, so every page costs O(page_size) however deep it is.
+    total selects an exact count, a planner estimate or no count; it defaults to
+    exact in offset mode and none in cursor mode.
+    """
+    query = _filtered_calls_query(account_id, from_date, to_date, partner_id, q)
+    use_cursor = pagination == "cursor" or cursor is not None
+    total_mode = total or ("none" if use_cursor else "exact")
+    
+    # Count total
+    total_count = None
+    if total_mode == "exact":
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await db.execute(count_query)
+        total_count = total_result.scalar()
+    elif total_mode == "estimate":
+        total_count = await _estimate_row_count(db, query)
+    
+    # Pagination
+    query = query.order_by(Call.started_at.desc(), Call.id.desc())
+    next_cursor = None
+    if use_cursor:
+        if cursor:
+            started_at, last_id = _decode_cursor(cursor)
+            # The plain started_at bound lets the planner prune partitions
+            query = query.where(
+                Call.started_at <= started_at,
+                tuple_(Call.started_at, Call.id) < tuple_(started_at, last_id),
+            )
+        result = await db.execute(query.limit(page_size + 1))
+        calls = result.scalars().all()
+        if len(calls) > page_size:
+            calls = calls[:page_size]
+            next_cursor = _encode_cursor(calls[-1])
+    else:
+        query = query.offset((page - 1) * page_size).limit(page_size)
+        result = await db.execute(query)
+        calls = result.scalars().all()
+    
+    return CallListResponse(
+        items=[CallResponse.model_validate(call) for call in calls],
+        total=total_count,
+        total_is_estimate=total_mode == "estimate",
+        page=page,
+        page_size=page_size,
+        total_pages=(
+            (total_count + page_size - 1) // page_size if total_count is not None else None
+        ),
+        next_cursor=next_cursor,
+    )
+
+
+def _filtered_calls_query(
+    account_id: str,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    partner_id: Optional[str],
+    q: Optional[str],
+):
+    """Base call query with the list filters applied"""
     query = select(Call).where(Call.account_id == uuid.UUID(account_id))
     
     # Date filters
@@ -244,7 +885,7 @@ async def list_calls(
     if partner_id:
         query = query.where(Call.partner_id == uuid.UUID(partner_id))
     
-    # Full-text search
+    # Substring search; /search is the indexed full-text and phone lookup
     if q:
         from app.models.transcript import Transcript
         query = query.join(Transcript, Call.id == Transcript.call_id, isouter=True).where(
@@ -257,62 +898,373 @@ async def list_calls(
             )
         )
     
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    return query
+
+
+def _phone_match(digits: list[str]):
+    """Match calls whose ani or dnis normalizes to one of the candidate digit strings"""
+    return or_(
+        normalized_digits(Call.ani).in_(digits),
+        normalized_digits(Call.dnis).in_(digits),
+    )
+
+
+async def _estimate_row_count(db: AsyncSession, query) -> int:
+    """Planner row estimate for a query, from EXPLAIN instead of a full count"""
+    compiled = query.compile(
+        dialect=db.bind.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    # Run as driver SQL so literals in the search term are never parsed as bind params
+    conn = await db.connection()
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _encode_cursor(call: Call) -> str:
+    """Opaque cursor pointing just past a call in (started_at, id) order"""
+    raw = f"{call.started_at.isoformat()}|{call.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        started_at, call_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(started_at), uuid.UUID(call_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+@router.get("/search", response_model=CallSearchResponse)
+async def search_calls(
+    q: str = Query(..., min_length=1),
+    from_date: Optional[datetime] = Query(None, alias="from"),
+    to_date: Optional[datetime] = Query(None, alias="to"),
+    partner_id: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """
+    Full-text search over transcripts and summaries.
+    Accepts web-search syntax ("exact phrase", OR, -exclude) and prefix terms (word*),
+    ranks hits with ts_rank and returns a highlighted ts_headline snippet.
+    Phone-number queries match ani/dnis by digits instead.
+    """
+    result = await db.execute(
+        _search_query(account_id, q, from_date, to_date, partner_id, page, page_size)
+    )
     
-    # Pagination
-    query = query.order_by(Call.started_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    return CallSearchResponse(
+        items=[
+            CallSearchResult(
+                call=CallResponse.model_validate(call),
+                rank=rank,
+                headline=headline,
+            )
+            for call, rank, headline in result.all()
+        ],
+        page=page,
+        page_size=page_size,
+    )
+
+
+def _search_query(
+    account_id: str,
+    q: str,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    partner_id: Optional[str],
+    page: int,
+    page_size: int,
+):
+    """
+    Select (Call, rank, headline) for one page of search results.
+    Candidates come from the transcript/summary GIN indexes; ts_rank then runs
+    only on those, and ts_headline only on the returned page.
+    """
+    from app.models.transcript import Transcript
+    from app.models.summary import Summary
+    
+    base = select(Call.id).where(Call.account_id == uuid.UUID(account_id))
+    if from_date:
+        base = base.where(Call.started_at >= from_date)
+    if to_date:
+        base = base.where(Call.started_at <= to_date)
+    if partner_id:
+        base = base.where(Call.partner_id == uuid.UUID(partner_id))
+    
+    digits = phone_digits(q)
+    tsquery = None if digits else build_tsquery(q)
+    
+    if digits:
+        ranked = base.add_columns(literal_column("1.0").label("rank")).where(_phone_match(digits))
+    else:
+        document = func.coalesce(Summary.search_vector, text("''::tsvector")).op("||")(
+            func.coalesce(Transcript.search_vector, text("''::tsvector"))
+        )
+        ranked = (
+            base.add_columns(func.ts_rank(document, tsquery).label("rank"))
+            .outerjoin(Transcript, Transcript.call_id == Call.id)
+            .outerjoin(Summary, Summary.call_id == Call.id)
+            .where(Call.id.in_(_fts_matching_call_ids(tsquery)))
+        )
+    
+    # Rank and page first so ts_headline only runs on the returned rows
+    page_ids = (
+        ranked.order_by(literal_column("rank").desc(), Call.started_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .subquery()
+    )
+    
+    if tsquery is not None:
+        # Highlight the column that matched
+        headline = case(
+            (Transcript.search_vector.op("@@")(tsquery), _headline(Transcript.text, tsquery)),
+            else_=_headline(Summary.summary, tsquery),
+        )
+    else:
+        headline = literal_column("NULL")
+    
+    return (
+        select(Call, page_ids.c.rank, headline.label("headline"))
+        .join(page_ids, page_ids.c.id == Call.id)
+        .outerjoin(Transcript, Transcript.call_id == Call.id)
+        .outerjoin(Summary, Summary.call_id == Call.id)
+        .order_by(page_ids.c.rank.desc(), Call.started_at.desc())
+    )
+
+
+def _fts_matching_call_ids(tsquery):
+    """Call IDs whose transcript or summary matches a tsquery, through their GIN indexes"""
+    from app.models.transcript import Transcript
+    from app.models.summary import Summary
+    
+    return select(Transcript.call_id).where(Transcript.search_vector.op("@@")(tsquery)).union(
+        select(Summary.call_id).where(Summary.search_vector.op("@@")(tsquery))
+    )
+
+
+def _headline(document, tsquery):
+    """Highlighted snippet of a text column for a tsquery"""
+    return func.ts_headline(TS_CONFIG, document, tsquery, HEADLINE_OPTIONS)
+
+
+@router.get("/export")
+async def export_calls(
+    from_date: Optional[datetime] = Query(None, alias="from"),
+    to_date: Optional[datetime] = Query(None, alias="to"),
+    partner_id: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
+    format: str = Query("csv", regex="^(csv|parquet)$"),
+    include: Optional[str] = Query(None),  # Comma-separated: transcript,summary
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """
+    Stream every call matching the list filters as CSV or Parquet.
+    include=transcript,summary adds the transcript text and summary key points.
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE partitions and
+    written out as they arrive, so memory stays flat however large the export is.
+    """
+    includes = _parse_includes(include)
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires pyarrow to be installed",
+        )
+    
+    columns, query = _export_query(account_id, from_date, to_date, partner_id, q, includes)
+    
+    # The request's session is closed once the response starts, so the
+    # stream owns its own session for the lifetime of the cursor
+    session_factory = await read_session_factory()
+    
+    async def partitions():
+        async with session_factory() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield rows
+    
+    encode = stream_parquet if format == "parquet" else stream_csv
+    filename = f"calls-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        encode(columns, partitions()),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _export_query(
+    account_id: str,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    partner_id: Optional[str],
+    q: Optional[str],
+    includes: set[str],
+):
+    """Export column names and the query selecting them, in export order"""
+    from app.models.transcript import Transcript
+    from app.models.summary import Summary
+    
+    columns = list(CALL_EXPORT_COLUMNS)
+    query = _filtered_calls_query(account_id, from_date, to_date, partner_id, q)
+    query = query.with_only_columns(*(getattr(Call, name) for name in CALL_EXPORT_COLUMNS))
+    if "transcript" in includes:
+        columns.append("transcript_text")
+        query = query.add_columns(Transcript.text)
+        # The q filter has already joined the transcript
+        if not q:
+            query = query.outerjoin(Transcript, Transcript.call_id == Call.id)
+    if "summary" in includes:
+        columns.append("key_points")
+        query = query.add_columns(Summary.key_points).outerjoin(
+            Summary, Summary.call_id == Call.id
+        )
+    query = query.order_by(Call.started_at, Call.id).execution_options(
+        yield_per=settings.EXPORT_BATCH_SIZE
+    )
+    return columns, query
+
+
+def _parse_includes(include: Optional[str]) -> set[str]:
+    """Parse an include=transcript,summary parameter"""
+    includes = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+    unknown = includes - {"transcript", "summary"}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}",
+        )
+    return includes
+
+
+async def _load_call_details(
+    db: AsyncSession,
+    account_id: str,
+    call_ids: list[uuid.UUID],
+    includes: set[str],
+) -> list[CallDetailResponse]:
+    """
+    Load calls with the requested relationships in one round trip per relationship.
+    selectinload issues a single IN query for all transcripts and one for all summaries.
+    """
+    query = select(Call).where(
+        and_(
+            Call.id.in_(call_ids),
+            Call.account_id == uuid.UUID(account_id),
+        )
+    )
+    if "transcript" in includes:
+        query = query.options(selectinload(Call.transcript))
+    if "summary" in includes:
+        query = query.options(selectinload(Call.summary))
     
     result = await db.execute(query)
-    calls = result.scalars().all()
     
-    return CallListResponse(
-        items=[CallResponse.model_validate(call) for call in calls],
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=(total + page_size - 1) // page_size,
+    details = []
+    for call in result.scalars().all():
+        # Relationships are only read when loaded above; touching them otherwise
+        # would trigger a lazy load, which async sessions do not allow
+        transcript = call.transcript if "transcript" in includes else None
+        summary = call.summary if "summary" in includes else None
+        details.append(CallDetailResponse(
+            **CallResponse.model_validate(call).model_dump(),
+            transcript=TranscriptResponse(
+                call_id=str(call.id),
+                language=transcript.language,
+                text=transcript.text,
+                words_json=transcript_words_json(transcript),
+            ) if transcript else None,
+            summary=SummaryResponse(
+                call_id=str(call.id),
+                summary=summary.summary,
+                key_points=summary.key_points,
+                sentiment=summary.sentiment.value if summary.sentiment else None,
+            ) if summary else None,
+        ))
+    return details
+
+
+def _parse_call_id(call_id: str) -> uuid.UUID:
+    """Parse a call ID, returning 400 for malformed IDs"""
+    try:
+        return uuid.UUID(call_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid call ID: {call_id}",
+        )
+
+
+@router.get("/details", response_model=CallDetailsResponse)
+async def get_call_details(
+    ids: str = Query(..., min_length=1),  # Comma-separated call IDs
+    include: Optional[str] = Query(None),  # Comma-separated: transcript,summary
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """
+    Get many calls at once, optionally with their transcripts and summaries.
+    Returns calls in the order requested; unknown IDs are reported in not_found.
+    """
+    includes = _parse_includes(include)
+    call_ids = list(dict.fromkeys(_parse_call_id(part.strip()) for part in ids.split(",") if part.strip()))
+    if len(call_ids) > settings.CALL_DETAILS_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CALL_DETAILS_MAX_IDS} IDs per request",
+        )
+    
+    details = {
+        detail.id: detail
+        for detail in await _load_call_details(db, account_id, call_ids, includes)
+    }
+    return CallDetailsResponse(
+        items=[details[str(call_id)] for call_id in call_ids if str(call_id) in details],
+        not_found=[str(call_id) for call_id in call_ids if str(call_id) not in details],
     )
 
 
-@router.get("/{call_id}", response_model=CallResponse)
+@router.get("/{call_id}", response_model=CallDetailResponse)
 async def get_call(
     call_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    include: Optional[str] = Query(None),  # Comma-separated: transcript,summary
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
-    """Get call by ID"""
-    result = await db.execute(
-        select(Call).where(
-            and_(
-                Call.id == uuid.UUID(call_id),
-                Call.account_id == uuid.UUID(account_id),
-            )
-        )
+    """
+    Get call by ID.
+    include=transcript,summary returns the transcript and summary in the same response,
+    replacing separate requests to /transcript and /summary.
+    """
+    details = await _load_call_details(
+        db, account_id, [_parse_call_id(call_id)], _parse_includes(include)
     )
-    call = result.scalar_one_or_none()
     
-    if not call:
+    if not details:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Call not found",
         )
     
-    return CallResponse.model_validate(call)
+    return details[0]
 
 
-@router.get("/{call_id}/transcript")
-async def get_call_transcript(
-    call_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    account_id: str = Depends(get_current_account),
-):
-    """Get call transcript"""
+async def _get_transcript(db: AsyncSession, call_id: str, account_id: str):
+    """Transcript of a call in the account, or 404"""
     from app.models.transcript import Transcript
     
     result = await db.execute(
@@ -333,19 +1285,64 @@ async def get_call_transcript(
             detail="Transcript not found",
         )
     
+    return transcript
+
+
+@router.get("/{call_id}/transcript")
+async def get_call_transcript(
+    call_id: str,
+    words: bool = Query(True),  # False skips the word timings
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """Get call transcript"""
+    transcript = await _get_transcript(db, call_id, account_id)
+    
     return {
         "call_id": str(transcript.call_id),
         "language": transcript.language,
         "text": transcript.text,
-        "words_json": transcript.words_json,
+        "words_json": transcript_words_json(transcript) if words else None,
+    }
+
+
+@router.get("/{call_id}/transcript/words")
+async def get_call_transcript_words(
+    call_id: str,
+    start_ms: int = Query(0, ge=0),
+    end_ms: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    account_id: str = Depends(get_current_account),
+):
+    """
+    Words spoken in [start_ms, end_ms), for seeking in the player without
+    downloading every word timing. Requires timings stored in packed form.
+    """
+    transcript = await _get_transcript(db, call_id, account_id)
+    
+    if transcript.word_timings is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Word timings not found",
+        )
+    
+    timings = WordTimings(transcript.word_timings, transcript.text)
+    return {
+        "call_id": str(transcript.call_id),
+        "start_ms": start_ms,
+        "end_ms": end_ms,
+        "total_words": len(timings),
+        "words": timings.window(start_ms, end_ms),
     }
 
 
 @router.get("/{call_id}/summary")
 async def get_call_summary(
     call_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
     """Get call summary"""
@@ -1,85 +1,235 @@
 """
 Metrics endpoints
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, case
+from sqlalchemy import select, func, and_, or_, case, text, bindparam, DateTime
+from sqlalchemy.dialects.postgresql import UUID
 from typing import Optional
-from datetime import datetime, timedelta
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_account
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.core.config import settings
+from app.core.database import get_read_db, is_replica_session
+from app.core.dependencies import CurrentUser, get_current_user, get_current_account
+from app.core.metrics_cache import metrics_cache
+from app.core.timescale import metrics_hourly_table
 from app.models.call import Call, CallDisposition
-from app.models.user import User
 from app.schemas.metrics import MetricsSummary, TimeSeriesPoint, TimeSeriesResponse
 import uuid
 
 router = APIRouter()
 
+# Counters aggregated for /summary, from both raw calls and the hourly rollup
+SUMMARY_COUNTERS = (
+    "total_calls",
+    "billable_calls",
+    "sales",
+    "connected",
+    "priced_sales",
+    "sale_amount_cents_total",
+)
+
 
 @router.get("/summary", response_model=MetricsSummary)
 async def get_metrics_summary(
+    request: Request,
     from_date: Optional[datetime] = Query(None, alias="from"),
     to_date: Optional[datetime] = Query(None, alias="to"),
     partner_id: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
-    """Get KPI summary metrics"""
-    query = select(Call).where(Call.account_id == uuid.UUID(account_id))
-    
-    # Date filters
-    if from_date:
-        query = query.where(Call.started_at >= from_date)
-    if to_date:
-        query = query.where(Call.started_at <= to_date)
+    """
+    Get KPI summary metrics.
+    Whole hours inside the range are read from the hourly rollup; only the partial
+    hours at either edge are aggregated from raw calls. Responses are cached until
+    a call lands in the range, and carry an ETag for If-None-Match polling.
+    """
+    cache_key = metrics_cache.key(
+        "summary", account_id, partner_id=partner_id, from_date=from_date, to_date=to_date
+    )
+    cached = await metrics_cache.get(cache_key)
+    if cached:
+        return _cached_response(request, cached)
+    generation = await metrics_cache.generation(account_id)
+    
+    # Default to last 30 days if no range given
+    if not from_date and not to_date:
+        from_date = datetime.utcnow() - timedelta(days=30)
+    from_date = _as_utc(from_date) if from_date else None
+    to_date = _as_utc(to_date) if to_date else None
+    
+    partner_uuid = uuid.UUID(partner_id) if partner_id else None
+    
+    # Whole-hour span served by the rollup: [rollup_start, rollup_end)
+    rollup_start = _ceil_hour(from_date) if from_date else None
+    rollup_end = _floor_hour(to_date) if to_date else None
+    if rollup_start and rollup_end and rollup_start >= rollup_end:
+        rollup_start = rollup_end = None
+    
+    # Partial-hour edges served from raw calls
+    if rollup_start is None and rollup_end is None and from_date and to_date:
+        edges = [Call.started_at.between(from_date, to_date)]
     else:
-        # Default to last 30 days if no to_date
-        if not from_date:
-            query = query.where(Call.started_at >= datetime.utcnow() - timedelta(days=30))
+        edges = []
+        if from_date and from_date < rollup_start:
+            edges.append(and_(Call.started_at >= from_date, Call.started_at < rollup_start))
+        if to_date:
+            edges.append(and_(Call.started_at >= rollup_end, Call.started_at <= to_date))
+    
+    totals = dict.fromkeys(SUMMARY_COUNTERS, 0)
     
-    # Partner filter
-    if partner_id:
-        query = query.where(Call.partner_id == uuid.UUID(partner_id))
+    if rollup_start is not None or rollup_end is not None:
+        row = (await db.execute(
+            _rollup_summary_query(account_id, partner_uuid, rollup_start, rollup_end)
+        )).one()
+        for counter in SUMMARY_COUNTERS:
+            totals[counter] += row._mapping[counter] or 0
     
-    result = await db.execute(query)
-    calls = result.scalars().all()
+    if edges:
+        row = (await db.execute(
+            _calls_summary_query(account_id, partner_uuid, or_(*edges))
+        )).one()
+        for counter in SUMMARY_COUNTERS:
+            totals[counter] += row._mapping[counter] or 0
     
-    total_calls = len(calls)
-    billable_calls = sum(1 for c in calls if c.billable)
-    sales = sum(1 for c in calls if c.sale_made)
-    connected = sum(1 for c in calls if c.disposition == CallDisposition.CONNECTED)
+    total_calls = totals["total_calls"]
+    billable_calls = totals["billable_calls"]
+    sales = totals["sales"]
     
     # Calculate metrics
     closing_percentage = (sales / billable_calls * 100) if billable_calls > 0 else 0.0
-    answer_rate = (connected / total_calls * 100) if total_calls > 0 else 0.0
+    answer_rate = (totals["connected"] / total_calls * 100) if total_calls > 0 else 0.0
     
     # AOV (Average Order Value)
-    sale_amounts = [c.sale_amount_cents for c in calls if c.sale_made and c.sale_amount_cents]
-    aov_cents = int(sum(sale_amounts) / len(sale_amounts)) if sale_amounts else None
+    aov_cents = (
+        int(totals["sale_amount_cents_total"] / totals["priced_sales"])
+        if totals["priced_sales"] else None
+    )
     
-    return MetricsSummary(
+    summary = MetricsSummary(
         total_calls=total_calls,
         billable_calls=billable_calls,
         sales=sales,
         closing_percentage=round(closing_percentage, 2),
         answer_rate=round(answer_rate, 2),
         aov_cents=aov_cents,
+        connected=totals["connected"],
+        priced_sales=totals["priced_sales"],
+        sale_amount_cents_total=totals["sale_amount_cents_total"],
+    )
+    
+    entry = await metrics_cache.set(
+        cache_key, summary.model_dump(mode="json"), account_id, partner_id, from_date, to_date,
+        generation=generation, replica=is_replica_session(db),
     )
+    return _cached_response(request, entry)
+
+
+def _cached_response(request: Request, entry: dict) -> Response:
+    """Serve a cache entry, or 304 when the client's If-None-Match already has it"""
+    headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if entry["etag"] in tags or "*" in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(entry["body"], headers=headers)
+
+
+def _floor_hour(value: datetime) -> datetime:
+    """Round down to the UTC hour (rollup buckets are UTC hours)"""
+    return _as_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil_hour(value: datetime) -> datetime:
+    """Round up to the UTC hour"""
+    value = _as_utc(value)
+    floor = _floor_hour(value)
+    return floor if floor == value else floor + timedelta(hours=1)
+
+
+def _calls_summary_query(account_id: str, partner_uuid: Optional[uuid.UUID], where):
+    """Single aggregate over raw calls using FILTER clauses"""
+    priced = and_(Call.sale_made, Call.sale_amount_cents != 0)
+    query = select(
+        func.count().label("total_calls"),
+        func.count().filter(Call.billable).label("billable_calls"),
+        func.count().filter(Call.sale_made).label("sales"),
+        func.count().filter(Call.disposition == CallDisposition.CONNECTED).label("connected"),
+        func.count().filter(priced).label("priced_sales"),
+        func.sum(Call.sale_amount_cents).filter(priced).label("sale_amount_cents_total"),
+    ).where(and_(Call.account_id == uuid.UUID(account_id), where))
+    
+    if partner_uuid:
+        query = query.where(Call.partner_id == partner_uuid)
+    return query
+
+
+def _rollup_summary_query(
+    account_id: str,
+    partner_uuid: Optional[uuid.UUID],
+    rollup_start: Optional[datetime],
+    rollup_end: Optional[datetime],
+):
+    """Single aggregate over whole hourly buckets in [rollup_start, rollup_end)"""
+    rollup = metrics_hourly_table()
+    
+    query = select(
+        *(
+            func.sum(rollup.c[counter]).label(counter)
+            for counter in SUMMARY_COUNTERS
+        )
+    ).where(rollup.c.account_id == uuid.UUID(account_id))
+    
+    if rollup_start:
+        query = query.where(rollup.c.bucket_start >= rollup_start)
+    if rollup_end:
+        query = query.where(rollup.c.bucket_start < rollup_end)
+    if partner_uuid:
+        query = query.where(rollup.c.partner_id == partner_uuid)
+    return query
 
 
 @router.get("/timeseries", response_model=TimeSeriesResponse)
 async def get_timeseries(
-    interval: str = Query("hour", regex="^(hour|day)$"),
+    request: Request,
+    interval: str = Query("hour", regex="^(hour|day|week|month)$"),
     from_date: Optional[datetime] = Query(None, alias="from"),
     to_date: Optional[datetime] = Query(None, alias="to"),
     partner_id: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    tz: str = Query("UTC"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
-    """Get time series data for charts"""
-    from app.models.call_metrics_hourly import CallMetricsHourly
+    """
+    Get time series data for charts.
+    Buckets are computed in Postgres from the hourly rollup in the given timezone,
+    so daily/weekly/monthly buckets follow the account's business day. Empty buckets
+    are filled with zeros. Cached and ETagged like /summary.
+    """
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone: {tz}",
+        )
+    
+    cache_key = metrics_cache.key(
+        "timeseries", account_id, interval=interval, partner_id=partner_id,
+        from_date=from_date, to_date=to_date, tz=tz,
+    )
+    cached = await metrics_cache.get(cache_key)
+    if cached:
+        return _cached_response(request, cached)
+    generation = await metrics_cache.generation(account_id)
+    
+    # An open-ended range keeps matching new calls; a fixed one covers its edge buckets
+    open_ended = to_date is None
     
     # Default date range: last 30 days
     if not from_date:
@@ -87,70 +237,116 @@ async def get_timeseries(
     if not to_date:
         to_date = datetime.utcnow()
     
-    # Round to interval boundaries
-    if interval == "hour":
-        from_date = from_date.replace(minute=0, second=0, microsecond=0)
-        to_date = to_date.replace(minute=0, second=0, microsecond=0)
-    else:  # day
-        from_date = from_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        to_date = to_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    query = select(CallMetricsHourly).where(
-        and_(
-            CallMetricsHourly.account_id == uuid.UUID(account_id),
-            CallMetricsHourly.bucket_start >= from_date,
-            CallMetricsHourly.bucket_start <= to_date,
-        )
+    partner_filter = "AND m.partner_id = :partner_id" if partner_id else ""
+    result = await db.execute(
+        text(TIMESERIES_SQL.format(
+            bucket_from=_local_bucket_sql(interval, "CAST(:from_date AS timestamptz)"),
+            bucket_to=_local_bucket_sql(interval, "CAST(:to_date AS timestamptz)"),
+            bucket_row=_local_bucket_sql(interval, "m.bucket_start"),
+            rollup_table=metrics_hourly_table().name,
+            partner_filter=partner_filter,
+        )).bindparams(
+            bindparam("from_date", type_=DateTime(timezone=True)),
+            bindparam("to_date", type_=DateTime(timezone=True)),
+            bindparam("account_id", type_=UUID(as_uuid=True)),
+            *([bindparam("partner_id", type_=UUID(as_uuid=True))] if partner_id else []),
+        ),
+        {
+            "from_date": _as_utc(from_date),
+            "to_date": _as_utc(to_date),
+            "tz": tz,
+            "step": INTERVAL_STEPS[interval],
+            "account_id": uuid.UUID(account_id),
+            **({"partner_id": uuid.UUID(partner_id)} if partner_id else {}),
+        },
     )
     
-    if partner_id:
-        query = query.where(CallMetricsHourly.partner_id == uuid.UUID(partner_id))
-    
-    if interval == "day":
-        # Aggregate hourly buckets into daily
-        query = query.order_by(CallMetricsHourly.bucket_start)
-    
-    result = await db.execute(query)
-    metrics = result.scalars().all()
-    
-    # Aggregate by day if needed
-    if interval == "day":
-        daily_metrics = {}
-        for m in metrics:
-            day_start = m.bucket_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            if day_start not in daily_metrics:
-                daily_metrics[day_start] = {
-                    "total_calls": 0,
-                    "billable_calls": 0,
-                    "sales": 0,
-                    "connected": 0,
-                }
-            daily_metrics[day_start]["total_calls"] += m.total_calls
-            daily_metrics[day_start]["billable_calls"] += m.billable_calls
-            daily_metrics[day_start]["sales"] += m.sales
-            daily_metrics[day_start]["connected"] += m.connected
-        
-        points = [
-            TimeSeriesPoint(
-                timestamp=timestamp,
-                total_calls=data["total_calls"],
-                billable_calls=data["billable_calls"],
-                sales=data["sales"],
-                connected=data["connected"],
-            )
-            for timestamp, data in sorted(daily_metrics.items())
-        ]
-    else:
-        points = [
-            TimeSeriesPoint(
-                timestamp=m.bucket_start,
-                total_calls=m.total_calls,
-                billable_calls=m.billable_calls,
-                sales=m.sales,
-                connected=m.connected,
-            )
-            for m in sorted(metrics, key=lambda x: x.bucket_start)
-        ]
-    
-    return TimeSeriesResponse(interval=interval, points=points)
+    points = [
+        TimeSeriesPoint(
+            timestamp=row.timestamp,
+            total_calls=row.total_calls,
+            billable_calls=row.billable_calls,
+            sales=row.sales,
+            connected=row.connected,
+        )
+        for row in result
+    ]
+    
+    timeseries = TimeSeriesResponse(interval=interval, timezone=tz, points=points)
+    
+    step = INTERVAL_WIDTHS[interval]
+    entry = await metrics_cache.set(
+        cache_key,
+        timeseries.model_dump(mode="json"),
+        account_id,
+        partner_id,
+        from_date - step,
+        None if open_ended else to_date + step,
+        generation=generation,
+        replica=is_replica_session(db),
+    )
+    return _cached_response(request, entry)
+
+
+INTERVAL_STEPS = {
+    "hour": "1 hour",
+    "day": "1 day",
+    "week": "1 week",
+    "month": "1 month",
+}
+
+# Upper bound of each step, for the range a cached series depends on
+INTERVAL_WIDTHS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=31),
+}
+
+# Buckets are generated in local time (timestamp without time zone) so that calendar
+# arithmetic follows the requested timezone, then converted back to timestamptz.
+TIMESERIES_SQL = """
+WITH bounds AS (
+    SELECT {bucket_from} AS first_bucket,
+           {bucket_to} AS last_bucket,
+           CAST(CAST(:step AS text) AS interval) AS step
+),
+series AS (
+    SELECT generate_series(first_bucket, last_bucket, step) AS local_bucket
+    FROM bounds
+),
+agg AS (
+    SELECT {bucket_row} AS local_bucket,
+           sum(m.total_calls) AS total_calls,
+           sum(m.billable_calls) AS billable_calls,
+           sum(m.sales) AS sales,
+           sum(m.connected) AS connected
+    FROM {rollup_table} m, bounds
+    WHERE m.account_id = :account_id
+      AND m.bucket_start >= (bounds.first_bucket AT TIME ZONE :tz)
+      AND m.bucket_start < ((bounds.last_bucket + bounds.step) AT TIME ZONE :tz)
+      {partner_filter}
+    GROUP BY 1
+)
+SELECT series.local_bucket AT TIME ZONE :tz AS timestamp,
+       coalesce(agg.total_calls, 0) AS total_calls,
+       coalesce(agg.billable_calls, 0) AS billable_calls,
+       coalesce(agg.sales, 0) AS sales,
+       coalesce(agg.connected, 0) AS connected
+FROM series
+LEFT JOIN agg ON agg.local_bucket = series.local_bucket
+ORDER BY series.local_bucket
+"""
+
+
+def _local_bucket_sql(interval: str, ts: str) -> str:
+    """SQL truncating a timestamptz expression to a local-time bucket start"""
+    local = f"({ts} AT TIME ZONE :tz)"
+    if settings.ENABLE_TIMESCALE:
+        return f"time_bucket(CAST(CAST(:step AS text) AS interval), {local})"
+    return f"date_trunc('{interval}', {local})"
+
 
+def _as_utc(value: datetime) -> datetime:
+    """Convert to UTC, treating naive datetimes as UTC"""
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
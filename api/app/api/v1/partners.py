@@ -4,10 +4,9 @@ Partner endpoints
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_account
+from app.core.database import get_read_db
+from app.core.dependencies import CurrentUser, get_current_user, get_current_account
 from app.models.partner import Partner
-from app.models.user import User
 from app.schemas.partner import PartnerResponse, PartnerListResponse
 import uuid
 
@@ -16,8 +15,8 @@ router = APIRouter()
 
 @router.get("", response_model=PartnerListResponse)
 async def list_partners(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
     """List all partners for current account"""
@@ -34,8 +33,8 @@ async def list_partners(
 @router.get("/{partner_id}", response_model=PartnerResponse)
 async def get_partner(
     partner_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
     account_id: str = Depends(get_current_account),
 ):
     """Get partner by ID"""
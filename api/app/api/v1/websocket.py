@@ -1,16 +1,19 @@
 """
 WebSocket endpoint for real-time metrics updates
 """
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
 from sqlalchemy import text, select
 import json
 import asyncio
+from app.core.config import settings
+from app.core.connections import manager
+from app.core.metrics_cache import metrics_cache
+from app.core.metrics_rollup import COUNTERS
+from app.core.dependencies import CurrentUser, get_current_user, invalidate_user, resolve_user
 from app.core.security import decode_access_token
+from app.models.user import UserRole
 router = APIRouter()
 
-# Store active connections with account_id mapping
-active_connections: dict[WebSocket, str] = {}
-
 
 @router.websocket("/metrics")
 async def websocket_metrics(
@@ -21,6 +24,7 @@ async def websocket_metrics(
     Clients receive updates when calls are ingested or metrics change.
     """
     await websocket.accept()
+    connection = None
     
     try:
         # Wait for auth message
@@ -42,25 +46,23 @@ async def websocket_metrics(
         # Get user to determine account_id
         from app.core.database import AsyncSessionLocal
         async with AsyncSessionLocal() as db:
-            from app.models.user import User
-            result = await db.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
+            user = await resolve_user(user_id, db)
             if not user:
                 await websocket.close(code=1008, reason="User not found")
                 return
             account_id = str(user.account_id)
         
-        # Store connection with account_id
-        active_connections[websocket] = account_id
+        # Register connection; all sends go through its queue from here on
+        connection = manager.connect(websocket, account_id)
         
         # Send initial connection confirmation
-        await websocket.send_json({
+        manager.send(connection, {
             "type": "connected",
             "account_id": account_id,
         })
         
-        # Keep connection alive and forward notifications
-        # In production, this would use Postgres LISTEN/NOTIFY properly
+        # Keep connection alive; notifications arrive via the LISTEN/NOTIFY
+        # listener calling broadcast_metrics_update
         while True:
             try:
                 # Wait for client messages (ping/pong, etc.)
@@ -68,10 +70,10 @@ async def websocket_metrics(
                 data = json.loads(message)
                 
                 if data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    manager.send(connection, {"type": "pong"})
             except asyncio.TimeoutError:
                 # Send keepalive
-                await websocket.send_json({"type": "keepalive"})
+                manager.send(connection, {"type": "keepalive"})
             except WebSocketDisconnect:
                 break
                 
@@ -80,25 +82,90 @@ async def websocket_metrics(
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        active_connections.pop(websocket, None)
+        if connection is not None:
+            await manager.disconnect(connection)
+
+
+class MetricsCoalescer:
+    """
+    Merges ingest notifications per account over a short window and pushes one
+    compact metrics_delta message with summed hourly bucket increments, so a burst
+    of ingests becomes a single update that clients apply locally.
+    """
+    
+    def __init__(self):
+        self.pending: dict[str, dict] = {}
+        self.flushes: set[asyncio.Task] = set()
+    
+    def add(self, message: dict):
+        """Fold one call_ingested notification into the account's pending delta"""
+        account_id = message["account_id"]
+        pending = self.pending.get(account_id)
+        if pending is None:
+            pending = self.pending[account_id] = {"calls": 0, "buckets": {}, "resync": False}
+            task = asyncio.create_task(self._flush_later(account_id))
+            self.flushes.add(task)
+            task.add_done_callback(self.flushes.discard)
+        
+        pending["calls"] += message.get("count", 1)
+        if "buckets" not in message:
+            # Deltas were too large for the NOTIFY payload
+            pending["resync"] = True
+            return
+        
+        for bucket in message["buckets"]:
+            key = (bucket["bucket_start"], bucket["partner_id"])
+            counters = pending["buckets"].setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for counter in COUNTERS:
+                counters[counter] += bucket.get(counter, 0)
+    
+    async def _flush_later(self, account_id: str):
+        await asyncio.sleep(settings.WS_COALESCE_WINDOW_MS / 1000)
+        pending = self.pending.pop(account_id)
+        manager.broadcast(account_id, {
+            "type": "metrics_delta",
+            "account_id": account_id,
+            "calls": pending["calls"],
+            "buckets": [
+                {"bucket_start": bucket_start, "partner_id": partner_id, **counters}
+                for (bucket_start, partner_id), counters in sorted(
+                    pending["buckets"].items(), key=lambda item: (item[0][0], str(item[0][1]))
+                )
+                if any(counters.values())
+            ],
+            "resync": pending["resync"],
+        })
+
+
+coalescer = MetricsCoalescer()
 
 
 async def broadcast_metrics_update(message: dict):
-    """Broadcast metrics update to connected clients for the specified account"""
+    """Queue a metrics update for connected clients of the specified account"""
+    if message.get("type") == "user_changed":
+        # Sent by the users trigger; drop this worker's cached auth lookup
+        invalidate_user(message["user_id"])
+        return
+    
     account_id = message.get("account_id")
     if not account_id:
         return
     
-    disconnected = []
-    for connection, conn_account_id in list(active_connections.items()):
-        # Only send to clients from the same account
-        if conn_account_id == account_id:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.append(connection)
-    
-    # Clean up disconnected clients
-    for conn in disconnected:
-        active_connections.pop(conn, None)
+    if message.get("type") == "call_ingested":
+        # Drop cached metrics covering the changed buckets (all of the account's
+        # if the notification had to leave them out)
+        await metrics_cache.invalidate(account_id, message.get("buckets"))
+        coalescer.add(message)
+    else:
+        manager.broadcast(account_id, message)
+
 
+@router.get("/stats")
+async def websocket_stats(current_user: CurrentUser = Depends(get_current_user)):
+    """WebSocket connection counts and send queue depths for this worker (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return manager.stats()
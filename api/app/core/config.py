@@ -2,7 +2,7 @@
 Application configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -11,12 +11,60 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     ENABLE_TIMESCALE: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    
+    # Optional read replica for dashboard reads
+    DATABASE_READ_URL: Optional[str] = None
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 20
+    DB_READ_MAX_LAG_SECONDS: float = 5.0  # Reads fall back to the primary beyond this
+    DB_READ_LAG_CHECK_SECONDS: float = 5.0
+    
+    # TimescaleDB mode (applied by migration 005 when ENABLE_TIMESCALE is set)
+    TIMESCALE_CHUNK_INTERVAL_DAYS: int = 7
+    TIMESCALE_REFRESH_LOOKBACK_DAYS: int = 7  # Policy lookback; ingest refreshes the buckets it touches
+    TIMESCALE_COMPRESS_AFTER_DAYS: int = 30
+    TIMESCALE_RETENTION_DAYS: int = 0  # 0 keeps calls forever
+    
+    # Monthly partitioning of calls on plain PostgreSQL (migration 006, ignored with Timescale)
+    CALLS_PARTITIONING: bool = False
+    CALLS_PARTITIONS_AHEAD: int = 3
+    CALLS_DETACH_AFTER_MONTHS: int = 0  # 0 keeps every month attached
+    CALLS_PARTITION_MAINTENANCE_HOURS: float = 6.0
+    
+    # Ingestion
+    INGEST_BULK_BATCH_SIZE: int = 500
+    INGEST_MAX_RECORD_BYTES: int = 10_000_000  # Per record in a bulk ingest body
+    EXPORT_BATCH_SIZE: int = 2000
+    CALL_DETAILS_MAX_IDS: int = 100
     
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
     
+    # Password hashing and login throttling (per worker)
+    PASSWORD_HASH_WORKERS: int = 4
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 10
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 300.0
+    
+    # Metrics response cache: "memory" (per worker), "redis" (shared) or "none"
+    METRICS_CACHE_BACKEND: str = "memory"
+    METRICS_CACHE_TTL_SECONDS: float = 60.0
+    METRICS_CACHE_SIZE: int = 5000
+    METRICS_CACHE_REDIS_URL: Optional[str] = None
+    
+    # Authenticated user cache (per worker)
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    
+    # WebSocket delivery
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_COALESCE_WINDOW_MS: int = 250
+    
     # AI Provider
     OPENAI_API_KEY: str = ""
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
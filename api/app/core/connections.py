@@ -0,0 +1,117 @@
+"""
+WebSocket connection registry
+
+Connections are indexed by account_id. Each connection owns a bounded send queue
+drained by its own writer task, so a slow client only delays itself: when its
+queue is full the oldest pending message is dropped (and the next metrics delta
+is flagged for resync, since increments were lost), and a client that stays
+stuck on a send is disconnected.
+"""
+import asyncio
+from typing import Optional
+from fastapi import WebSocket
+from app.core.config import settings
+
+
+class ClientConnection:
+    """A WebSocket with its bounded outgoing queue and writer task"""
+
+    def __init__(self, manager: "ConnectionManager", websocket: WebSocket, account_id: str):
+        self.manager = manager
+        self.websocket = websocket
+        self.account_id = account_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.needs_resync = False
+        self.writer: Optional[asyncio.Task] = None
+
+    def enqueue(self, message: dict):
+        """Queue a message without waiting, dropping the oldest one if the queue is full"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.needs_resync = True
+            self.dropped += 1
+            self.manager.dropped_messages += 1
+        self.queue.put_nowait(message)
+
+    async def _write(self):
+        while True:
+            message = await self.queue.get()
+            if self.needs_resync and message.get("type") == "metrics_delta":
+                message = {**message, "resync": True}
+                self.needs_resync = False
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_json(message),
+                    timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                self.manager.slow_disconnects += 1
+                await self.manager.disconnect(self, code=1013, reason="Client too slow")
+                return
+            except Exception:
+                await self.manager.disconnect(self)
+                return
+
+
+class ConnectionManager:
+    """Per-account registry of WebSocket connections"""
+
+    def __init__(self):
+        self.connections: dict[str, set[ClientConnection]] = {}
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+
+    def connect(self, websocket: WebSocket, account_id: str) -> ClientConnection:
+        """Register an accepted WebSocket and start its writer"""
+        connection = ClientConnection(self, websocket, account_id)
+        connection.writer = asyncio.create_task(connection._write())
+        self.connections.setdefault(account_id, set()).add(connection)
+        return connection
+
+    async def disconnect(self, connection: ClientConnection, code: Optional[int] = None,
+                         reason: Optional[str] = None):
+        """Unregister a connection, stop its writer and optionally close the socket"""
+        connections = self.connections.get(connection.account_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                self.connections.pop(connection.account_id, None)
+
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+        if code is not None:
+            try:
+                await connection.websocket.close(code=code, reason=reason)
+            except Exception:
+                pass
+
+    def send(self, connection: ClientConnection, message: dict):
+        """Queue a message for one connection"""
+        connection.enqueue(message)
+
+    def broadcast(self, account_id: str, message: dict):
+        """Queue a message for every connection of an account"""
+        for connection in list(self.connections.get(account_id, ())):
+            connection.enqueue(message)
+
+    def stats(self) -> dict:
+        """Connection counts and queue depths"""
+        depths = [
+            connection.queue.qsize()
+            for connections in self.connections.values()
+            for connection in connections
+        ]
+        return {
+            "accounts": len(self.connections),
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "queue_capacity": settings.WS_SEND_QUEUE_SIZE,
+            "dropped_messages": self.dropped_messages,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+manager = ConnectionManager()
@@ -1,6 +1,10 @@
 """
 Database configuration and session management
 """
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -11,10 +15,21 @@ engine = create_async_engine(
     echo=settings.ENVIRONMENT == "development",
     future=True,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
 )
 
+# Read replica engine, with its own pool so dashboard reads can't exhaust
+# the connections ingestion needs
+read_engine = create_async_engine(
+    settings.DATABASE_READ_URL,
+    echo=settings.ENVIRONMENT == "development",
+    future=True,
+    pool_pre_ping=True,
+    pool_size=settings.DB_READ_POOL_SIZE,
+    max_overflow=settings.DB_READ_MAX_OVERFLOW,
+) if settings.DATABASE_READ_URL else None
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -24,9 +39,58 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if read_engine else None
+
 # Base class for models
 Base = declarative_base()
 
+# Replication lag in seconds; 0 when the replica has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaHealth:
+    """Per-worker view of whether the read replica is fresh enough to serve reads"""
+    
+    def __init__(self):
+        self.lag_seconds: Optional[float] = None
+        self.checked_at = 0.0
+        self.healthy = False
+    
+    async def _measure_lag(self) -> float:
+        async with read_engine.connect() as conn:
+            return float((await conn.execute(REPLICA_LAG_SQL)).scalar())
+    
+    async def is_healthy(self) -> bool:
+        """Re-measure lag at most every DB_READ_LAG_CHECK_SECONDS"""
+        now = time.monotonic()
+        if now - self.checked_at < settings.DB_READ_LAG_CHECK_SECONDS:
+            return self.healthy
+        self.checked_at = now
+        
+        try:
+            self.lag_seconds = await asyncio.wait_for(self._measure_lag(), timeout=2.0)
+            self.healthy = self.lag_seconds <= settings.DB_READ_MAX_LAG_SECONDS
+        except Exception as e:
+            print(f"Read replica check failed: {e}")
+            self.lag_seconds = None
+            self.healthy = False
+        return self.healthy
+
+
+replica_health = ReplicaHealth()
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session"""
@@ -37,21 +101,52 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def read_session_factory() -> async_sessionmaker:
+    """Replica session factory, or the primary's when there is no healthy replica"""
+    if ReadSessionLocal is not None and await replica_health.is_healthy():
+        return ReadSessionLocal
+    return AsyncSessionLocal
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """Whether a session reads from the replica rather than the primary"""
+    return read_engine is not None and session.bind is read_engine
+
+
+async def get_read_db() -> AsyncSession:
+    """
+    Dependency for read-only queries: a replica session when DATABASE_READ_URL is
+    set and its replication lag is within DB_READ_MAX_LAG_SECONDS, else the primary.
+    """
+    session_factory = await read_session_factory()
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
-    """Initialize database (create tables, enable extensions)"""
+    """
+    Initialize database (create tables, enable extensions) and check the calls
+    layout against the settings.
+    In TimescaleDB mode the schema (hypertable, continuous aggregate, policies) is
+    owned by the Alembic migrations, so tables are not created here.
+    """
     from app.models import (
         Account, User, Partner, Call, CallMetricsHourly,
         Transcript, Summary, WebhookEvent
     )
+    from app.core.partitioning import detect_calls_layout
+    from app.core.timescale import verify_timescale_mode
     
     async with engine.begin() as conn:
-        # Enable TimescaleDB if configured
-        if settings.ENABLE_TIMESCALE:
-            try:
-                await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb;")
-            except Exception:
-                pass  # TimescaleDB not available
+        if not settings.ENABLE_TIMESCALE:
+            # Create all tables
+            await conn.run_sync(Base.metadata.create_all)
         
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+        # ENABLE_TIMESCALE and CALLS_PARTITIONING only take effect through
+        # migrations 005/006, so check what they actually did
+        await verify_timescale_mode(conn)
+        await detect_calls_layout(conn)
 
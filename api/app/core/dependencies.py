@@ -1,19 +1,65 @@
 """
 FastAPI dependencies
 """
+from dataclasses import dataclass
 from typing import Optional
+import uuid
 from fastapi import Depends, HTTPException, status, Cookie
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import decode_access_token
-from app.models.user import User
+from app.models.user import User, UserRole
 from sqlalchemy import select
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Authenticated user as resolved from the JWT (a cached snapshot, not an ORM row)"""
+    id: uuid.UUID
+    account_id: uuid.UUID
+    email: str
+    role: UserRole
+
+
+# user_id -> CurrentUser, so most requests resolve the user without a query
+user_cache = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a cached user; the NOTIFY relay calls this when the users trigger fires"""
+    user_cache.delete(str(user_id))
+
+
+async def resolve_user(user_id: str, db: AsyncSession) -> Optional[CurrentUser]:
+    """Look up a user by ID through the cache"""
+    current_user = user_cache.get(user_id)
+    if current_user is not None:
+        return current_user
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    
+    current_user = CurrentUser(
+        id=user.id,
+        account_id=user.account_id,
+        email=user.email,
+        role=user.role,
+    )
+    user_cache.set(user_id, current_user)
+    return current_user
+
+
 async def get_current_user(
     access_token: Optional[str] = Cookie(None),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> CurrentUser:
     """Get current authenticated user from JWT cookie"""
     if not access_token:
         raise HTTPException(
@@ -29,8 +75,7 @@ async def get_current_user(
             detail="Invalid token",
         )
     
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await resolve_user(user_id, db)
     
     if user is None:
         raise HTTPException(
@@ -42,8 +87,7 @@ async def get_current_user(
 
 
 async def get_current_account(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> str:
     """Get current user's account_id for multi-tenancy"""
     return str(current_user.account_id)
-
@@ -0,0 +1,152 @@
+"""
+Streaming call exports (CSV, and Parquet when pyarrow is installed)
+
+Rows arrive in partitions from a server-side cursor; each partition is encoded
+and yielded as soon as it is read, so memory stays bounded by the partition
+size regardless of how many calls are exported.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+
+CALL_EXPORT_COLUMNS = [
+    "id",
+    "external_call_id",
+    "partner_id",
+    "started_at",
+    "ended_at",
+    "duration_sec",
+    "disposition",
+    "billable",
+    "sale_made",
+    "sale_amount_cents",
+    "ani",
+    "dnis",
+    "agent_name",
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed"""
+    return pq is not None
+
+
+def _cell(value):
+    """Plain value for an export cell"""
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+async def stream_csv(
+    columns: Sequence[str],
+    partitions: AsyncIterator[Iterable[Sequence]],
+) -> AsyncIterator[bytes]:
+    """Encode row partitions as CSV, one chunk per partition"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    
+    async for rows in partitions:
+        for row in rows:
+            writer.writerow([_cell(v) for v in row])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the caller"""
+    
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.closed = False
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_schema(columns: Sequence[str]):
+    """Arrow schema for the exported columns"""
+    types = {
+        "started_at": pa.timestamp("us", tz="UTC"),
+        "ended_at": pa.timestamp("us", tz="UTC"),
+        "duration_sec": pa.int32(),
+        "billable": pa.bool_(),
+        "sale_made": pa.bool_(),
+        "sale_amount_cents": pa.int32(),
+        "key_points": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns])
+
+
+def _parquet_value(value):
+    """Value as Arrow expects it; UUIDs and enums become strings"""
+    if value is None or isinstance(value, (str, int, float, bool, list)) or hasattr(value, "isoformat"):
+        return value
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    return str(value)
+
+
+async def stream_parquet(
+    columns: Sequence[str],
+    partitions: AsyncIterator[Iterable[Sequence]],
+) -> AsyncIterator[bytes]:
+    """Encode row partitions as Parquet, one row group per partition"""
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    
+    try:
+        async for rows in partitions:
+            values = [[] for _ in columns]
+            for row in rows:
+                for i, value in enumerate(row):
+                    values[i].append(_parquet_value(value))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    
+    yield sink.drain()
@@ -0,0 +1,285 @@
+"""
+Response cache for the metrics endpoints
+
+Entries are keyed by endpoint and request parameters and remember which account,
+partner and time range they cover. Ingest NOTIFY messages carry the hourly buckets
+a batch changed; every worker's listener passes them to invalidate(), which drops
+only the entries of that account whose range overlaps a changed bucket (and whose
+partner filter matches). Messages without buckets drop the whole account.
+
+Each invalidation also bumps a per-account generation. Endpoints read it before
+querying and set() refuses the write if it moved, so a response computed from
+pre-ingest data can't be cached after the invalidation that should have removed
+it. Responses read from a replica are not cached for a while after an
+invalidation either, since the replica may not have replayed the ingest yet.
+
+Backends:
+- "memory": per-worker TTL/LRU cache (kept coherent by the NOTIFY relay)
+- "redis": shared across workers, requires the redis package and METRICS_CACHE_REDIS_URL
+- "none": no caching; ETags are still computed so clients can get 304s
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # The shared backend is optional
+    redis = None
+
+BUCKET_WIDTH = timedelta(hours=1)
+
+# How long after an invalidation a replica may still serve pre-ingest data: its
+# allowed lag, plus the interval between lag checks
+REPLICA_STALE_SECONDS = settings.DB_READ_MAX_LAG_SECONDS + settings.DB_READ_LAG_CHECK_SECONDS
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def make_etag(body) -> str:
+    """Strong ETag for a JSON body"""
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+class MemoryBackend:
+    """Per-worker cache"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[str, tuple[int, float]] = {}
+    
+    async def generation(self, account_id: str) -> tuple[int, Optional[float]]:
+        """Account generation and the wall-clock time it last changed"""
+        return self._generations.get(account_id, (0, None))
+    
+    async def bump(self, account_id: str):
+        generation, _ = self._generations.get(account_id, (0, None))
+        self._generations[account_id] = (generation + 1, time.time())
+    
+    async def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+    
+    async def set(self, key: str, entry: dict):
+        self._entries.set(key, entry)
+    
+    async def invalidate(self, account_id: str, matches: Callable[[dict], bool]) -> int:
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry["account_id"] == account_id and matches(entry)
+        ]
+        for key in stale:
+            self._entries.delete(key)
+        return len(stale)
+
+
+class RedisBackend:
+    """
+    Cache shared by all workers. Each account has a hash of its entry keys and
+    covered ranges, so invalidation only deletes the overlapping entries.
+    """
+    
+    def __init__(self, url: str, ttl: float):
+        if redis is None:
+            raise RuntimeError("METRICS_CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+    
+    @staticmethod
+    def _entry_key(key: str) -> str:
+        return f"metrics-cache:{key}"
+    
+    @staticmethod
+    def _index_key(account_id: str) -> str:
+        return f"metrics-cache-index:{account_id}"
+    
+    @staticmethod
+    def _generation_key(account_id: str) -> str:
+        return f"metrics-cache-generation:{account_id}"
+    
+    async def generation(self, account_id: str) -> tuple[int, Optional[float]]:
+        """Account generation and the wall-clock time it last changed"""
+        raw = await self.client.hmget(self._generation_key(account_id), "generation", "changed_at")
+        generation, changed_at = raw
+        return (
+            int(generation) if generation is not None else 0,
+            float(changed_at) if changed_at is not None else None,
+        )
+    
+    async def bump(self, account_id: str):
+        generation_key = self._generation_key(account_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(generation_key, "generation", 1)
+            pipe.hset(generation_key, "changed_at", time.time())
+            await pipe.execute()
+    
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self._entry_key(key))
+        return json.loads(raw) if raw else None
+    
+    async def set(self, key: str, entry: dict):
+        coverage = {field: entry[field] for field in ("account_id", "partner_id", "start", "end")}
+        index_key = self._index_key(entry["account_id"])
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._entry_key(key), json.dumps(entry), ex=self.ttl)
+            pipe.hset(index_key, key, json.dumps(coverage))
+            pipe.expire(index_key, self.ttl)
+            await pipe.execute()
+    
+    async def invalidate(self, account_id: str, matches: Callable[[dict], bool]) -> int:
+        index_key = self._index_key(account_id)
+        index = await self.client.hgetall(index_key)
+        stale = [
+            key.decode() if isinstance(key, bytes) else key
+            for key, coverage in index.items()
+            if matches(json.loads(coverage))
+        ]
+        if stale:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._entry_key(key) for key in stale))
+                pipe.hdel(index_key, *stale)
+                await pipe.execute()
+        return len(stale)
+
+
+class MetricsCache:
+    """Cache front used by the metrics endpoints"""
+    
+    def __init__(self, backend=None):
+        self.backend = backend
+    
+    @staticmethod
+    def key(endpoint: str, account_id: str, **params) -> str:
+        """Cache key from the raw request parameters"""
+        parts = [f"{name}={params[name]}" for name in sorted(params)]
+        return f"{endpoint}:{account_id}:" + "&".join(parts)
+    
+    async def get(self, key: str) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            print(f"Metrics cache read error: {e}")
+            return None
+    
+    async def generation(self, account_id: str) -> Optional[int]:
+        """Generation to pass to set(); read it before running the query"""
+        if self.backend is None:
+            return None
+        try:
+            generation, _ = await self.backend.generation(account_id)
+            return generation
+        except Exception as e:
+            print(f"Metrics cache read error: {e}")
+            return None
+    
+    async def _writable(self, account_id: str, generation: Optional[int], replica: bool) -> bool:
+        """Whether a response computed at generation may still be cached"""
+        if generation is None:
+            return False
+        current, changed_at = await self.backend.generation(account_id)
+        if current != generation:
+            return False
+        if replica and changed_at is not None and time.time() - changed_at < REPLICA_STALE_SECONDS:
+            return False
+        return True
+    
+    async def set(
+        self,
+        key: str,
+        body: dict,
+        account_id: str,
+        partner_id: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        generation: Optional[int] = None,
+        replica: bool = False,
+    ) -> dict:
+        """
+        Store a response body covering [start, end] (None for open-ended) and
+        return the entry, including its ETag. Nothing is stored if the account
+        was invalidated since generation was read, or, for replica reads, too
+        recently for the replica to have caught up.
+        """
+        entry = {
+            "body": body,
+            "etag": make_etag(body),
+            "account_id": account_id,
+            "partner_id": partner_id,
+            "start": _epoch(start),
+            "end": _epoch(end),
+        }
+        if self.backend is not None:
+            try:
+                if await self._writable(account_id, generation, replica):
+                    await self.backend.set(key, entry)
+            except Exception as e:
+                print(f"Metrics cache write error: {e}")
+        return entry
+    
+    async def invalidate(self, account_id: str, buckets: Optional[list[dict]] = None) -> int:
+        """
+        Drop entries affected by changed hourly buckets ({"bucket_start", "partner_id"}
+        as sent in ingest notifications). None drops every entry of the account.
+        """
+        if self.backend is None:
+            return 0
+        
+        changed = None
+        if buckets is not None:
+            changed = []
+            for bucket in buckets:
+                start = datetime.fromisoformat(bucket["bucket_start"])
+                changed.append((
+                    _epoch(start),
+                    _epoch(start + BUCKET_WIDTH),
+                    bucket.get("partner_id"),
+                ))
+        
+        def matches(entry: dict) -> bool:
+            if changed is None:
+                return True
+            for bucket_start, bucket_end, partner_id in changed:
+                if entry["partner_id"] and partner_id != entry["partner_id"]:
+                    continue
+                if entry["start"] is not None and bucket_end <= entry["start"]:
+                    continue
+                if entry["end"] is not None and bucket_start > entry["end"]:
+                    continue
+                return True
+            return False
+        
+        try:
+            await self.backend.bump(account_id)
+            return await self.backend.invalidate(account_id, matches)
+        except Exception as e:
+            print(f"Metrics cache invalidation error: {e}")
+            return 0
+
+
+def _create_backend():
+    if settings.METRICS_CACHE_BACKEND == "memory":
+        return MemoryBackend(
+            maxsize=settings.METRICS_CACHE_SIZE,
+            ttl=settings.METRICS_CACHE_TTL_SECONDS,
+        )
+    if settings.METRICS_CACHE_BACKEND == "redis":
+        return RedisBackend(
+            settings.METRICS_CACHE_REDIS_URL,
+            ttl=settings.METRICS_CACHE_TTL_SECONDS,
+        )
+    return None
+
+
+metrics_cache = MetricsCache(_create_backend())
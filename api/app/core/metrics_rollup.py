@@ -0,0 +1,142 @@
+"""
+Hourly metrics rollup engine
+
+Calls contribute counters to a (bucket_start, account_id, partner_id) bucket of
+call_metrics_hourly. Ingest computes signed deltas between a call's previous and
+new state and applies them with a single INSERT ... ON CONFLICT DO UPDATE, so
+concurrent workers never read-modify-write the same row and re-ingesting a call
+moves its contribution instead of counting it twice.
+
+In TimescaleDB mode the rollup is a continuous aggregate maintained by the
+database, so deltas are still computed (for real-time pushes) but not applied.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+import uuid
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.call import CallDisposition
+from app.models.call_metrics_hourly import CallMetricsHourly
+
+COUNTERS = (
+    "total_calls",
+    "billable_calls",
+    "sales",
+    "answers",
+    "connected",
+    "priced_sales",
+    "sale_amount_cents_total",
+)
+
+# Columns of a call that affect its rollup contribution
+SNAPSHOT_FIELDS = (
+    "started_at",
+    "partner_id",
+    "billable",
+    "sale_made",
+    "sale_amount_cents",
+    "disposition",
+)
+
+BucketKey = tuple[datetime, Optional[uuid.UUID]]
+
+
+def call_snapshot(call) -> dict:
+    """Capture the rollup-relevant fields of a Call (or a mapping with the same keys)"""
+    if isinstance(call, dict):
+        return {field: call[field] for field in SNAPSHOT_FIELDS}
+    return {field: getattr(call, field) for field in SNAPSHOT_FIELDS}
+
+
+def bucket_for(started_at: datetime) -> datetime:
+    """Round a timestamp down to its hourly bucket (naive timestamps are taken as UTC)"""
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    return started_at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def call_counters(snapshot: dict) -> dict[str, int]:
+    """Counter contribution of a single call"""
+    connected = CallDisposition(snapshot["disposition"]) == CallDisposition.CONNECTED
+    priced = bool(snapshot["sale_made"] and snapshot["sale_amount_cents"])
+    return {
+        "total_calls": 1,
+        "billable_calls": 1 if snapshot["billable"] else 0,
+        "sales": 1 if snapshot["sale_made"] else 0,
+        "answers": 1 if connected else 0,
+        "connected": 1 if connected else 0,
+        "priced_sales": 1 if priced else 0,
+        "sale_amount_cents_total": snapshot["sale_amount_cents"] if priced else 0,
+    }
+
+
+def fold_deltas(
+    changes: Iterable[tuple[Optional[dict], dict]],
+) -> dict[BucketKey, dict[str, int]]:
+    """
+    Fold (old, new) call snapshots into signed per-bucket counter deltas.
+    old is None for newly created calls. Buckets whose deltas cancel out are dropped.
+    """
+    deltas: dict[BucketKey, dict[str, int]] = {}
+
+    def add(snapshot: dict, sign: int):
+        key = (bucket_for(snapshot["started_at"]), snapshot["partner_id"])
+        bucket = deltas.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for counter, value in call_counters(snapshot).items():
+            bucket[counter] += sign * value
+
+    for old, new in changes:
+        if old is not None:
+            add(old, -1)
+        add(new, 1)
+
+    return {key: counters for key, counters in deltas.items() if any(counters.values())}
+
+
+def serialize_deltas(deltas: dict[BucketKey, dict[str, int]]) -> list[dict]:
+    """JSON-friendly list of bucket deltas, for real-time pushes"""
+    return [
+        {
+            "bucket_start": bucket_start.isoformat(),
+            "partner_id": str(partner_id) if partner_id else None,
+            **counters,
+        }
+        for (bucket_start, partner_id), counters in deltas.items()
+    ]
+
+
+async def apply_deltas(
+    db: AsyncSession,
+    account_id: str,
+    deltas: dict[BucketKey, dict[str, int]],
+):
+    """
+    Apply folded deltas to call_metrics_hourly in one atomic upsert.
+    Rows are sorted by key so concurrent batches lock buckets in the same order.
+    """
+    if not deltas or settings.ENABLE_TIMESCALE:
+        return
+
+    account_uuid = uuid.UUID(account_id)
+    rows = [
+        {
+            "bucket_start": bucket_start,
+            "account_id": account_uuid,
+            "partner_id": partner_id,
+            "unique_callers": 1,  # Simplified - would need deduplication in real implementation
+            **counters,
+        }
+        for (bucket_start, partner_id), counters in sorted(
+            deltas.items(), key=lambda item: (item[0][0], str(item[0][1]))
+        )
+    ]
+
+    table = CallMetricsHourly.__table__
+    stmt = insert(CallMetricsHourly).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.bucket_start, table.c.account_id, table.c.partner_id],
+            set_={counter: table.c[counter] + stmt.excluded[counter] for counter in COUNTERS},
+        )
+    )
@@ -0,0 +1,123 @@
+"""
+Postgres LISTEN/NOTIFY fan-out
+
+Ingest emits pg_notify on METRICS_CHANNEL inside its transaction, so the message
+is delivered to every API worker once the data is committed. Each worker runs one
+MetricsListener holding a dedicated asyncpg connection and hands each payload to
+a dispatch coroutine (the local WebSocket broadcast). A trigger on users also
+sends user_changed messages on this channel so workers evict cached users.
+"""
+import asyncio
+import json
+import random
+from typing import Awaitable, Callable, Optional
+import asyncpg
+from app.core.config import settings
+
+METRICS_CHANNEL = "hopwhistle_metrics"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+# Reconnect backoff (seconds)
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+# How often an idle connection is checked for liveness (seconds)
+HEALTH_CHECK_INTERVAL = 15.0
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def _asyncpg_dsn(url: str) -> str:
+    """Convert a SQLAlchemy URL into a DSN asyncpg accepts"""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class MetricsListener:
+    """Background LISTEN on the metrics channel with reconnect and backoff"""
+
+    def __init__(self, channel: str = METRICS_CHANNEL):
+        self.channel = channel
+        self._handler: Optional[Handler] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connection: Optional[asyncpg.Connection] = None
+        self._dispatches: set[asyncio.Task] = set()
+        self._established = False
+
+    @property
+    def is_listening(self) -> bool:
+        """True while a LISTEN connection is established"""
+        return self._connection is not None and not self._connection.is_closed()
+
+    def start(self, handler: Handler):
+        """Start listening in the background, dispatching payloads to handler"""
+        self._handler = handler
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop listening and close the connection"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            self._established = False
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Back off from scratch after a connection that had been working
+                if self._established:
+                    attempt = 0
+                delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                print(f"Metrics listener error: {e}; reconnecting in {delay:.1f}s")
+                await self._close()
+                await asyncio.sleep(delay)
+
+    async def _listen(self):
+        """Hold one LISTEN connection until it drops"""
+        terminated = asyncio.Event()
+        self._connection = await asyncpg.connect(_asyncpg_dsn(settings.DATABASE_URL))
+        self._connection.add_termination_listener(lambda conn: terminated.set())
+        await self._connection.add_listener(self.channel, self._on_notify)
+        self._established = True
+
+        while not terminated.is_set():
+            try:
+                await asyncio.wait_for(terminated.wait(), timeout=HEALTH_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                await self._connection.execute("SELECT 1")
+        raise ConnectionError("LISTEN connection terminated")
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            message = json.loads(payload)
+        except json.JSONDecodeError:
+            return
+        if self._handler:
+            task = asyncio.create_task(self._handler(message))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                connection.terminate()
+
+
+metrics_listener = MetricsListener()
@@ -0,0 +1,249 @@
+"""
+Monthly range partitioning of calls on plain PostgreSQL
+
+With CALLS_PARTITIONING set (and TimescaleDB off), migration 006 rebuilds calls as
+a table partitioned by month on started_at. Partitions are named calls_pYYYYMM,
+and calls_default catches rows outside the pre-created months. Queries filtering
+on started_at (list_calls, the metrics edges) only touch the matching months, and
+each month's indexes stay small.
+
+run_maintenance keeps CALLS_PARTITIONS_AHEAD future months created and, when
+CALLS_DETACH_AFTER_MONTHS is set, detaches older months. Detached partitions stay
+behind as standalone tables, ready to be archived (e.g. pg_dump) and dropped.
+It runs periodically in the API and can be run from cron:
+
+    python -m app.core.partitioning
+
+Partitioned tables need the partition key in every unique index and can't be
+referenced by foreign keys on id alone, so calls is keyed on (id, started_at) and
+transcripts/summaries hold call_id without a constraint, as in TimescaleDB mode.
+
+Whether 006 actually ran with CALLS_PARTITIONING set is read from the catalog at
+startup (detect_calls_layout): upserts target the primary key calls really has,
+and maintenance only runs on a partitioned table.
+"""
+import asyncio
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import text
+from app.core.config import settings
+
+PARTITION_PATTERN = re.compile(r"^calls_p(\d{4})(\d{2})$")
+DEFAULT_PARTITION = "calls_default"
+
+# pg_advisory_xact_lock key so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 0x63616C6C  # "call"
+
+
+# Primary key columns of calls, columns of its unique external-id index
+# (migration 009) and whether it is range-partitioned, as found in the catalog by
+# detect_calls_layout; None until it has run
+calls_primary_key: Optional[tuple[str, ...]] = None
+calls_external_key: Optional[tuple[str, ...]] = None
+calls_range_partitioned: Optional[bool] = None
+
+EXTERNAL_KEY_INDEX = "uq_calls_account_external_call_id"
+
+PRIMARY_KEY_SQL = text("""
+    SELECT a.attname
+    FROM pg_constraint c
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    WHERE c.conrelid = to_regclass('calls') AND c.contype = 'p'
+    ORDER BY k.ord
+""")
+
+EXTERNAL_KEY_SQL = text(f"""
+    SELECT a.attname
+    FROM pg_index i
+    CROSS JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+    WHERE i.indexrelid = to_regclass('{EXTERNAL_KEY_INDEX}')
+    ORDER BY k.ord
+""")
+
+PARTITIONED_SQL = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('calls'))"
+)
+
+
+async def is_range_partitioned(conn) -> bool:
+    """Whether calls is a partitioned table, according to the catalog"""
+    return bool((await conn.execute(PARTITIONED_SQL)).scalar())
+
+
+async def detect_calls_layout(conn):
+    """Read the calls primary key, external-id key and partitioning from the catalog"""
+    global calls_primary_key, calls_external_key, calls_range_partitioned
+    calls_primary_key = tuple((await conn.execute(PRIMARY_KEY_SQL)).scalars().all())
+    calls_external_key = tuple((await conn.execute(EXTERNAL_KEY_SQL)).scalars().all())
+    calls_range_partitioned = await is_range_partitioned(conn)
+    
+    expected = settings.CALLS_PARTITIONING and not settings.ENABLE_TIMESCALE
+    if calls_range_partitioned != expected:
+        print(
+            f"CALLS_PARTITIONING is {'set' if settings.CALLS_PARTITIONING else 'unset'} but calls "
+            f"is {'' if calls_range_partitioned else 'not '}partitioned; following the database"
+        )
+
+
+def calls_partitioned() -> bool:
+    """Whether calls is keyed on (id, started_at): a hypertable or a partitioned table"""
+    if calls_primary_key:
+        return "started_at" in calls_primary_key
+    return settings.ENABLE_TIMESCALE or settings.CALLS_PARTITIONING
+
+
+def calls_conflict_elements() -> list:
+    """
+    Unique key for call upserts, as it exists in the database: the external-id
+    index when migration 009 has run, so concurrent ingests of one call merge,
+    otherwise the primary key
+    """
+    from app.models.call import Call
+    if calls_external_key:
+        return [getattr(Call, name) for name in calls_external_key]
+    if calls_primary_key:
+        return [getattr(Call, name) for name in calls_primary_key]
+    if calls_partitioned():
+        return [Call.id, Call.started_at]
+    return [Call.id]
+
+
+def month_start(value: datetime) -> date:
+    """First day of the month containing value (naive values are taken as UTC)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Shift a first-of-month date by count months"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding a month"""
+    return f"calls_p{month:%Y%m}"
+
+
+def create_partition_sql(month: date) -> str:
+    """DDL creating the partition for one month"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF calls "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def create_default_partition_sql() -> str:
+    """DDL creating the catch-all partition"""
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF calls DEFAULT"
+
+
+async def _existing_partitions(conn) -> set[str]:
+    """Names of the partitions currently attached to calls"""
+    result = await conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'calls'
+    """))
+    return set(result.scalars().all())
+
+
+async def _create_partition(conn, month: date):
+    """
+    Create one month's partition. Rows for that month already sitting in the
+    default partition are moved into it, since Postgres refuses to create a
+    partition whose range the default partition already holds.
+    """
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+    in_range = "started_at >= :lower AND started_at < :upper"
+    bounds = {"lower": lower, "upper": upper}
+    
+    stranded = (await conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"), bounds
+    )).scalar()
+    if not stranded:
+        await conn.execute(text(create_partition_sql(month)))
+        return
+    
+    await conn.execute(text(f"ALTER TABLE calls DETACH PARTITION {DEFAULT_PARTITION}"))
+    await conn.execute(text(create_partition_sql(month)))
+    await conn.execute(
+        text(f"INSERT INTO calls SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds
+    )
+    await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    await conn.execute(text(f"ALTER TABLE calls ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+async def ensure_partitions(conn, now: Optional[datetime] = None) -> list[str]:
+    """Create partitions for this month and the next CALLS_PARTITIONS_AHEAD months"""
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = await _existing_partitions(conn)
+    
+    created = []
+    for offset in range(settings.CALLS_PARTITIONS_AHEAD + 1):
+        month = add_months(current, offset)
+        if partition_name(month) not in existing:
+            await _create_partition(conn, month)
+            created.append(partition_name(month))
+    return created
+
+
+async def detach_old_partitions(conn, now: Optional[datetime] = None) -> list[str]:
+    """Detach monthly partitions older than CALLS_DETACH_AFTER_MONTHS (0 disables)"""
+    if not settings.CALLS_DETACH_AFTER_MONTHS:
+        return []
+    
+    cutoff = add_months(
+        month_start(now or datetime.now(timezone.utc)),
+        -settings.CALLS_DETACH_AFTER_MONTHS,
+    )
+    detached = []
+    for name in sorted(await _existing_partitions(conn)):
+        match = PARTITION_PATTERN.match(name)
+        if match and date(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+            await conn.execute(text(f"ALTER TABLE calls DETACH PARTITION {name}"))
+            detached.append(name)
+    return detached
+
+
+async def run_maintenance() -> dict:
+    """
+    Pre-create future partitions and detach cold ones, in one locked transaction.
+    Does nothing unless calls is actually partitioned.
+    """
+    from app.core.database import engine
+    
+    async with engine.begin() as conn:
+        if not await is_range_partitioned(conn):
+            return {"created": [], "detached": []}
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        created = await ensure_partitions(conn)
+        detached = await detach_old_partitions(conn)
+    
+    if created or detached:
+        print(f"Call partitions created: {created}, detached: {detached}")
+    return {"created": created, "detached": detached}
+
+
+async def maintenance_loop():
+    """Run partition maintenance every CALLS_PARTITION_MAINTENANCE_HOURS"""
+    while True:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            print(f"Call partition maintenance error: {e}")
+        await asyncio.sleep(settings.CALLS_PARTITION_MAINTENANCE_HOURS * 3600)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(run_maintenance()))
@@ -0,0 +1,41 @@
+"""
+In-process fixed-window rate limiting
+"""
+import time
+from typing import Hashable, Optional
+from app.core.cache import TTLCache
+
+
+class RateLimiter:
+    """
+    Allows up to limit hits per key within a window of window seconds.
+    State is per worker; keys expire with their window.
+    """
+    
+    def __init__(self, limit: int, window: float, maxsize: int = 100000):
+        self.limit = limit
+        self.window = window
+        self._windows = TTLCache(maxsize=maxsize, ttl=window)
+    
+    def retry_after(self, key: Hashable) -> Optional[float]:
+        """Seconds until key may try again, or None if it is under the limit"""
+        entry = self._windows.get(key)
+        if entry is None:
+            return None
+        expires_at, count = entry
+        if count < self.limit:
+            return None
+        return max(0.0, expires_at - time.monotonic())
+    
+    def hit(self, key: Hashable):
+        """Count one hit against key"""
+        entry = self._windows.get(key)
+        if entry is None:
+            expires_at, count = time.monotonic() + self.window, 0
+        else:
+            expires_at, count = entry
+        self._windows.set(key, (expires_at, count + 1), ttl=expires_at - time.monotonic())
+    
+    def reset(self, key: Hashable):
+        """Forget every hit for key"""
+        self._windows.delete(key)
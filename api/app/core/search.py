@@ -0,0 +1,60 @@
+"""
+Search helpers: full-text queries over transcripts/summaries and phone-number lookups
+"""
+import re
+from typing import Optional
+from sqlalchemy import func, literal_column
+
+# Text search configuration used by the generated tsvector columns
+TS_CONFIG = literal_column("'english'::regconfig")
+
+# ts_headline options for result snippets
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=8, StartSel=<mark>, StopSel=</mark>"
+
+PHONE_PATTERN = re.compile(r"^\+?[\d\s().-]{7,}$")
+PREFIX_TERM = re.compile(r"(?<![\w\"])(\w+)\*")
+
+
+def normalized_digits(column):
+    """
+    Digits-only form of a phone column.
+    Arguments are rendered as literals so queries match the expression indexes.
+    """
+    return func.regexp_replace(
+        column,
+        literal_column(r"'\D'"),
+        literal_column("''"),
+        literal_column("'g'"),
+    )
+
+
+def phone_digits(q: str) -> Optional[list[str]]:
+    """
+    Candidate digit strings if q looks like a phone number, else None.
+    US numbers match with or without the leading country code.
+    """
+    if not PHONE_PATTERN.match(q.strip()):
+        return None
+    digits = re.sub(r"\D", "", q)
+    candidates = [digits]
+    if len(digits) == 11 and digits.startswith("1"):
+        candidates.append(digits[1:])
+    elif len(digits) == 10:
+        candidates.append("1" + digits)
+    return candidates
+
+
+def build_tsquery(q: str):
+    """
+    tsquery for a user search string.
+    Supports web-search syntax ("quoted phrases", OR, -negation) via websearch_to_tsquery,
+    plus prefix matching for terms ending in * (e.g. "medic*").
+    """
+    prefixes = PREFIX_TERM.findall(q)
+    remainder = PREFIX_TERM.sub(" ", q).strip()
+
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, remainder) if remainder else None
+    for term in prefixes:
+        prefix = func.to_tsquery(TS_CONFIG, f"{term}:*")
+        tsquery = prefix if tsquery is None else tsquery.op("&&")(prefix)
+    return tsquery
@@ -0,0 +1,123 @@
+"""
+TimescaleDB mode
+
+With ENABLE_TIMESCALE set, migration 005 turns calls into a hypertable on
+started_at and replaces the hand-maintained call_metrics_hourly rollup with the
+call_metrics_hourly_cagg continuous aggregate (real-time, so the newest hour is
+always included), with compression and retention policies on calls.
+
+Hypertables need the time column in every unique index and can't be referenced by
+foreign keys, so in this mode calls is keyed on (id, started_at) and
+transcripts/summaries hold call_id without a constraint. Migration 007 schedules a
+job deleting transcripts and summaries whose call is gone (e.g. after retention
+dropped its chunk).
+
+The refresh policy only looks back TIMESCALE_REFRESH_LOOKBACK_DAYS, so ingest
+refreshes the buckets it touched itself (refresh_metrics_buckets) before
+notifying clients; corrections to older calls reach the aggregate immediately.
+
+The layout is fixed when 005 runs, but the app reads ENABLE_TIMESCALE at runtime,
+so startup checks the catalog (verify_timescale_mode) and refuses to run if the
+flag and the migrated schema disagree.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable
+from sqlalchemy import table, column, text, DateTime, Integer, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.config import settings
+
+METRICS_HOURLY_VIEW = "call_metrics_hourly_cagg"
+
+# Continuous aggregate with the same columns as call_metrics_hourly (minus unique_callers)
+call_metrics_hourly_cagg = table(
+    METRICS_HOURLY_VIEW,
+    column("bucket_start", DateTime(timezone=True)),
+    column("account_id", UUID(as_uuid=True)),
+    column("partner_id", UUID(as_uuid=True)),
+    column("total_calls", Integer),
+    column("billable_calls", Integer),
+    column("sales", Integer),
+    column("answers", Integer),
+    column("connected", Integer),
+    column("priced_sales", Integer),
+    column("sale_amount_cents_total", BigInteger),
+)
+
+
+def metrics_hourly_table():
+    """Hourly rollup the metrics endpoints read from"""
+    if settings.ENABLE_TIMESCALE:
+        return call_metrics_hourly_cagg
+    from app.models.call_metrics_hourly import CallMetricsHourly
+    return CallMetricsHourly.__table__
+
+
+async def calls_is_hypertable(conn) -> bool:
+    """Whether calls is a TimescaleDB hypertable, according to the catalog"""
+    installed = (await conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb')")
+    )).scalar()
+    if not installed:
+        return False
+    return (await conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM timescaledb_information.hypertables
+            WHERE hypertable_schema = current_schema() AND hypertable_name = 'calls'
+        )
+    """))).scalar()
+
+
+async def verify_timescale_mode(conn):
+    """Raise if ENABLE_TIMESCALE doesn't match whether migration 005 made calls a hypertable"""
+    hypertable = await calls_is_hypertable(conn)
+    if hypertable and not settings.ENABLE_TIMESCALE:
+        raise RuntimeError(
+            "calls is a TimescaleDB hypertable but ENABLE_TIMESCALE is off; "
+            "set ENABLE_TIMESCALE=true to match the migrated schema"
+        )
+    if settings.ENABLE_TIMESCALE and not hypertable:
+        raise RuntimeError(
+            "ENABLE_TIMESCALE is set but calls is not a hypertable; "
+            "run the migrations with ENABLE_TIMESCALE=true (revision 005) or unset it"
+        )
+
+
+def refresh_windows(bucket_starts: Iterable[datetime]) -> list[tuple[datetime, datetime]]:
+    """Group hourly buckets into refresh windows, splitting on gaps over a day"""
+    windows: list[tuple[datetime, datetime]] = []
+    for bucket_start in sorted(set(bucket_starts)):
+        bucket_end = bucket_start + timedelta(hours=1)
+        if windows and bucket_start - windows[-1][1] <= timedelta(days=1):
+            windows[-1] = (windows[-1][0], bucket_end)
+        else:
+            windows.append((bucket_start, bucket_end))
+    return windows
+
+
+async def refresh_metrics_buckets(bucket_starts: Iterable[datetime]):
+    """
+    Re-materialize the continuous aggregate over the hourly buckets an ingest
+    touched. Must run after the ingest commits: refreshes can't run inside a
+    transaction, so this uses its own autocommit connection and the simple query
+    protocol.
+    """
+    if not settings.ENABLE_TIMESCALE:
+        return
+    windows = refresh_windows(bucket_starts)
+    if not windows:
+        return
+    
+    from app.core.database import engine
+    
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            raw = await conn.get_raw_connection()
+            for window_start, window_end in windows:
+                await raw.driver_connection.execute(
+                    f"CALL refresh_continuous_aggregate('{METRICS_HOURLY_VIEW}', "
+                    f"'{window_start.isoformat()}'::timestamptz, '{window_end.isoformat()}'::timestamptz)"
+                )
+    except Exception as e:
+        # The refresh policy still catches up on buckets inside its lookback
+        print(f"Continuous aggregate refresh error: {e}")
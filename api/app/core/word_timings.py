@@ -0,0 +1,194 @@
+"""
+Packed word-level timings for transcripts
+
+Word timings arrive as JSON ({"words": [{"word", "start", "end", "speaker"}, ...]},
+start/end in seconds). Stored that way every word repeats its key names, float
+text and speaker label, so they are packed into a columnar little-endian blob:
+
+    header   magic b"WT", version (u8), word count (u32), speaker count (u16),
+             overflow length (u32)
+    speakers speaker labels, each a u16 length + UTF-8 bytes
+    overflow UTF-8 text of words that could not be located in the transcript
+    columns  start_ms i32[n], end_ms i32[n], speaker u16[n], offset u32[n], length u16[n]
+
+Word text is not stored: offset/length point into the transcript text (followed by
+the overflow). Missing times are -1 and a missing speaker is 0xFFFF.
+
+Only words_json that unpacks to exactly what was sent is packed: a lone "words"
+list whose words carry word, start, end and optionally a string speaker, with
+times on whole milliseconds. Anything else (extra keys such as score,
+word_segments, both lists at once) is kept as JSON unchanged.
+"""
+import bisect
+import struct
+from typing import Optional
+
+MAGIC = b"WT"
+VERSION = 1
+HEADER = struct.Struct("<2sBIHI")
+NO_TIME = -1
+NO_SPEAKER = 0xFFFF
+
+WORD_KEYS = {"word", "start", "end", "speaker"}
+REQUIRED_WORD_KEYS = {"word", "start", "end"}
+
+
+def _is_time(value) -> bool:
+    return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+
+def _word_list(words_json: Optional[dict]) -> Optional[list]:
+    """The word list of a words_json in the packable layout, or None"""
+    if not isinstance(words_json, dict) or set(words_json) != {"words"}:
+        return None
+    words = words_json["words"]
+    if not isinstance(words, list):
+        return None
+    for word in words:
+        if not (
+            isinstance(word, dict)
+            and REQUIRED_WORD_KEYS <= set(word) <= WORD_KEYS
+            and isinstance(word["word"], str)
+            and _is_time(word["start"])
+            and _is_time(word["end"])
+            and isinstance(word.get("speaker", ""), str)
+        ):
+            return None
+    return words
+
+
+def _ms(seconds) -> int:
+    if seconds is None:
+        return NO_TIME
+    return max(0, min(int(round(float(seconds) * 1000)), 2**31 - 1))
+
+
+def pack_words(words_json: Optional[dict], text: str) -> tuple[Optional[dict], Optional[bytes]]:
+    """
+    Split words_json into (words_json to keep, packed timings).
+    Returns (None, blob) when the blob unpacks to words_json exactly; anything
+    else is kept as JSON unchanged.
+    """
+    words = _word_list(words_json)
+    if words is None:
+        return words_json, None
+    
+    speakers: dict[str, int] = {}
+    overflow: list[str] = []
+    overflow_len = 0
+    starts, ends, speaker_ids, offsets, lengths = [], [], [], [], []
+    cursor = 0
+    
+    for word in words:
+        token = str(word["word"])
+        position = text.find(token, cursor) if token else cursor
+        if position < 0:
+            position = len(text) + overflow_len
+            overflow.append(token)
+            overflow_len += len(token)
+        else:
+            cursor = position + len(token)
+        
+        speaker = word.get("speaker")
+        if speaker is None:
+            speaker_ids.append(NO_SPEAKER)
+        else:
+            speaker_ids.append(speakers.setdefault(str(speaker), len(speakers)))
+        starts.append(_ms(word.get("start")))
+        ends.append(_ms(word.get("end")))
+        offsets.append(position)
+        lengths.append(min(len(token), 0xFFFF))
+    
+    n = len(words)
+    overflow_raw = "".join(overflow).encode()
+    parts = [HEADER.pack(MAGIC, VERSION, n, len(speakers), len(overflow_raw))]
+    for label in speakers:
+        raw = label.encode()
+        parts.append(struct.pack("<H", len(raw)) + raw)
+    parts.append(overflow_raw)
+    parts.append(struct.pack(f"<{n}i", *starts))
+    parts.append(struct.pack(f"<{n}i", *ends))
+    parts.append(struct.pack(f"<{n}H", *speaker_ids))
+    parts.append(struct.pack(f"<{n}I", *offsets))
+    parts.append(struct.pack(f"<{n}H", *lengths))
+    blob = b"".join(parts)
+    
+    # Sub-millisecond or out-of-range times and over-long words don't survive packing
+    if WordTimings(blob, text).to_words_json() != words_json:
+        return words_json, None
+    return None, blob
+
+
+class WordTimings:
+    """Decoded packed timings, with time-window lookups"""
+    
+    def __init__(self, blob: bytes, text: str):
+        magic, version, n, speaker_count, overflow_bytes = HEADER.unpack_from(blob, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported word timing format")
+        pos = HEADER.size
+        
+        self.speakers = []
+        for _ in range(speaker_count):
+            (size,) = struct.unpack_from("<H", blob, pos)
+            pos += 2
+            self.speakers.append(blob[pos:pos + size].decode())
+            pos += size
+        
+        self.source = text + blob[pos:pos + overflow_bytes].decode()
+        pos += overflow_bytes
+        
+        def column(fmt: str, size: int):
+            nonlocal pos
+            values = struct.unpack_from(f"<{n}{fmt}", blob, pos)
+            pos += n * size
+            return values
+        
+        self.starts = column("i", 4)
+        self.ends = column("i", 4)
+        self.speaker_ids = column("H", 2)
+        self.offsets = column("I", 4)
+        self.lengths = column("H", 2)
+        
+        # Non-decreasing start per word (untimed words take the previous start)
+        # so windows can be found by bisection
+        self._seek_keys = []
+        latest = 0
+        for start in self.starts:
+            latest = max(latest, start)
+            self._seek_keys.append(latest)
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def word(self, i: int) -> dict:
+        """One word in the original words_json shape (times in seconds)"""
+        start, end, speaker = self.starts[i], self.ends[i], self.speaker_ids[i]
+        word = {
+            "word": self.source[self.offsets[i]:self.offsets[i] + self.lengths[i]],
+            "start": start / 1000 if start != NO_TIME else None,
+            "end": end / 1000 if end != NO_TIME else None,
+        }
+        if speaker != NO_SPEAKER:
+            word["speaker"] = self.speakers[speaker]
+        return word
+    
+    def window(self, start_ms: int, end_ms: Optional[int] = None) -> list[dict]:
+        """Words overlapping [start_ms, end_ms)"""
+        # First word starting at start_ms, or the one before it if still being spoken
+        lo = bisect.bisect_left(self._seek_keys, start_ms)
+        if lo > 0 and self.ends[lo - 1] > start_ms:
+            lo -= 1
+        hi = len(self) if end_ms is None else bisect.bisect_left(self._seek_keys, end_ms, lo)
+        return [self.word(i) for i in range(lo, hi)]
+    
+    def to_words_json(self) -> dict:
+        """All words in the original words_json shape"""
+        return {"words": [self.word(i) for i in range(len(self))]}
+
+
+def transcript_words_json(transcript) -> Optional[dict]:
+    """A transcript's word timings as words_json, whichever way they are stored"""
+    if transcript.word_timings is not None:
+        return WordTimings(transcript.word_timings, transcript.text).to_words_json()
+    return transcript.words_json
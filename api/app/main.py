@@ -4,9 +4,12 @@ Hopwhistle API - Main FastAPI application
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.core.config import settings
-from app.core.database import engine, init_db
+from app.core.database import engine, read_engine, init_db
+from app.core.notifications import metrics_listener
+from app.core import partitioning
 from app.api.v1.router import api_router
 
 
@@ -15,9 +18,19 @@ async def lifespan(app: FastAPI):
     """Lifespan events for startup/shutdown"""
     # Startup
     await init_db()
+    from app.api.v1.websocket import broadcast_metrics_update
+    metrics_listener.start(broadcast_metrics_update)
+    partition_maintenance = None
+    if partitioning.calls_range_partitioned:
+        partition_maintenance = asyncio.create_task(partitioning.maintenance_loop())
     yield
     # Shutdown
+    if partition_maintenance:
+        partition_maintenance.cancel()
+    await metrics_listener.stop()
     await engine.dispose()
+    if read_engine:
+        await read_engine.dispose()
 
 
 app = FastAPI(
@@ -2,10 +2,11 @@
 Call model
 """
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Boolean, Integer, DateTime, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, ForeignKey, Boolean, Integer, DateTime, Enum as SQLEnum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.search import normalized_digits
 import enum
 from datetime import datetime
 
@@ -50,6 +51,14 @@ class Call(Base):
     transcript = relationship("Transcript", back_populates="call", uselist=False, cascade="all, delete-orphan")
     summary = relationship("Summary", back_populates="call", uselist=False, cascade="all, delete-orphan")
     
+    # Phone-number lookup indexes on digits-only ani/dnis, and the ingest upsert
+    # key (migration 009 adds started_at to it on hypertable/partitioned layouts)
+    __table_args__ = (
+        Index("ix_calls_account_ani_digits", account_id, normalized_digits(ani)),
+        Index("ix_calls_account_dnis_digits", account_id, normalized_digits(dnis)),
+        Index("uq_calls_account_external_call_id", account_id, external_call_id, unique=True),
+    )
+    
     def __repr__(self):
         return f"<Call(id={self.id}, external_call_id={self.external_call_id}, disposition={self.disposition})>"
 
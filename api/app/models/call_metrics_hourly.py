@@ -1,7 +1,7 @@
 """
 Call metrics hourly aggregation model
 """
-from sqlalchemy import Column, ForeignKey, Integer, DateTime, PrimaryKeyConstraint
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, DateTime, PrimaryKeyConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -23,6 +23,10 @@ class CallMetricsHourly(Base):
     connected = Column(Integer, nullable=False, default=0)
     unique_callers = Column(Integer, nullable=False, default=0)
     
+    # Sales with a recorded amount, for AOV
+    priced_sales = Column(Integer, nullable=False, default=0, server_default="0")
+    sale_amount_cents_total = Column(BigInteger, nullable=False, default=0, server_default="0")
+    
     __table_args__ = (
         PrimaryKeyConstraint("bucket_start", "account_id", "partner_id"),
         {},
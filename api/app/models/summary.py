@@ -2,8 +2,8 @@
 Summary model
 """
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Text, Enum as SQLEnum, JSON
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, ForeignKey, Text, Enum as SQLEnum, JSON, Computed, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -25,10 +25,19 @@ class Summary(Base):
     summary = Column(Text, nullable=False)
     key_points = Column(JSONB, nullable=True)  # Array of strings
     sentiment = Column(SQLEnum(Sentiment), nullable=True)
+    search_vector = Column(
+        TSVECTOR,
+        Computed("setweight(to_tsvector('english', coalesce(summary, '')), 'A')", persisted=True),
+    )
     
     # Relationships
     call = relationship("Call", back_populates="summary")
     
+    # Full-text search index
+    __table_args__ = (
+        Index("ix_summaries_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    
     def __repr__(self):
         return f"<Summary(id={self.id}, call_id={self.call_id}, sentiment={self.sentiment})>"
 
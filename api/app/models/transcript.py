@@ -2,8 +2,8 @@
 Transcript model
 """
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Text, JSON
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, ForeignKey, Text, JSON, Computed, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy import Index
 from app.core.database import Base
@@ -17,7 +17,12 @@ class Transcript(Base):
     call_id = Column(UUID(as_uuid=True), ForeignKey("calls.id"), unique=True, nullable=False, index=True)
     language = Column(String(10), nullable=False, default="en")
     text = Column(Text, nullable=False)
-    words_json = Column(JSONB, nullable=True)  # Word-level timings
+    words_json = Column(JSONB, nullable=True)  # Word-level timings (layouts that can't be packed)
+    word_timings = Column(LargeBinary, nullable=True)  # Packed word-level timings, see app.core.word_timings
+    search_vector = Column(
+        TSVECTOR,
+        Computed("setweight(to_tsvector('english', coalesce(text, '')), 'B')", persisted=True),
+    )
     
     # Relationships
     call = relationship("Call", back_populates="transcript")
@@ -25,6 +30,7 @@ class Transcript(Base):
     # Full-text search index
     __table_args__ = (
         Index("idx_transcript_fts", "text", postgresql_using="gin", postgresql_ops={"text": "gin_trgm_ops"}),
+        Index("ix_transcripts_search_vector", "search_vector", postgresql_using="gin"),
     )
     
     def __repr__(self):
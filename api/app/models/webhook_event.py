@@ -2,7 +2,7 @@
 Webhook event model (for ingestion auditing)
 """
 import uuid
-from sqlalchemy import Column, String, Enum as SQLEnum, JSON
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, JSON
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.core.database import Base
 import enum
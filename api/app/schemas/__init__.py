@@ -2,7 +2,12 @@
 Pydantic schemas for API requests/responses
 """
 from app.schemas.auth import LoginRequest, LoginResponse, UserResponse
-from app.schemas.call import CallCreate, CallResponse, CallListResponse, CallIngestRequest
+from app.schemas.call import (
+    CallCreate, CallResponse, CallListResponse, CallIngestRequest,
+    CallBulkIngestResult, CallBulkIngestResponse,
+    CallSearchResult, CallSearchResponse,
+    TranscriptResponse, SummaryResponse, CallDetailResponse, CallDetailsResponse,
+)
 from app.schemas.metrics import MetricsSummary, TimeSeriesPoint, TimeSeriesResponse
 from app.schemas.partner import PartnerResponse, PartnerListResponse
 
@@ -14,6 +19,18 @@ __all__ = [
     "CallResponse",
     "CallListResponse",
     "CallIngestRequest",
+    "CallBulkIngestResult",
+    "CallBulkIngestResponse",
+    "CallSearchResult",
+    "CallSearchResponse",
+    "TranscriptResponse",
+    "SummaryResponse",
+    "CallDetailResponse",
+    "CallDetailsResponse",
+    "TranscriptResponse",
+    "SummaryResponse",
+    "CallDetailResponse",
+    "CallDetailsResponse",
     "MetricsSummary",
     "TimeSeriesPoint",
     "TimeSeriesResponse",
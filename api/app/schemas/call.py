@@ -78,11 +78,72 @@ class CallResponse(BaseModel):
         from_attributes = True
 
 
+class TranscriptResponse(BaseModel):
+    """Transcript response schema"""
+    call_id: str
+    language: str
+    text: str
+    words_json: Optional[dict] = None
+
+
+class SummaryResponse(BaseModel):
+    """Summary response schema"""
+    call_id: str
+    summary: str
+    key_points: Optional[List[str]] = None
+    sentiment: Optional[str] = None
+
+
+class CallDetailResponse(CallResponse):
+    """Call with its transcript and summary, when requested via include"""
+    transcript: Optional[TranscriptResponse] = None
+    summary: Optional[SummaryResponse] = None
+
+
+class CallDetailsResponse(BaseModel):
+    """Batch call details; IDs that were not found are listed separately"""
+    items: List[CallDetailResponse]
+    not_found: List[str]
+
+
 class CallListResponse(BaseModel):
     """Call list response with pagination"""
     items: List[CallResponse]
-    total: int
+    total: Optional[int] = None  # None when the count was not requested
+    total_is_estimate: bool = False
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Set in cursor mode when more rows follow
 
+
+
+class CallBulkIngestResult(BaseModel):
+    """Per-record result of a bulk ingest"""
+    index: int  # Position of the record in the request body
+    external_call_id: Optional[str] = None
+    status: str  # "created", "updated" or "error"
+    call_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CallBulkIngestResponse(BaseModel):
+    """Bulk ingest response"""
+    received: int
+    succeeded: int
+    failed: int
+    results: List[CallBulkIngestResult]
+
+
+class CallSearchResult(BaseModel):
+    """Full-text search hit"""
+    call: CallResponse
+    rank: float
+    headline: Optional[str] = None  # Matching snippet with <mark> highlights
+
+
+class CallSearchResponse(BaseModel):
+    """Full-text search results, ordered by rank"""
+    items: List[CallSearchResult]
+    page: int
+    page_size: int
@@ -14,6 +14,10 @@ class MetricsSummary(BaseModel):
     closing_percentage: float  # sales / billable_calls
     answer_rate: float  # connected / total_calls
     aov_cents: Optional[int] = None  # Average order value in cents
+    # Raw counters, so clients can apply real-time deltas locally
+    connected: int = 0
+    priced_sales: int = 0
+    sale_amount_cents_total: int = 0
 
 
 class TimeSeriesPoint(BaseModel):
@@ -27,6 +31,7 @@ class TimeSeriesPoint(BaseModel):
 
 class TimeSeriesResponse(BaseModel):
     """Time series response"""
-    interval: str  # "hour" or "day"
+    interval: str  # "hour", "day", "week" or "month"
+    timezone: str = "UTC"
     points: List[TimeSeriesPoint]
 
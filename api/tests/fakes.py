@@ -0,0 +1,49 @@
+"""
+Stand-ins for database connections, for code that only reads a few catalog rows
+"""
+
+
+class FakeResult:
+    """Result stand-in supporting scalar(), scalars().all() and all()"""
+    
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+    
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+    
+    def scalars(self):
+        return FakeScalars([row[0] for row in self.rows])
+    
+    def all(self):
+        return list(self.rows)
+
+
+class FakeScalars:
+    """scalars() stand-in"""
+    
+    def __init__(self, values: list):
+        self.values = values
+    
+    def all(self):
+        return list(self.values)
+
+
+class FakeConnection:
+    """
+    Connection answering queries by SQL fragment.
+    answers maps a substring of the SQL to the rows returned for it; the first
+    matching fragment wins.
+    """
+    
+    def __init__(self, answers: dict[str, list[tuple]]):
+        self.answers = answers
+        self.statements: list[str] = []
+    
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        for fragment, rows in self.answers.items():
+            if fragment in sql:
+                return FakeResult(rows)
+        raise AssertionError(f"Unexpected query: {sql}")
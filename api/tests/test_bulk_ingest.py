@@ -0,0 +1,137 @@
+import asyncio
+import json
+import pytest
+from app.api.v1.calls import _JsonArrayReader, _iter_ingest_records, _lock_external_ids
+from app.core.config import settings
+
+RECORDS = [
+    {"external_call_id": f"call-{i}", "agent_name": 'Ann "A" \\ ]}[{,', "note": "héllo 😀", "n": i * 1.5}
+    for i in range(20)
+] + [12345, "text", None, True, [1, [2]], {}]
+
+
+class StreamingRequest:
+    """Request stand-in streaming a body in fixed-size chunks"""
+    
+    def __init__(self, body: bytes, chunk_size: int):
+        self.body = body
+        self.chunk_size = chunk_size
+    
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+def read_records(body: bytes, chunk_size: int = 7) -> list:
+    async def collect():
+        return [item async for item in _iter_ingest_records(StreamingRequest(body, chunk_size))]
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def max_record_bytes(monkeypatch):
+    def set_limit(limit: int):
+        monkeypatch.setattr(settings, "INGEST_MAX_RECORD_BYTES", limit)
+    return set_limit
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+def test_json_array_any_chunking(chunk_size):
+    body = json.dumps(RECORDS, indent=2).encode()
+    assert read_records(body, chunk_size) == list(enumerate(RECORDS))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+def test_ndjson_reports_bad_lines_and_continues(chunk_size):
+    body = b'{"a": 1}\nnot json\n\n{"b": 2}'
+    records = read_records(body, chunk_size)
+    assert records[0] == (0, {"a": 1})
+    assert records[1][0] == 1 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (2, {"b": 2})
+
+
+@pytest.mark.parametrize("body,kept,error", [
+    (b" [ ] ", [], None),
+    (b"[1,,2]", [1], "Expecting value"),
+    (b"[1 2]", [1], "Expected ',' or ']'"),
+    (b'[{"a": 1}, {"b": 2} x', [{"a": 1}, {"b": 2}], "Expected ',' or ']'"),
+    (b'[{"a": 1}', [{"a": 1}], "Unterminated array"),
+    (b'[{"a": 1}] x', [{"a": 1}], "Extra data after the array"),
+    (b'[{"a": }]', [], "Expecting value"),
+    (b'[{"a": 1]', [], "Expecting ',' delimiter"),
+    (b"[12abc]", [], "Extra data in array element"),
+    (b'[{"a": 1}, "\xff"]', [{"a": 1}], "Invalid UTF-8"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_json_array_errors_keep_earlier_records(body, kept, error, chunk_size):
+    records = read_records(body, chunk_size)
+    assert [record for _, record in records[:len(kept)]] == kept
+    rest = records[len(kept):]
+    if error is None:
+        assert rest == []
+    else:
+        assert rest == [(len(kept), rest[0][1])]
+        assert rest[0][1].startswith("Invalid JSON array") and error in rest[0][1]
+
+
+def test_json_array_oversized_element_ends_array(max_record_bytes):
+    max_record_bytes(50)
+    body = json.dumps([{"b": 1}, {"a": "x" * 200}, {"c": 1}]).encode()
+    assert read_records(body, 9) == [
+        (0, {"b": 1}),
+        (1, "Invalid JSON array: Record exceeds INGEST_MAX_RECORD_BYTES"),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_ndjson_oversized_line_is_skipped(max_record_bytes, chunk_size):
+    max_record_bytes(50)
+    body = b'{"a": "' + b"x" * 200 + b'"}\n{"b": 1}\n{"c": 2}'
+    assert read_records(body, chunk_size) == [
+        (0, "Record exceeds INGEST_MAX_RECORD_BYTES"),
+        (1, {"b": 1}),
+        (2, {"c": 2}),
+    ]
+
+
+def test_reader_scans_each_byte_once():
+    """A large element split into many chunks is decoded once, not per chunk"""
+    record = {"text": 'say \\"hi\\" ' * 50000, "words": [{"w": "x", "s": i} for i in range(500)]}
+    body = json.dumps([record]).encode()
+    reader = _JsonArrayReader()
+    decodes = 0
+    raw_decode = reader.decoder.raw_decode
+    
+    def counting_decode(*args, **kwargs):
+        nonlocal decodes
+        decodes += 1
+        return raw_decode(*args, **kwargs)
+    
+    reader.decoder.raw_decode = counting_decode
+    for start in range(0, len(body), 4096):
+        assert reader.feed(body[start:start + 4096]) is None
+    assert reader.feed(b"", final=True) is None
+    assert reader.drain() == [record]
+    assert decodes == 1
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_lock_external_ids_sorted_and_account_scoped():
+    db = RecordingSession()
+    asyncio.run(_lock_external_ids(db, "acct", ["b", "a", "c"]))
+    (statement,) = db.statements
+    assert "pg_advisory_xact_lock" in str(statement)
+    assert statement.compile().params["keys"] == ["acct:a", "acct:b", "acct:c"]
+
+
+def test_lock_external_ids_skips_empty_batch():
+    db = RecordingSession()
+    asyncio.run(_lock_external_ids(db, "acct", []))
+    assert db.statements == []
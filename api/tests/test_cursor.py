@@ -0,0 +1,25 @@
+import base64
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.api.v1.calls import _decode_cursor, _encode_cursor
+
+
+def test_cursor_roundtrip():
+    call = SimpleNamespace(started_at=datetime(2025, 3, 4, 5, 6, 7, 890, tzinfo=timezone.utc), id=uuid.uuid4())
+    assert _decode_cursor(_encode_cursor(call)) == (call.started_at, call.id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"2025-01-01T00:00:00").decode(),
+    base64.urlsafe_b64encode(b"yesterday|" + str(uuid.uuid4()).encode()).decode(),
+    base64.urlsafe_b64encode(b"2025-01-01T00:00:00|not-a-uuid").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,32 @@
+import uuid
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.api.v1.calls import CALL_EXPORT_COLUMNS, _export_query
+
+ACCOUNT_ID = str(uuid.uuid4())
+
+
+def compile_sql(query) -> str:
+    return " ".join(str(query.compile(dialect=postgresql.dialect())).split())
+
+
+@pytest.mark.parametrize("q", [None, "refund"])
+@pytest.mark.parametrize("includes", [set(), {"transcript"}, {"summary"}, {"transcript", "summary"}])
+def test_export_joins_each_table_once(q, includes):
+    columns, query = _export_query(ACCOUNT_ID, None, None, None, q, includes)
+    sql = compile_sql(query)
+    
+    expected_transcript_joins = 1 if q or "transcript" in includes else 0
+    assert sql.count("JOIN transcripts ON") == expected_transcript_joins
+    assert sql.count("JOIN summaries ON") == (1 if "summary" in includes else 0)
+    assert len(columns) == len(query.selected_columns)
+
+
+def test_export_search_with_transcript():
+    columns, query = _export_query(ACCOUNT_ID, None, None, None, "refund", {"transcript"})
+    sql = compile_sql(query)
+    
+    assert columns == list(CALL_EXPORT_COLUMNS) + ["transcript_text"]
+    assert "LEFT OUTER JOIN transcripts ON calls.id = transcripts.call_id" in sql
+    assert "transcripts.text ILIKE" in sql
+    assert sql.endswith("ORDER BY calls.started_at, calls.id")
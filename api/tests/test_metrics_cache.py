@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+import pytest
+from app.core import metrics_cache as metrics_cache_module
+from app.core.metrics_cache import MemoryBackend, MetricsCache, make_etag
+
+ACCOUNT_ID = "account-1"
+START = datetime(2025, 1, 1, 0, 0)
+END = datetime(2025, 1, 1, 6, 0)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def cache():
+    return MetricsCache(MemoryBackend(maxsize=100, ttl=60))
+
+
+def store(cache, key, generation, partner_id=None, replica=False):
+    return run(cache.set(
+        key, {"value": key}, ACCOUNT_ID, partner_id, START, END,
+        generation=generation, replica=replica,
+    ))
+
+
+def test_etag_ignores_key_order():
+    assert make_etag({"a": 1, "b": 2}) == make_etag({"b": 2, "a": 1})
+    assert make_etag({"a": 1}) != make_etag({"a": 2})
+
+
+def test_set_then_get(cache):
+    generation = run(cache.generation(ACCOUNT_ID))
+    entry = store(cache, "k", generation)
+    assert entry["etag"] == make_etag({"value": "k"})
+    assert run(cache.get("k")) == entry
+
+
+def test_write_refused_after_invalidation(cache):
+    generation = run(cache.generation(ACCOUNT_ID))
+    run(cache.invalidate(ACCOUNT_ID))
+    entry = store(cache, "k", generation)
+    # The response is still returned with its ETag, just not cached
+    assert entry["etag"]
+    assert run(cache.get("k")) is None
+
+
+def test_write_without_generation_not_cached(cache):
+    store(cache, "k", None)
+    assert run(cache.get("k")) is None
+
+
+def test_replica_write_refused_right_after_invalidation(cache, monkeypatch):
+    run(cache.invalidate(ACCOUNT_ID))
+    generation = run(cache.generation(ACCOUNT_ID))
+    store(cache, "replica", generation, replica=True)
+    store(cache, "primary", generation)
+    assert run(cache.get("replica")) is None
+    assert run(cache.get("primary")) is not None
+    
+    monkeypatch.setattr(metrics_cache_module, "REPLICA_STALE_SECONDS", 0)
+    store(cache, "replica", generation, replica=True)
+    assert run(cache.get("replica")) is not None
+
+
+def test_invalidate_only_overlapping_buckets(cache):
+    generation = run(cache.generation(ACCOUNT_ID))
+    store(cache, "all", generation)
+    store(cache, "partner", generation, partner_id="p1")
+    
+    # Outside the cached range
+    run(cache.invalidate(ACCOUNT_ID, [{"bucket_start": "2025-01-02T00:00:00", "partner_id": "p1"}]))
+    assert run(cache.get("all")) and run(cache.get("partner"))
+    
+    # Inside the range, for another partner
+    run(cache.invalidate(ACCOUNT_ID, [{"bucket_start": "2025-01-01T03:00:00", "partner_id": "p2"}]))
+    assert run(cache.get("all")) is None
+    assert run(cache.get("partner")) is not None
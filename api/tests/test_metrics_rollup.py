@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects import postgresql
+from app.core.config import settings
+from app.core.metrics_rollup import COUNTERS, apply_deltas, fold_deltas, serialize_deltas
+
+PARTNER = uuid.uuid4()
+HOUR = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+
+
+def snapshot(**overrides) -> dict:
+    call = {
+        "started_at": HOUR + timedelta(minutes=15),
+        "partner_id": PARTNER,
+        "billable": True,
+        "sale_made": True,
+        "sale_amount_cents": 2500,
+        "disposition": "connected",
+    }
+    call.update(overrides)
+    return call
+
+
+def test_new_call_counts_once():
+    deltas = fold_deltas([(None, snapshot())])
+    assert deltas == {(HOUR, PARTNER): {
+        "total_calls": 1,
+        "billable_calls": 1,
+        "sales": 1,
+        "answers": 1,
+        "connected": 1,
+        "priced_sales": 1,
+        "sale_amount_cents_total": 2500,
+    }}
+
+
+def test_reingest_unchanged_call_is_a_no_op():
+    assert fold_deltas([(snapshot(), snapshot())]) == {}
+
+
+def test_update_moves_contribution():
+    old = snapshot()
+    new = snapshot(started_at=HOUR + timedelta(hours=1, minutes=5), sale_made=False)
+    deltas = fold_deltas([(old, new)])
+    assert deltas[(HOUR, PARTNER)]["total_calls"] == -1
+    assert deltas[(HOUR, PARTNER)]["sale_amount_cents_total"] == -2500
+    moved = deltas[(HOUR + timedelta(hours=1), PARTNER)]
+    assert moved["total_calls"] == 1 and moved["sales"] == 0 and moved["priced_sales"] == 0
+
+
+def test_naive_timestamps_bucket_as_utc():
+    naive = snapshot(started_at=datetime(2025, 1, 1, 10, 59))
+    assert list(fold_deltas([(None, naive)])) == [(HOUR, PARTNER)]
+
+
+def test_serialize_deltas():
+    [item] = serialize_deltas(fold_deltas([(None, snapshot(partner_id=None, disposition="busy"))]))
+    assert item["bucket_start"] == HOUR.isoformat()
+    assert item["partner_id"] is None
+    assert item["answers"] == 0 and item["total_calls"] == 1
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_apply_deltas_single_sorted_upsert(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_TIMESCALE", False)
+    later = HOUR + timedelta(hours=2)
+    deltas = fold_deltas([(None, snapshot(started_at=later)), (None, snapshot())])
+    db = RecordingSession()
+    asyncio.run(apply_deltas(db, str(uuid.uuid4()), deltas))
+    
+    [statement] = db.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (bucket_start, account_id, partner_id) DO UPDATE" in sql
+    for counter in COUNTERS:
+        assert f"{counter} = (call_metrics_hourly.{counter} + excluded.{counter})" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert params["bucket_start_m0"] == HOUR and params["bucket_start_m1"] == later
+
+
+def test_apply_deltas_skipped_in_timescale_mode(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_TIMESCALE", True)
+    db = RecordingSession()
+    asyncio.run(apply_deltas(db, str(uuid.uuid4()), fold_deltas([(None, snapshot())])))
+    assert db.statements == []
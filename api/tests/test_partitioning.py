@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from app.core import partitioning
+from app.core.config import settings
+from app.core.partitioning import (
+    add_months, calls_conflict_elements, calls_partitioned, create_partition_sql,
+    detect_calls_layout, month_start, partition_name,
+)
+from tests.fakes import FakeConnection
+
+
+def catalog(
+    primary_key: tuple[str, ...],
+    partitioned: bool,
+    external_key: tuple[str, ...] = (),
+) -> FakeConnection:
+    return FakeConnection({
+        "pg_constraint": [(column,) for column in primary_key],
+        "pg_index": [(column,) for column in external_key],
+        "pg_partitioned_table": [(partitioned,)],
+    })
+
+
+@pytest.fixture(autouse=True)
+def layout(monkeypatch):
+    """Start each test with no detected layout and partitioning/Timescale off"""
+    monkeypatch.setattr(partitioning, "calls_primary_key", None)
+    monkeypatch.setattr(partitioning, "calls_external_key", None)
+    monkeypatch.setattr(partitioning, "calls_range_partitioned", None)
+    monkeypatch.setattr(settings, "CALLS_PARTITIONING", False)
+    monkeypatch.setattr(settings, "ENABLE_TIMESCALE", False)
+
+
+def column_names(elements) -> list[str]:
+    return [element.key for element in elements]
+
+
+def test_conflict_elements_fall_back_to_settings_before_detection(monkeypatch):
+    assert column_names(calls_conflict_elements()) == ["id"]
+    monkeypatch.setattr(settings, "CALLS_PARTITIONING", True)
+    assert column_names(calls_conflict_elements()) == ["id", "started_at"]
+
+
+def test_conflict_elements_follow_partitioned_catalog_without_flag():
+    asyncio.run(detect_calls_layout(catalog(("id", "started_at"), True)))
+    assert partitioning.calls_range_partitioned is True
+    assert calls_partitioned()
+    assert column_names(calls_conflict_elements()) == ["id", "started_at"]
+
+
+def test_conflict_elements_follow_plain_catalog_despite_flag(monkeypatch):
+    # 006 ran before CALLS_PARTITIONING was set, so calls is still keyed on id
+    monkeypatch.setattr(settings, "CALLS_PARTITIONING", True)
+    asyncio.run(detect_calls_layout(catalog(("id",), False)))
+    assert partitioning.calls_range_partitioned is False
+    assert not calls_partitioned()
+    assert column_names(calls_conflict_elements()) == ["id"]
+
+
+@pytest.mark.parametrize("primary_key,external_key", [
+    (("id",), ("account_id", "external_call_id")),
+    (("id", "started_at"), ("account_id", "external_call_id", "started_at")),
+])
+def test_conflict_elements_prefer_external_id_index(primary_key, external_key):
+    asyncio.run(detect_calls_layout(catalog(primary_key, False, external_key)))
+    assert column_names(calls_conflict_elements()) == list(external_key)
+
+
+def test_hypertable_key_is_not_range_partitioned(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_TIMESCALE", True)
+    asyncio.run(detect_calls_layout(catalog(("id", "started_at"), False)))
+    assert partitioning.calls_range_partitioned is False
+    assert calls_partitioned()
+
+
+def test_month_start_uses_utc():
+    value = datetime(2025, 3, 1, 1, 0, tzinfo=timezone(timedelta(hours=5)))
+    assert month_start(value) == date(2025, 2, 1)
+    assert month_start(datetime(2025, 3, 31, 23, 59)) == date(2025, 3, 1)
+
+
+@pytest.mark.parametrize("month,count,expected", [
+    (date(2025, 11, 1), 2, date(2026, 1, 1)),
+    (date(2025, 1, 1), -1, date(2024, 12, 1)),
+    (date(2025, 6, 1), 0, date(2025, 6, 1)),
+])
+def test_add_months(month, count, expected):
+    assert add_months(month, count) == expected
+
+
+def test_create_partition_sql_bounds():
+    month = date(2025, 12, 1)
+    assert partition_name(month) == "calls_p202512"
+    assert create_partition_sql(month) == (
+        "CREATE TABLE IF NOT EXISTS calls_p202512 PARTITION OF calls "
+        "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"
+    )
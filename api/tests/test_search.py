@@ -0,0 +1,51 @@
+import uuid
+from sqlalchemy.dialects import postgresql
+from app.api.v1.calls import _search_query
+from app.core.search import phone_digits
+
+ACCOUNT_ID = str(uuid.uuid4())
+
+
+def compile_sql(query) -> str:
+    return " ".join(str(query.compile(dialect=postgresql.dialect())).split())
+
+
+def search_sql(q: str, page: int = 1, page_size: int = 25) -> str:
+    return compile_sql(_search_query(ACCOUNT_ID, q, None, None, None, page, page_size))
+
+
+def test_text_search_uses_indexed_candidates():
+    sql = search_sql("refund")
+    assert (
+        "calls.id IN (SELECT transcripts.call_id FROM transcripts "
+        "WHERE transcripts.search_vector @@ websearch_to_tsquery("
+    ) in sql
+    assert "UNION SELECT summaries.call_id FROM summaries WHERE summaries.search_vector @@" in sql
+    # The combined document is only ranked, never used as the filter
+    assert "ts_rank(coalesce(summaries.search_vector" in sql
+    assert "''::tsvector) @@" not in sql
+
+
+def test_headline_only_on_page():
+    sql = search_sql("refund", page=3, page_size=10)
+    outer, inner = sql.split("JOIN (", 1)
+    assert "ts_headline" in outer
+    assert "ts_headline" not in inner.split(") AS anon_1")[0]
+    assert "LIMIT" in inner and "OFFSET" in inner
+
+
+def test_prefix_terms():
+    sql = search_sql("medic* refund")
+    assert "to_tsquery(" in sql and " && " in sql
+
+
+def test_phone_search_skips_full_text():
+    sql = search_sql("(555) 123-4567")
+    assert "regexp_replace(calls.ani" in sql
+    assert "search_vector @@" not in sql.split("JOIN (", 1)[1].split(") AS anon_1")[0]
+
+
+def test_phone_digits():
+    assert phone_digits("+1 (555) 123-4567") == ["15551234567", "5551234567"]
+    assert phone_digits("555-123-4567") == ["5551234567", "15551234567"]
+    assert phone_digits("refund") is None
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.config import settings
+from app.core.timescale import refresh_windows, verify_timescale_mode
+from tests.fakes import FakeConnection
+
+HOUR = timedelta(hours=1)
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def catalog(installed: bool, hypertable: bool) -> FakeConnection:
+    return FakeConnection({
+        "pg_extension": [(installed,)],
+        "timescaledb_information.hypertables": [(hypertable,)],
+    })
+
+
+@pytest.fixture
+def timescale(monkeypatch):
+    def set_flag(enabled: bool):
+        monkeypatch.setattr(settings, "ENABLE_TIMESCALE", enabled)
+    return set_flag
+
+
+def test_refresh_windows_merges_close_buckets_and_splits_on_gaps():
+    buckets = [T0 + 3 * HOUR, T0, T0 + HOUR, T0, T0 + timedelta(days=3)]
+    assert refresh_windows(buckets) == [
+        (T0, T0 + 4 * HOUR),
+        (T0 + timedelta(days=3), T0 + timedelta(days=3) + HOUR),
+    ]
+
+
+def test_refresh_windows_empty():
+    assert refresh_windows([]) == []
+
+
+@pytest.mark.parametrize("enabled,installed,hypertable", [
+    (False, False, False),
+    (False, True, False),
+    (True, True, True),
+])
+def test_verify_timescale_mode_accepts_matching_layout(timescale, enabled, installed, hypertable):
+    timescale(enabled)
+    asyncio.run(verify_timescale_mode(catalog(installed, hypertable)))
+
+
+def test_verify_timescale_mode_rejects_flag_without_hypertable(timescale):
+    timescale(True)
+    with pytest.raises(RuntimeError, match="not a hypertable"):
+        asyncio.run(verify_timescale_mode(catalog(True, False)))
+
+
+def test_verify_timescale_mode_rejects_hypertable_without_flag(timescale):
+    timescale(False)
+    with pytest.raises(RuntimeError, match="ENABLE_TIMESCALE is off"):
+        asyncio.run(verify_timescale_mode(catalog(True, True)))
+
+
+def test_verify_timescale_mode_skips_catalog_view_without_extension(timescale):
+    timescale(False)
+    conn = catalog(False, True)
+    asyncio.run(verify_timescale_mode(conn))
+    assert not any("hypertables" in sql for sql in conn.statements)
@@ -0,0 +1,70 @@
+import pytest
+from app.core.word_timings import WordTimings, pack_words, transcript_words_json
+
+TEXT = "Hello there. How can I help?"
+WORDS = [
+    {"word": "Hello", "start": 0.0, "end": 0.42, "speaker": "SPEAKER_00"},
+    {"word": "there.", "start": 0.5, "end": 0.9, "speaker": "SPEAKER_00"},
+    {"word": "How", "start": 1.25, "end": 1.4, "speaker": "SPEAKER_01"},
+    {"word": "can", "start": None, "end": None},
+    {"word": "I", "start": 1.6, "end": 1.65, "speaker": "SPEAKER_01"},
+    {"word": "help?", "start": 1.7, "end": 2.1, "speaker": "SPEAKER_01"},
+]
+
+
+class StoredTranscript:
+    def __init__(self, words_json, text):
+        self.words_json, self.word_timings = pack_words(words_json, text)
+        self.text = text
+
+
+def roundtrip(words_json, text=TEXT):
+    return transcript_words_json(StoredTranscript(words_json, text))
+
+
+def test_packs_plain_words():
+    words_json, blob = pack_words({"words": WORDS}, TEXT)
+    assert words_json is None and blob
+    assert WordTimings(blob, TEXT).to_words_json() == {"words": WORDS}
+
+
+def test_words_missing_from_text_use_overflow():
+    words = [{"word": "Hello", "start": 0.0, "end": 0.4}, {"word": "umm", "start": 0.4, "end": 0.6}]
+    words_json, blob = pack_words({"words": words}, "Hello")
+    assert words_json is None
+    assert WordTimings(blob, "Hello").to_words_json() == {"words": words}
+
+
+@pytest.mark.parametrize("words_json", [
+    {"words": [dict(WORDS[0], score=0.93)] + WORDS[1:]},
+    {"words": WORDS, "word_segments": WORDS},
+    {"word_segments": WORDS},
+    {"words": WORDS, "language": "en"},
+    {"words": [{"word": "Hello", "start": 0.0}]},
+    {"words": [{"word": "Hello", "start": 0.0, "end": 0.4, "speaker": 1}]},
+    {"words": [{"word": "Hello", "start": 0.0, "end": 0.4, "speaker": None}]},
+    {"words": [{"word": "Hello", "start": 0.0001, "end": 0.4}]},
+    {"words": [{"word": "Hello", "start": -1.0, "end": 0.4}]},
+    {"words": [{"word": "Hello", "start": True, "end": 0.4}]},
+    {"words": [{"word": "x" * 0x10000, "start": 0.0, "end": 0.4}]},
+    {"words": "Hello"},
+    {"segments": [{"text": "Hello", "start": 0.0, "end": 0.4}]},
+])
+def test_layouts_that_would_lose_data_stay_json(words_json):
+    kept, blob = pack_words(words_json, TEXT)
+    assert blob is None
+    assert kept is words_json
+    assert roundtrip(words_json) == words_json
+
+
+def test_no_words_json():
+    assert pack_words(None, TEXT) == (None, None)
+
+
+def test_window():
+    _, blob = pack_words({"words": WORDS}, TEXT)
+    timings = WordTimings(blob, TEXT)
+    assert [w["word"] for w in timings.window(500, 1500)] == ["there.", "How", "can"]
+    # A word still being spoken at the window start is included
+    assert [w["word"] for w in timings.window(300, 600)] == ["Hello", "there."]
+    assert [w["word"] for w in timings.window(1640)] == ["I", "help?"]
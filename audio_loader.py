@@ -0,0 +1,87 @@
+"""
+Decode audio once to 16 kHz mono float32 and share the buffer between pipeline stages
+
+Whisper (faster-whisper, openai-whisper, WhisperX) and pyannote all accept a
+decoded waveform, so a call is decoded with ffmpeg a single time instead of once
+per model. Inputs longer than AUDIO_MMAP_SECONDS are decoded straight to a scratch
+file and memory-mapped, so the samples live in the page cache rather than the heap.
+"""
+import atexit
+import os
+import subprocess
+import tempfile
+import warnings
+import numpy as np
+
+SAMPLE_RATE = 16000
+AUDIO_MMAP_SECONDS = float(os.getenv("AUDIO_MMAP_SECONDS", "1800"))
+AUDIO_SCRATCH_DIR = os.getenv("AUDIO_SCRATCH_DIR") or tempfile.gettempdir()
+
+
+def probe_duration(file_path):
+    """Duration in seconds from ffprobe, or None if it can't be read"""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+           '-of', 'default=noprint_wrappers=1:nokey=1', file_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=30)
+        return float(result.stdout.strip())
+    except Exception:
+        return None
+
+
+def _ffmpeg_cmd(file_path, output):
+    return ['ffmpeg', '-nostdin', '-v', 'error', '-i', file_path,
+            '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-y', output]
+
+
+def _remove_scratch(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _decode_to_mmap(file_path):
+    """Decode to a raw float32 scratch file and map it copy-on-write"""
+    fd, scratch = tempfile.mkstemp(suffix='.f32', prefix='pcm_', dir=AUDIO_SCRATCH_DIR)
+    os.close(fd)
+    try:
+        subprocess.run(_ffmpeg_cmd(file_path, scratch), capture_output=True, check=True)
+        if os.path.getsize(scratch) == 0:
+            return np.zeros(0, dtype=np.float32)
+        audio = np.memmap(scratch, dtype=np.float32, mode='c')
+    except Exception:
+        _remove_scratch(scratch)
+        raise
+
+    # POSIX keeps the mapping alive after unlink; Windows can't delete a mapped file
+    try:
+        os.remove(scratch)
+    except OSError:
+        atexit.register(_remove_scratch, scratch)
+    return audio
+
+
+def load_audio(file_path):
+    """Decode a file to a 16 kHz mono float32 array, memory-mapped for long inputs"""
+    duration = probe_duration(file_path)
+    if duration is not None and duration > AUDIO_MMAP_SECONDS:
+        return _decode_to_mmap(file_path)
+
+    result = subprocess.run(_ffmpeg_cmd(file_path, '-'), capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def audio_seconds(audio):
+    """Length of a decoded buffer in seconds"""
+    return len(audio) / SAMPLE_RATE
+
+
+def pyannote_input(audio):
+    """Wrap a decoded buffer for a pyannote pipeline without copying it"""
+    import torch
+    with warnings.catch_warnings():
+        # Buffers decoded from ffmpeg output are read-only; pyannote never writes to them
+        warnings.simplefilter("ignore", UserWarning)
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+    return {'waveform': waveform, 'sample_rate': SAMPLE_RATE}
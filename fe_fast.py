@@ -8,8 +8,11 @@ import re
 import hashlib
 import gc
 import subprocess
+import argparse
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, add_cache_args, apply_cache_args, next_midnight, report_cache_stats
+from transcript_cache import cached_transcript, transcript_cache_for
 
 # Try to import faster-whisper for SPEED
 try:
@@ -69,6 +72,16 @@ else:
         logger.error(f"Failed to load Whisper: {e}")
         sys.exit(1)
 
+# Transcripts are cached per recording and transcription settings
+transcript_cache = transcript_cache_for(
+    'fe_fast',
+    "faster-whisper tiny int8" if USE_FASTER_WHISPER else "whisper base",
+    language="en",
+)
+
+# DeepSeek responses are cached per exact request
+analysis_cache = AnalysisCache()
+
 # Deepseek API key
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
@@ -127,8 +140,8 @@ def download_audio_fast(url, output_folder):
         logger.error(f"Download failed: {e}")
         return None
 
-def transcribe_audio_fast(file_path):
-    """Fast transcription"""
+def transcribe_audio_fast(file_path, details=None):
+    """Fast transcription; if details is given, it receives the segments"""
     if not file_path or not os.path.exists(file_path):
         return ""
     
@@ -145,13 +158,22 @@ def transcribe_audio_fast(file_path):
             )
             
             text_parts = []
+            segments = []
             for segment in segments_gen:
                 text_parts.append(segment.text)
+                segments.append({'start': segment.start, 'end': segment.end, 'text': segment.text})
             
             transcript = " ".join(text_parts).strip()
         else:
             result = model.transcribe(file_path, language="en", fp16=False)
             transcript = result.get("text", "").strip()
+            segments = [
+                {'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+                for seg in result.get("segments", [])
+            ]
+        
+        if details is not None:
+            details['segments'] = segments
         
         logger.info(f"Transcription complete: {len(transcript)} chars")
         return transcript
@@ -256,6 +278,10 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
             "stream": False
         }
         
+        cached = analysis_cache.get(data)
+        if cached is not None:
+            return cached
+        
         response = requests.post(
             "https://api.deepseek.com/v1/chat/completions",
             headers=headers,
@@ -266,7 +292,9 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
         
         result = response.json()
         if "choices" in result and result["choices"]:
-            return result["choices"][0]["message"]["content"].strip()
+            analysis = result["choices"][0]["message"]["content"].strip()
+            analysis_cache.put(data, analysis, expires_at=next_midnight())
+            return analysis
         return "Analysis failed: No response"
         
     except Exception as e:
@@ -287,24 +315,19 @@ def process_all_urls(urls):
             'analysis': ''
         }
         
-        # Download
-        audio_file = download_audio_fast(url, AUDIO_FOLDER)
-        if not audio_file:
+        # Download and transcribe, or reuse a cached transcript
+        transcript = cached_transcript(
+            transcript_cache,
+            url,
+            lambda u: download_audio_fast(u, AUDIO_FOLDER),
+            transcribe_audio_fast
+        )
+        if transcript is None:
             result['status'] = 'Download Failed'
             result['analysis'] = 'Analysis skipped: Download Failed'
             all_results.append(result)
             continue
         
-        # Transcribe
-        transcript = transcribe_audio_fast(audio_file)
-        
-        # Clean up audio immediately
-        try:
-            os.remove(audio_file)
-            logger.info("Cleaned up audio file")
-        except:
-            pass
-        
         if not transcript:
             result['status'] = 'Transcription Failed'
             result['analysis'] = 'Analysis skipped: No Transcript'
@@ -359,6 +382,14 @@ def save_combined_output(results):
 if __name__ == "__main__":
     logger.info("🚀 Fast Call Analysis Script Started")
     
+    parser = argparse.ArgumentParser(description="Transcribe and analyze the calls listed in urls.txt")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-download and re-transcribe every URL, bypassing the transcript cache")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    transcript_cache.enabled = not args.no_cache
+    apply_cache_args(analysis_cache, args)
+    
     # Read URLs
     urls = read_urls_from_file('urls.txt')
     if not urls:
@@ -379,4 +410,7 @@ if __name__ == "__main__":
     logger.info(f"Total URLs: {len(urls)}")
     logger.info(f"Time: {duration:.1f} seconds ({duration/60:.1f} minutes)")
     logger.info(f"Output: {output_file}")
+    cache_stats = transcript_cache.stats()
+    logger.info(f"Transcript cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    report_cache_stats(analysis_cache)
     logger.info("="*70)
@@ -8,8 +8,12 @@ import re
 import hashlib
 import gc
 import subprocess
+import argparse
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, add_cache_args, apply_cache_args, next_midnight, report_cache_stats
+from transcript_cache import cached_transcript, transcript_cache_for
+from speaker_assignment import SpeakerTimeline, diarization_turns
 
 # Try to import faster-whisper for SPEED
 try:
@@ -98,6 +102,17 @@ if DIARIZATION_AVAILABLE:
         logger.warning(f"⚠️ Could not load diarization pipeline: {e}")
         DIARIZATION_AVAILABLE = False
 
+# Transcripts are cached per recording and transcription settings
+transcript_cache = transcript_cache_for(
+    'fefast2',
+    "faster-whisper tiny int8" if USE_FASTER_WHISPER else "whisper base",
+    language="en",
+    diarization="pyannote/speaker-diarization-3.1" if diarization_pipeline else None,
+)
+
+# DeepSeek responses are cached per exact request
+analysis_cache = AnalysisCache()
+
 # Deepseek API key
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
@@ -166,13 +181,7 @@ def perform_diarization(audio_file):
         diarization = diarization_pipeline(audio_file)
         
         # Convert diarization to list of segments
-        speaker_segments = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            speaker_segments.append({
-                'start': turn.start,
-                'end': turn.end,
-                'speaker': speaker
-            })
+        speaker_segments = diarization_turns(diarization)
         
         logger.info(f"Found {len(set(seg['speaker'] for seg in speaker_segments))} speakers")
         return speaker_segments
@@ -181,29 +190,12 @@ def perform_diarization(audio_file):
         logger.error(f"Diarization failed: {e}")
         return None
 
-def assign_speaker_to_segment(segment_start, segment_end, speaker_segments):
-    """Find which speaker was talking during a transcript segment"""
-    if not speaker_segments:
-        return "Unknown"
-    
-    # Find speaker with most overlap
-    max_overlap = 0
-    assigned_speaker = "Unknown"
-    
-    for sp_seg in speaker_segments:
-        # Calculate overlap
-        overlap_start = max(segment_start, sp_seg['start'])
-        overlap_end = min(segment_end, sp_seg['end'])
-        overlap = max(0, overlap_end - overlap_start)
-        
-        if overlap > max_overlap:
-            max_overlap = overlap
-            assigned_speaker = sp_seg['speaker']
-    
-    return assigned_speaker
-
-def transcribe_audio_with_speakers(file_path):
-    """Transcribe audio with speaker labels"""
+def transcribe_audio_with_speakers(file_path, details=None):
+    """
+    Transcribe audio with speaker labels.
+    If details is given, it receives the labeled segments and speaker turns, and
+    'diarization_failed' when the pipeline is loaded but produced no turns.
+    """
     if not file_path or not os.path.exists(file_path):
         return ""
     
@@ -211,6 +203,7 @@ def transcribe_audio_with_speakers(file_path):
     
     # Perform diarization first
     speaker_segments = perform_diarization(file_path)
+    timeline = SpeakerTimeline(speaker_segments)
     
     try:
         if USE_FASTER_WHISPER:
@@ -225,17 +218,12 @@ def transcribe_audio_with_speakers(file_path):
             # Build transcript with speaker labels
             transcript_parts = []
             current_speaker = None
+            labeled_segments = []
             
             for segment in segments_gen:
                 # Assign speaker to this segment
-                if speaker_segments:
-                    speaker = assign_speaker_to_segment(
-                        segment.start, 
-                        segment.end, 
-                        speaker_segments
-                    )
-                else:
-                    speaker = "Unknown"
+                speaker = timeline.speaker_for(segment.start, segment.end, "Unknown")
+                labeled_segments.append({'start': segment.start, 'end': segment.end, 'text': segment.text, 'speaker': speaker})
                 
                 # Add speaker label if speaker changed
                 if speaker != current_speaker:
@@ -252,17 +240,12 @@ def transcribe_audio_with_speakers(file_path):
             # Build transcript with speaker labels
             transcript_parts = []
             current_speaker = None
+            labeled_segments = []
             
             for segment in segments:
                 # Assign speaker to this segment
-                if speaker_segments:
-                    speaker = assign_speaker_to_segment(
-                        segment['start'], 
-                        segment['end'], 
-                        speaker_segments
-                    )
-                else:
-                    speaker = "Unknown"
+                speaker = timeline.speaker_for(segment['start'], segment['end'], "Unknown")
+                labeled_segments.append({'start': segment['start'], 'end': segment['end'], 'text': segment['text'], 'speaker': speaker})
                 
                 # Add speaker label if speaker changed
                 if speaker != current_speaker:
@@ -274,6 +257,10 @@ def transcribe_audio_with_speakers(file_path):
             transcript = "".join(transcript_parts).strip()
         
         logger.info(f"Transcription complete: {len(transcript)} chars")
+        if details is not None:
+            details['segments'] = labeled_segments
+            details['speaker_turns'] = speaker_segments
+            details['diarization_failed'] = diarization_pipeline is not None and not speaker_segments
         return transcript
         
     except Exception as e:
@@ -376,6 +363,10 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
             "stream": False
         }
         
+        cached = analysis_cache.get(data)
+        if cached is not None:
+            return cached
+        
         response = requests.post(
             "https://api.deepseek.com/v1/chat/completions",
             headers=headers,
@@ -386,7 +377,9 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
         
         result = response.json()
         if "choices" in result and result["choices"]:
-            return result["choices"][0]["message"]["content"].strip()
+            analysis = result["choices"][0]["message"]["content"].strip()
+            analysis_cache.put(data, analysis, expires_at=next_midnight())
+            return analysis
         return "Analysis failed: No response"
         
     except Exception as e:
@@ -419,25 +412,20 @@ def process_all_urls(urls):
             'application_submitted': False
         }
         
-        # Download
-        audio_file = download_audio_fast(url, AUDIO_FOLDER)
-        if not audio_file:
+        # Download and transcribe, or reuse a cached transcript
+        transcript = cached_transcript(
+            transcript_cache,
+            url,
+            lambda u: download_audio_fast(u, AUDIO_FOLDER),
+            transcribe_audio_with_speakers
+        )
+        if transcript is None:
             result['status'] = 'Download Failed'
             result['analysis'] = 'Analysis skipped: Download Failed'
             all_results.append(result)
             continue
-        
-        # Transcribe WITH SPEAKER IDENTIFICATION
-        transcript = transcribe_audio_with_speakers(audio_file)
         result['transcript'] = transcript
         
-        # Clean up audio immediately
-        try:
-            os.remove(audio_file)
-            logger.info("Cleaned up audio file")
-        except:
-            pass
-        
         if not transcript:
             result['status'] = 'Transcription Failed'
             result['analysis'] = 'Analysis skipped: No Transcript'
@@ -555,6 +543,14 @@ def save_separated_outputs(results):
 if __name__ == "__main__":
     logger.info("🚀 Fast Call Analysis Script with Speaker Identification Started")
     
+    parser = argparse.ArgumentParser(description="Transcribe and analyze the calls listed in urls.txt")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-download and re-transcribe every URL, bypassing the transcript cache")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    transcript_cache.enabled = not args.no_cache
+    apply_cache_args(analysis_cache, args)
+    
     # Read URLs
     urls = read_urls_from_file('urls.txt')
     if not urls:
@@ -576,4 +572,7 @@ if __name__ == "__main__":
     logger.info(f"Time: {duration:.1f} seconds ({duration/60:.1f} minutes)")
     logger.info(f"Applications Submitted: {output_info['app_yes']}")
     logger.info(f"Applications NOT Submitted: {output_info['app_no']}")
+    cache_stats = transcript_cache.stats()
+    logger.info(f"Transcript cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    report_cache_stats(analysis_cache)
     logger.info("="*70)
@@ -8,8 +8,14 @@ import re
 import hashlib
 import gc
 import subprocess
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, add_cache_args, apply_cache_args, next_midnight, report_cache_stats
+from transcript_cache import cached_transcript, transcript_cache_for
+from speaker_assignment import SpeakerTimeline, diarization_turns
+from audio_loader import load_audio, audio_seconds, pyannote_input
 import torch
 import torchaudio
 
@@ -57,10 +63,22 @@ os.makedirs(AUDIO_FOLDER, exist_ok=True)
 os.makedirs(ANALYSIS_FOLDER, exist_ok=True)
 os.makedirs(TRANSCRIPTS_FOLDER, exist_ok=True)
 
+# Diarization runs alongside transcription, each with its own CPU threads:
+# CTranslate2 (faster-whisper) gets WHISPER_CPU_THREADS, torch (pyannote) gets
+# DIARIZATION_THREADS. Regular whisper runs on torch too, so there torch gets both.
+# Calls shorter than MIN_DIARIZATION_SECONDS skip diarization.
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "4"))
+DIARIZATION_THREADS = int(os.getenv("DIARIZATION_THREADS", "2"))
+MIN_DIARIZATION_SECONDS = float(os.getenv("MIN_DIARIZATION_SECONDS", "0"))
+
+torch.set_num_threads(
+    DIARIZATION_THREADS if USE_FASTER_WHISPER else WHISPER_CPU_THREADS + DIARIZATION_THREADS
+)
+
 # Initialize Whisper model
 if USE_FASTER_WHISPER:
     try:
-        model = WhisperModel("tiny", device="cpu", compute_type="int8", cpu_threads=4)
+        model = WhisperModel("tiny", device="cpu", compute_type="int8", cpu_threads=WHISPER_CPU_THREADS)
         logger.info("Faster-Whisper 'tiny' model loaded for maximum speed")
     except Exception as e:
         logger.error(f"Failed to load Faster-Whisper: {e}")
@@ -98,6 +116,21 @@ except Exception as e:
     logger.error(f"⚠️ Failed to load speaker diarization: {str(e)}")
     logger.error("Continuing WITHOUT speaker identification...")
 
+# Single background worker for diarization
+diarization_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+
+# Transcripts are cached per recording and transcription settings
+transcript_cache = transcript_cache_for(
+    'fefast3',
+    "faster-whisper tiny int8" if USE_FASTER_WHISPER else "whisper base",
+    language="en",
+    diarization="pyannote/speaker-diarization-3.1" if DIARIZATION_AVAILABLE else None,
+    min_diarization_seconds=MIN_DIARIZATION_SECONDS,
+)
+
+# DeepSeek responses are cached per exact request
+analysis_cache = AnalysisCache()
+
 # Deepseek API key
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
@@ -156,23 +189,17 @@ def download_audio_fast(url, output_folder):
         logger.error(f"Download failed: {e}")
         return None
 
-def perform_diarization(audio_file):
-    """Perform speaker diarization on audio file"""
+def perform_diarization(audio):
+    """Perform speaker diarization on decoded audio"""
     if not DIARIZATION_AVAILABLE or not diarization_pipeline:
         return None
     
     try:
         logger.info("Performing speaker diarization...")
-        diarization = diarization_pipeline(audio_file)
+        diarization = diarization_pipeline(pyannote_input(audio))
         
         # Convert diarization to list of segments
-        speaker_segments = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            speaker_segments.append({
-                'start': turn.start,
-                'end': turn.end,
-                'speaker': speaker
-            })
+        speaker_segments = diarization_turns(diarization)
         
         num_speakers = len(set(seg['speaker'] for seg in speaker_segments))
         logger.info(f"✅ Diarization complete: {num_speakers} speakers detected")
@@ -182,106 +209,89 @@ def perform_diarization(audio_file):
         logger.error(f"Diarization failed: {e}")
         return None
 
-def assign_speaker_to_segment(segment_start, segment_end, speaker_segments):
-    """Find which speaker was talking during a transcript segment"""
-    if not speaker_segments:
-        return "Speaker"
-    
-    # Find speaker with most overlap
-    max_overlap = 0
-    assigned_speaker = "Speaker"
-    
-    for sp_seg in speaker_segments:
-        # Calculate overlap
-        overlap_start = max(segment_start, sp_seg['start'])
-        overlap_end = min(segment_end, sp_seg['end'])
-        overlap = max(0, overlap_end - overlap_start)
-        
-        if overlap > max_overlap:
-            max_overlap = overlap
-            assigned_speaker = sp_seg['speaker']
-    
-    return assigned_speaker
+def should_diarize(audio):
+    """Whether to run diarization: available, and the call is long enough"""
+    if not DIARIZATION_AVAILABLE:
+        return False
+    duration = audio_seconds(audio)
+    if duration < MIN_DIARIZATION_SECONDS:
+        logger.info(f"Skipping diarization for short call ({duration:.1f}s)")
+        return False
+    return True
 
-def transcribe_audio_with_speakers(file_path):
-    """Transcribe audio with speaker labels"""
+def transcribe_audio_with_speakers(file_path, details=None):
+    """
+    Transcribe audio with speaker labels, diarizing in parallel with transcription.
+    If details is given, it receives the labeled segments and speaker turns, and
+    'diarization_failed' when diarization ran but produced no turns.
+    """
     if not file_path or not os.path.exists(file_path):
         return ""
     
     logger.info(f"Transcribing: {os.path.basename(file_path)}")
     
-    # Perform diarization first (if available)
-    speaker_segments = None
-    if DIARIZATION_AVAILABLE:
-        speaker_segments = perform_diarization(file_path)
+    # Decode once; both models read the same buffer
+    try:
+        audio = load_audio(file_path)
+    except Exception as e:
+        logger.error(f"Audio decode failed: {e}")
+        return ""
+    
+    # Start diarization in the background (if available)
+    diarization_job = None
+    if should_diarize(audio):
+        diarization_job = diarization_executor.submit(perform_diarization, audio)
     
     try:
         if USE_FASTER_WHISPER:
             segments_gen, info = model.transcribe(
-                file_path,
+                audio,
                 beam_size=1,
                 language="en",
                 vad_filter=True,
                 condition_on_previous_text=False
             )
-            
-            # Build transcript with speaker labels
-            transcript_parts = []
-            current_speaker = None
-            
-            for segment in segments_gen:
-                # Assign speaker to this segment
-                if speaker_segments:
-                    speaker = assign_speaker_to_segment(
-                        segment.start, 
-                        segment.end, 
-                        speaker_segments
-                    )
-                else:
-                    speaker = "Speaker"
-                
-                # Add speaker label if speaker changed
-                if speaker != current_speaker:
-                    transcript_parts.append(f"\n[{speaker}]: ")
-                    current_speaker = speaker
-                
-                transcript_parts.append(segment.text)
-            
-            transcript = "".join(transcript_parts).strip()
+            segments = [(segment.start, segment.end, segment.text) for segment in segments_gen]
         else:
-            result = model.transcribe(file_path, language="en", fp16=False)
-            segments = result.get("segments", [])
-            
-            # Build transcript with speaker labels
-            transcript_parts = []
-            current_speaker = None
-            
-            for segment in segments:
-                # Assign speaker to this segment
-                if speaker_segments:
-                    speaker = assign_speaker_to_segment(
-                        segment['start'], 
-                        segment['end'], 
-                        speaker_segments
-                    )
-                else:
-                    speaker = "Speaker"
-                
-                # Add speaker label if speaker changed
-                if speaker != current_speaker:
-                    transcript_parts.append(f"\n[{speaker}]: ")
-                    current_speaker = speaker
-                
-                transcript_parts.append(segment['text'])
-            
-            transcript = "".join(transcript_parts).strip()
-        
-        logger.info(f"Transcription complete: {len(transcript)} chars")
-        return transcript
-        
+            result = model.transcribe(audio, language="en", fp16=False)
+            segments = [
+                (segment['start'], segment['end'], segment['text'])
+                for segment in result.get("segments", [])
+            ]
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
+        if diarization_job:
+            diarization_job.result()
         return ""
+    
+    # Merge speaker turns once diarization has finished
+    speaker_segments = diarization_job.result() if diarization_job else None
+    timeline = SpeakerTimeline(speaker_segments)
+    
+    # Build transcript with speaker labels
+    transcript_parts = []
+    current_speaker = None
+    labeled_segments = []
+    
+    for start, end, text in segments:
+        # Assign speaker to this segment
+        speaker = timeline.speaker_for(start, end, "Speaker")
+        labeled_segments.append({'start': start, 'end': end, 'text': text, 'speaker': speaker})
+        
+        # Add speaker label if speaker changed
+        if speaker != current_speaker:
+            transcript_parts.append(f"\n[{speaker}]: ")
+            current_speaker = speaker
+        
+        transcript_parts.append(text)
+    
+    transcript = "".join(transcript_parts).strip()
+    logger.info(f"Transcription complete: {len(transcript)} chars")
+    if details is not None:
+        details['segments'] = labeled_segments
+        details['speaker_turns'] = speaker_segments
+        details['diarization_failed'] = diarization_job is not None and not speaker_segments
+    return transcript
 
 def analyze_single_transcript(transcript, url_identifier):
     """Analyze ONE transcript with YOUR EXACT PROMPT"""
@@ -379,6 +389,10 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
             "stream": False
         }
         
+        cached = analysis_cache.get(data)
+        if cached is not None:
+            return cached
+        
         response = requests.post(
             "https://api.deepseek.com/v1/chat/completions",
             headers=headers,
@@ -389,7 +403,9 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
         
         result = response.json()
         if "choices" in result and result["choices"]:
-            return result["choices"][0]["message"]["content"].strip()
+            analysis = result["choices"][0]["message"]["content"].strip()
+            analysis_cache.put(data, analysis, expires_at=next_midnight())
+            return analysis
         return "Analysis failed: No response"
         
     except Exception as e:
@@ -422,25 +438,20 @@ def process_all_urls(urls):
             'application_submitted': False
         }
         
-        # Download
-        audio_file = download_audio_fast(url, AUDIO_FOLDER)
-        if not audio_file:
+        # Download and transcribe, or reuse a cached transcript
+        transcript = cached_transcript(
+            transcript_cache,
+            url,
+            lambda u: download_audio_fast(u, AUDIO_FOLDER),
+            transcribe_audio_with_speakers
+        )
+        if transcript is None:
             result['status'] = 'Download Failed'
             result['analysis'] = 'Analysis skipped: Download Failed'
             all_results.append(result)
             continue
-        
-        # Transcribe WITH SPEAKER IDENTIFICATION
-        transcript = transcribe_audio_with_speakers(audio_file)
         result['transcript'] = transcript
         
-        # Clean up audio immediately
-        try:
-            os.remove(audio_file)
-            logger.info("Cleaned up audio file")
-        except:
-            pass
-        
         if not transcript:
             result['status'] = 'Transcription Failed'
             result['analysis'] = 'Analysis skipped: No Transcript'
@@ -558,6 +569,14 @@ def save_separated_outputs(results):
 if __name__ == "__main__":
     logger.info("🚀 Fast Call Analysis Script with Speaker Identification Started")
     
+    parser = argparse.ArgumentParser(description="Transcribe and analyze the calls listed in urls.txt")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-download and re-transcribe every URL, bypassing the transcript cache")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    transcript_cache.enabled = not args.no_cache
+    apply_cache_args(analysis_cache, args)
+    
     if not DIARIZATION_AVAILABLE:
         logger.warning("⚠️ Running WITHOUT speaker identification")
     
@@ -582,4 +601,7 @@ if __name__ == "__main__":
     logger.info(f"Time: {duration:.1f} seconds ({duration/60:.1f} minutes)")
     logger.info(f"Applications Submitted: {output_info['app_yes']}")
     logger.info(f"Applications NOT Submitted: {output_info['app_no']}")
+    cache_stats = transcript_cache.stats()
+    logger.info(f"Transcript cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    report_cache_stats(analysis_cache)
     logger.info("="*70)
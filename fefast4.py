@@ -8,8 +8,17 @@ import re
 import hashlib
 import gc
 import subprocess
+import argparse
+import threading
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, add_cache_args, apply_cache_args, next_midnight, report_cache_stats
+from transcript_cache import cached_transcript, transcript_cache_for
+from audio_loader import load_audio
 import torch
 import whisperx
 
@@ -51,48 +60,117 @@ os.makedirs(TRANSCRIPTS_FOLDER, exist_ok=True)
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 
-# Initialize WhisperX
+# Pipeline concurrency: downloads and DeepSeek calls run in thread pools around a
+# single inference worker; each download worker holds at most one file waiting for it
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "8"))
+
+# WhisperX settings
 device = "cpu"
 compute_type = "int8"
 batch_size = 8
 
-logger.info("Loading WhisperX model...")
-try:
-    whisper_model = whisperx.load_model("tiny", device, compute_type=compute_type)
-    logger.info("✅ WhisperX model loaded")
-except Exception as e:
-    logger.error(f"Failed to load WhisperX: {e}")
-    sys.exit(1)
-
-# Load alignment model (will be loaded when needed)
-align_model = None
-align_metadata = None
-
-# Load diarization pipeline (robust across whisperx versions)
-diarization_available = False
+# Alignment models are cached per language, least recently used evicted first
+ALIGN_CACHE_MAX_MODELS = int(os.getenv("ALIGN_CACHE_MAX_MODELS", "3"))
+ALIGN_CACHE_MAX_MB = float(os.getenv("ALIGN_CACHE_MAX_MB", "2048"))
+
+# Models load on first use, so runs that never transcribe don't pay for them
+model_lock = threading.Lock()
+whisper_model = None
+align_models = OrderedDict()  # language -> (model, metadata, size in MB)
+
+# Diarization pipeline state; diarization_available is settled on first use
+diarization_available = bool(HF_TOKEN)
 diarize_model = None
-if HF_TOKEN:
+diarize_model_loaded = False
+
+# Transcripts are cached per recording and transcription settings
+transcript_cache = transcript_cache_for(
+    'fefast4',
+    f"whisperx tiny {compute_type}",
+    language=None,
+    diarization="whisperx" if HF_TOKEN else None,
+)
+
+# DeepSeek responses are cached per exact request
+analysis_cache = AnalysisCache()
+
+def get_whisper_model():
+    """WhisperX model, loaded on first call"""
+    global whisper_model
+    with model_lock:
+        if whisper_model is None:
+            logger.info("Loading WhisperX model...")
+            try:
+                whisper_model = whisperx.load_model("tiny", device, compute_type=compute_type)
+                logger.info("✅ WhisperX model loaded")
+            except Exception as e:
+                logger.error(f"Failed to load WhisperX: {e}")
+                sys.exit(1)
+        return whisper_model
+
+def model_size_mb(model):
+    """Parameter memory of a torch model in MB (0 if it can't be measured)"""
     try:
-        logger.info("Loading speaker diarization model...")
+        return sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+def get_align_model(language):
+    """Alignment model and metadata for a language, from the LRU cache"""
+    with model_lock:
+        if language in align_models:
+            align_models.move_to_end(language)
+            model, metadata, _ = align_models[language]
+            return model, metadata
+
+        logger.info(f"Loading alignment model for '{language}'...")
+        model, metadata = whisperx.load_align_model(language_code=language, device=device)
+        align_models[language] = (model, metadata, model_size_mb(model))
+
+        # Evict least recently used languages past the count or memory cap, always
+        # keeping the model just loaded
+        while len(align_models) > 1 and (
+            len(align_models) > ALIGN_CACHE_MAX_MODELS
+            or sum(size for _, _, size in align_models.values()) > ALIGN_CACHE_MAX_MB
+        ):
+            evicted, _ = align_models.popitem(last=False)
+            logger.info(f"Evicted alignment model for '{evicted}'")
+            gc.collect()
+        return model, metadata
+
+def get_diarize_model():
+    """Speaker diarization pipeline (robust across whisperx versions), or None"""
+    global diarize_model, diarize_model_loaded, diarization_available
+    with model_lock:
+        if diarize_model_loaded:
+            return diarize_model
+        diarize_model_loaded = True
+
+        if not HF_TOKEN:
+            diarization_available = False
+            return None
         try:
-            # Preferred modern location
-            from whisperx.diarize import DiarizationPipeline
-            diarize_model = DiarizationPipeline(use_auth_token=HF_TOKEN, device=device)
-        except Exception:
-            # Fall back to any exposed helpers on the module
-            if hasattr(whisperx, "DiarizationPipeline"):
-                diarize_model = whisperx.DiarizationPipeline(use_auth_token=HF_TOKEN, device=device)
-            elif hasattr(whisperx, "load_diarize_model"):
-                diarize_model = whisperx.load_diarize_model(use_auth_token=HF_TOKEN, device=device)
-            else:
-                raise AttributeError("No diarization pipeline available in this whisperx version.")
-        diarization_available = True
-        logger.info("✅ Speaker diarization loaded")
-    except Exception as e:
-        logger.warning(f"⚠️ Diarization failed to load: {e}")
-        logger.warning("Continuing without speaker labels")
-else:
-    logger.warning("⚠️ No HUGGINGFACE_TOKEN - speaker diarization disabled")
+            logger.info("Loading speaker diarization model...")
+            try:
+                # Preferred modern location
+                from whisperx.diarize import DiarizationPipeline
+                diarize_model = DiarizationPipeline(use_auth_token=HF_TOKEN, device=device)
+            except Exception:
+                # Fall back to any exposed helpers on the module
+                if hasattr(whisperx, "DiarizationPipeline"):
+                    diarize_model = whisperx.DiarizationPipeline(use_auth_token=HF_TOKEN, device=device)
+                elif hasattr(whisperx, "load_diarize_model"):
+                    diarize_model = whisperx.load_diarize_model(use_auth_token=HF_TOKEN, device=device)
+                else:
+                    raise AttributeError("No diarization pipeline available in this whisperx version.")
+            logger.info("✅ Speaker diarization loaded")
+        except Exception as e:
+            diarize_model = None
+            diarization_available = False
+            logger.warning(f"⚠️ Diarization failed to load: {e}")
+            logger.warning("Continuing without speaker labels")
+        return diarize_model
 
 def read_urls_from_file(file_name='urls.txt'):
     """Read URLs from file"""
@@ -150,33 +228,31 @@ def download_audio_fast(url, output_folder):
         logger.error(f"Download failed: {e}")
         return None
 
-def transcribe_with_speakers(audio_file):
-    """Transcribe with WhisperX and add speaker diarization"""
-    global align_model, align_metadata
-
+def transcribe_with_speakers(audio_file, details=None):
+    """
+    Transcribe with WhisperX and add speaker diarization.
+    If details is given, it receives the aligned segments and language, and
+    'diarization_failed' when a HUGGINGFACE_TOKEN is set but diarization didn't run.
+    """
     if not audio_file or not os.path.exists(audio_file):
         return ""
 
     logger.info(f"Transcribing: {os.path.basename(audio_file)}")
 
     try:
-        # Load audio
-        audio = whisperx.load_audio(audio_file)
+        # Decode once; transcription, alignment and diarization share the buffer
+        audio = load_audio(audio_file)
 
         # Step 1: Transcribe with WhisperX
         logger.info("Transcribing audio with WhisperX...")
-        result = whisper_model.transcribe(audio, batch_size=batch_size)
+        result = get_whisper_model().transcribe(audio, batch_size=batch_size)
 
         # Step 2: Align whisper output
         logger.info("Aligning transcript...")
         language = result["language"]
 
-        # Load alignment model if not loaded
-        if align_model is None:
-            align_model, align_metadata = whisperx.load_align_model(
-                language_code=language,
-                device=device
-            )
+        # Alignment model for this file's language
+        align_model, align_metadata = get_align_model(language)
 
         result = whisperx.align(
             result["segments"],
@@ -188,9 +264,10 @@ def transcribe_with_speakers(audio_file):
         )
 
         # Step 3: Assign speakers (if available)
-        if diarization_available and diarize_model:
+        diarizer = get_diarize_model()
+        if diarizer:
             logger.info("Performing speaker diarization...")
-            diarize_segments = diarize_model(audio)
+            diarize_segments = diarizer(audio)
             # Depending on whisperx version, the function signature may vary.
             # This is the common variant:
             result = whisperx.assign_word_speakers(diarize_segments, result)
@@ -212,6 +289,10 @@ def transcribe_with_speakers(audio_file):
 
         transcript = "".join(transcript_parts).strip()
         logger.info(f"Transcription complete: {len(transcript)} chars")
+        if details is not None:
+            details['language'] = language
+            details['segments'] = result["segments"]
+            details['diarization_failed'] = bool(HF_TOKEN) and not diarizer
         return transcript
 
     except Exception as e:
@@ -314,6 +395,10 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
             "stream": False
         }
 
+        cached = analysis_cache.get(data)
+        if cached is not None:
+            return cached
+
         response = requests.post(
             "https://api.deepseek.com/v1/chat/completions",
             headers=headers,
@@ -324,7 +409,9 @@ Ensure every field listed under 'Output for Billability', 'Output for Applicatio
 
         result = response.json()
         if "choices" in result and result["choices"]:
-            return result["choices"][0]["message"]["content"].strip()
+            analysis = result["choices"][0]["message"]["content"].strip()
+            analysis_cache.put(data, analysis, expires_at=next_midnight())
+            return analysis
         return "Analysis failed: No response"
 
     except Exception as e:
@@ -341,14 +428,44 @@ def extract_application_status(analysis_text):
     except Exception:
         return False
 
-def process_all_urls(urls):
-    """Process each URL individually, collect all results"""
-    all_results = []
+class StageTimer:
+    """Thread-safe busy time and item counts per pipeline stage"""
 
-    for i, url in enumerate(urls, 1):
-        logger.info(f"\n[{i}/{len(urls)}] Processing: {url[:80]}...")
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.counts = {}
 
-        result = {
+    def add(self, stage, seconds):
+        with self.lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def log_summary(self, wall_seconds):
+        logger.info("Stage timings (busy time summed across workers):")
+        for stage, total in self.totals.items():
+            count = self.counts[stage]
+            logger.info(f"   {stage}: {total:.1f}s total, {total/count:.1f}s avg over {count} calls")
+        logger.info(f"   wall clock: {wall_seconds:.1f}s")
+
+def process_all_urls(urls):
+    """
+    Process URLs as a staged pipeline, collect all results in input order.
+
+    Each call goes through cached_transcript on one of DOWNLOAD_WORKERS download
+    workers; a cache miss hands the downloaded file to a single worker (this
+    thread) running WhisperX and waits for its transcript. Finished transcripts go
+    to ANALYSIS_WORKERS concurrent DeepSeek calls. When inference falls behind,
+    the waiting download workers stop fetching more audio.
+    """
+    total = len(urls)
+    timer = StageTimer()
+    pipeline_start = time.perf_counter()
+    handoff = queue.Queue()
+    analysis_jobs = []
+
+    all_results = [
+        {
             'url': url,
             'call_number': i,
             'status': 'Processing',
@@ -356,43 +473,82 @@ def process_all_urls(urls):
             'analysis': '',
             'application_submitted': False
         }
+        for i, url in enumerate(urls, 1)
+    ]
 
-        # Download
+    def download(url):
+        started = time.perf_counter()
         audio_file = download_audio_fast(url, AUDIO_FOLDER)
-        if not audio_file:
-            result['status'] = 'Download Failed'
-            result['analysis'] = 'Analysis skipped: Download Failed'
-            all_results.append(result)
-            continue
+        timer.add('download', time.perf_counter() - started)
+        return audio_file
+
+    def download_stage(result):
+        logger.info(f"[{result['call_number']}/{total}] Processing: {result['url'][:80]}...")
 
-        # Transcribe
-        transcript = transcribe_with_speakers(audio_file)
-        result['transcript'] = transcript
+        def transcribe(audio_file, details):
+            # Runs on the inference thread; this worker waits for the result
+            transcribed = Future()
+            handoff.put((result, audio_file, details, transcribed))
+            return transcribed.result()
 
-        # Clean up audio
         try:
-            os.remove(audio_file)
-            logger.info("Cleaned up audio file")
-        except Exception:
-            pass
+            transcript = cached_transcript(transcript_cache, result['url'], download, transcribe)
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            transcript = ""
 
-        if not transcript:
+        if transcript is None:
+            result['status'] = 'Download Failed'
+            result['analysis'] = 'Analysis skipped: Download Failed'
+        elif not transcript:
             result['status'] = 'Transcription Failed'
             result['analysis'] = 'Analysis skipped: No Transcript'
-            all_results.append(result)
-            continue
-
-        # Analyze
-        analysis = analyze_single_transcript(transcript, url)
+        else:
+            result['transcript'] = transcript
+            analysis_jobs.append(analyses.submit(analysis_stage, result))
+
+    def analysis_stage(result):
+        started = time.perf_counter()
+        analysis = analyze_single_transcript(result['transcript'], result['url'])
+        timer.add('analysis', time.perf_counter() - started)
         result['status'] = 'Success'
         result['analysis'] = analysis
         result['application_submitted'] = extract_application_status(analysis)
-        all_results.append(result)
+        logger.info(f"✅ Completed call {result['call_number']}")
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download") as downloads, \
+         ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis") as analyses:
+        download_jobs = [downloads.submit(download_stage, result) for result in all_results]
 
-        # Free memory
-        gc.collect()
-        logger.info(f"✅ Completed call {i}")
+        def close_handoff():
+            wait(download_jobs)
+            handoff.put(None)
 
+        threading.Thread(target=close_handoff, daemon=True).start()
+
+        while True:
+            waited = time.perf_counter()
+            job = handoff.get()
+            timer.add('inference idle', time.perf_counter() - waited)
+            if job is None:
+                break
+
+            result, audio_file, details, transcribed = job
+            logger.info(f"Transcribing call {result['call_number']}")
+            started = time.perf_counter()
+            try:
+                transcribed.set_result(transcribe_with_speakers(audio_file, details))
+            except Exception as e:
+                transcribed.set_exception(e)
+            timer.add('inference', time.perf_counter() - started)
+
+            # Free memory
+            gc.collect()
+
+        for job in download_jobs + analysis_jobs:
+            job.result()
+
+    timer.log_summary(time.perf_counter() - pipeline_start)
     return all_results
 
 def save_separated_outputs(results):
@@ -487,7 +643,16 @@ def save_separated_outputs(results):
 if __name__ == "__main__":
     logger.info("🚀 WhisperX Call Analysis with Speaker Identification Started")
 
-    if not diarization_available:
+    parser = argparse.ArgumentParser(description="Transcribe and analyze the calls listed in urls.txt")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-download and re-transcribe every URL, bypassing the transcript cache")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    transcript_cache.enabled = not args.no_cache
+    apply_cache_args(analysis_cache, args)
+
+    if not HF_TOKEN:
+        logger.warning("⚠️ No HUGGINGFACE_TOKEN - speaker diarization disabled")
         logger.warning("⚠️ Running WITHOUT speaker identification")
 
     # Read URLs
@@ -511,4 +676,7 @@ if __name__ == "__main__":
     logger.info(f"Time: {duration:.1f} seconds ({duration/60:.1f} minutes)")
     logger.info(f"Applications Submitted: {output_info['app_yes']}")
     logger.info(f"Applications NOT Submitted: {output_info['app_no']}")
+    cache_stats = transcript_cache.stats()
+    logger.info(f"Transcript cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    report_cache_stats(analysis_cache)
     logger.info("="*70)
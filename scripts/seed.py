@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import select
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.security import hash_password_async
 from app.models import (
     Account, User, Partner, Call, CallMetricsHourly,
     Transcript, Summary
@@ -63,26 +63,31 @@ async def seed_data():
             session.add_all([admin_account, publisher_account, agency_account, broker_account])
             await session.flush()
             
-            # Create users
+            # Create users (bcrypt runs on the password pool, all three at once)
+            admin_hash, publisher_hash, agency_hash = await asyncio.gather(
+                hash_password_async("admin123"),
+                hash_password_async("password123"),
+                hash_password_async("password123"),
+            )
             admin_user = User(
                 id=uuid.uuid4(),
                 account_id=admin_account.id,
                 email="admin@hopwhistle.com",
-                password_hash=get_password_hash("admin123"),
+                password_hash=admin_hash,
                 role=UserRole.ADMIN,
             )
             publisher_user = User(
                 id=uuid.uuid4(),
                 account_id=publisher_account.id,
                 email="manager@publisher.com",
-                password_hash=get_password_hash("password123"),
+                password_hash=publisher_hash,
                 role=UserRole.MANAGER,
             )
             agency_user = User(
                 id=uuid.uuid4(),
                 account_id=agency_account.id,
                 email="analyst@agency.com",
-                password_hash=get_password_hash("password123"),
+                password_hash=agency_hash,
                 role=UserRole.ANALYST,
             )
             
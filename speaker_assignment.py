@@ -0,0 +1,75 @@
+"""Assign diarization speakers to transcript segments and words by time overlap"""
+import bisect
+
+
+def diarization_turns(diarization):
+    """Convert a pyannote diarization result to a list of speaker turns"""
+    return [
+        {'start': turn.start, 'end': turn.end, 'speaker': speaker}
+        for turn, _, speaker in diarization.itertracks(yield_label=True)
+    ]
+
+
+class SpeakerTimeline:
+    """
+    Speaker turns indexed for overlap lookups.
+
+    Turns are sorted by start once. A lookup bisects the sorted starts for the last
+    turn beginning before the interval ends, and the running maximum of turn ends
+    for the first turn still going when it begins, then only scans that window.
+    """
+
+    def __init__(self, turns):
+        turns = sorted(turns or [], key=lambda t: t['start'])
+        self.starts = [t['start'] for t in turns]
+        self.ends = [t['end'] for t in turns]
+        self.speakers = [t['speaker'] for t in turns]
+
+        # Non-decreasing, so the first turn that can reach a time is found by bisection
+        self.reach = []
+        latest = float('-inf')
+        for end in self.ends:
+            latest = max(latest, end)
+            self.reach.append(latest)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def speaker_for(self, start, end, default="Unknown"):
+        """Speaker with the most overlap with [start, end], or default if none overlaps"""
+        if start is None or end is None:
+            return default
+        lo = bisect.bisect_right(self.reach, start)
+        hi = bisect.bisect_left(self.starts, end)
+
+        best_overlap = 0
+        best_speaker = default
+        for i in range(lo, hi):
+            overlap = min(end, self.ends[i]) - max(start, self.starts[i])
+            if overlap > best_overlap:
+                best_overlap = overlap
+                best_speaker = self.speakers[i]
+        return best_speaker
+
+
+def assign_segment_speakers(segments, turns, default="Unknown"):
+    """Set 'speaker' on each segment dict; returns the segments"""
+    timeline = turns if isinstance(turns, SpeakerTimeline) else SpeakerTimeline(turns)
+    for segment in segments:
+        segment['speaker'] = timeline.speaker_for(segment.get('start'), segment.get('end'), default)
+    return segments
+
+
+def assign_word_speakers(segments, turns, default="Unknown"):
+    """
+    Set 'speaker' on every word in each segment's 'words' list, and on the segment
+    itself. Words without timestamps, or that no turn overlaps, take their
+    segment's speaker.
+    """
+    timeline = turns if isinstance(turns, SpeakerTimeline) else SpeakerTimeline(turns)
+    for segment in segments:
+        segment_speaker = timeline.speaker_for(segment.get('start'), segment.get('end'), default)
+        segment['speaker'] = segment_speaker
+        for word in segment.get('words') or []:
+            word['speaker'] = timeline.speaker_for(word.get('start'), word.get('end'), segment_speaker)
+    return segments
@@ -0,0 +1,218 @@
+"""
+On-disk transcript cache shared by the call-analysis scripts
+
+Transcripts are stored by audio content hash plus a fingerprint of the model
+settings that produced them, so the same recording under a different URL is only
+transcribed once, and changing the model or diarization setup misses cleanly.
+A small URL index (md5 of the URL, as used for download file names) points at the
+content entry, so a re-run finds it without downloading anything.
+
+Entries hold the transcript text plus whatever segments and speaker turns the
+script recorded. The cache is trimmed to TRANSCRIPT_CACHE_MAX_MB, least recently
+used entries first.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "transcript_cache")
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "1024"))
+
+logger = logging.getLogger("TranscriptionApp")
+
+
+def _json_default(value):
+    """Numpy scalars and other stragglers in segment data"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def url_hash(url):
+    """Same md5 prefix download_audio_fast uses to name files"""
+    return hashlib.md5(url.encode()).hexdigest()[:16]
+
+
+def file_hash(path):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Transcript entries keyed by audio content hash and model settings"""
+
+    def __init__(self, settings, directory=TRANSCRIPT_CACHE_DIR, max_mb=TRANSCRIPT_CACHE_MAX_MB):
+        self.enabled = True
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.fingerprint = hashlib.sha256(
+            json.dumps(settings, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        self.entries_dir = os.path.join(directory, "transcripts")
+        self.urls_dir = os.path.join(directory, "urls")
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, audio_key):
+        return os.path.join(self.entries_dir, f"{audio_key}.json")
+
+    def _url_path(self, url):
+        return os.path.join(self.urls_dir, f"{url_hash(url)}-{self.fingerprint}.json")
+
+    def _write_json(self, path, data):
+        """Write atomically; a failed write only costs a future cache miss"""
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=_json_default)
+            os.replace(temp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write transcript cache file {path}: {e}")
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def _read_entry(self, audio_key):
+        path = self._entry_path(audio_key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _count(self, entry):
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def audio_key(self, audio_file):
+        """Cache key for a downloaded audio file"""
+        return f"{file_hash(audio_file)}-{self.fingerprint}"
+
+    def get_url(self, url):
+        """Cached entry for a URL seen on an earlier run, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._url_path(url), 'r', encoding='utf-8') as f:
+                audio_key = json.load(f)['audio_key']
+        except (OSError, ValueError, KeyError):
+            return None
+        entry = self._read_entry(audio_key)
+        if entry is not None:
+            self._count(entry)
+            logger.info(f"Transcript cache hit (URL): {url[:80]}")
+        return entry
+
+    def get_audio(self, audio_key, url=None):
+        """Cached entry for downloaded audio, or None; a hit is indexed under url"""
+        if not self.enabled:
+            return None
+        entry = self._count(self._read_entry(audio_key))
+        if entry is not None:
+            logger.info("Transcript cache hit (audio content)")
+            if url:
+                self._write_json(self._url_path(url), {'audio_key': audio_key})
+        return entry
+
+    def put(self, audio_key, entry, url=None):
+        """Store an entry, index it under url, and trim the cache to size"""
+        if not self.enabled:
+            return
+        entry = dict(entry, cached_at=time.time())
+        self._write_json(self._entry_path(audio_key), entry)
+        if url:
+            self._write_json(self._url_path(url), {'audio_key': audio_key})
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self.lock:
+            try:
+                files = [e for e in os.scandir(self.entries_dir) if e.name.endswith('.json')]
+            except OSError:
+                return
+            stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in files]
+            total = sum(size for _, size, _ in stats)
+            for _, size, path in sorted(stats):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Hit/miss counts for this run"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def transcript_cache_for(script, model, language, diarization=None, **options):
+    """
+    TranscriptCache fingerprinted on the settings that shape a script's transcripts.
+    language is None for auto-detection, diarization the pipeline name or None.
+    """
+    return TranscriptCache(dict(
+        options,
+        script=script,
+        model=model,
+        language=language,
+        diarization=diarization,
+    ))
+
+
+def cached_transcript(cache, url, download, transcribe):
+    """
+    Transcript for url from the cache, or by downloading and transcribing it.
+
+    download(url) returns an audio path or None. transcribe(path, details) returns
+    the transcript text and may fill details with segments and speaker turns for
+    the cache entry. If it sets details['diarization_failed'], the speakerless
+    transcript is returned but not cached. The downloaded file is removed afterwards.
+
+    Returns None if the download failed, "" if transcription failed.
+    """
+    entry = cache.get_url(url)
+    if entry is not None:
+        return entry['transcript']
+
+    audio_file = download(url)
+    if not audio_file:
+        return None
+
+    try:
+        audio_key = cache.audio_key(audio_file) if cache.enabled else None
+        entry = cache.get_audio(audio_key, url) if audio_key else None
+        if entry is not None:
+            return entry['transcript']
+
+        details = {}
+        transcript = transcribe(audio_file, details)
+        if details.pop('diarization_failed', False):
+            logger.warning("Diarization failed; transcript not cached")
+        elif transcript and audio_key:
+            cache.put(audio_key, dict(details, transcript=transcript), url)
+        return transcript
+    finally:
+        # Clean up audio
+        try:
+            os.remove(audio_file)
+            logger.info("Cleaned up audio file")
+        except Exception:
+            pass
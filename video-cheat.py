@@ -11,6 +11,7 @@ import json
 import gc
 from urllib.parse import urlparse, unquote, parse_qs
 from dotenv import load_dotenv
+from speaker_assignment import assign_segment_speakers, diarization_turns
 
 # ADD THESE NEW IMPORTS FOR SPEAKER IDENTIFICATION
 try:
@@ -635,21 +636,8 @@ def transcribe_audio_with_timestamps(file_path):
                 logger.info("Identifying speakers in the audio...")
                 diarization = diarization_pipeline(file_path)
                 
-                # Process each segment to assign speakers
-                for segment in segments:
-                    segment_mid = (segment['start'] + segment['end']) / 2
-                    
-                    # Find which speaker this segment belongs to
-                    speaker_found = False
-                    for turn, _, speaker in diarization.itertracks(yield_label=True):
-                        if turn.start <= segment_mid <= turn.end:
-                            segment['speaker'] = speaker
-                            speaker_found = True
-                            break
-                    
-                    # Default if no speaker found
-                    if not speaker_found:
-                        segment['speaker'] = 'Unknown'
+                # Assign each segment the speaker it overlaps most
+                assign_segment_speakers(segments, diarization_turns(diarization), 'Unknown')
                 
                 # Log how many speakers were found
                 unique_speakers = set(s.get('speaker', 'Unknown') for s in segments)
@@ -1,6 +1,6 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { api } from "@/lib/api";
 import { KpiCard } from "@/components/KpiCard";
 import { TimeSeriesChart } from "@/components/TimeSeriesChart";
@@ -37,6 +37,8 @@ export default function DashboardPage() {
     }
   }, [dateRange]);
 
+  const interval = dateRange === "today" ? "hour" : "day";
+
   // Fetch metrics summary
   const { data: metrics, refetch: refetchMetrics } = useQuery({
     queryKey: ["metrics-summary", fromDate.toISOString(), toDate.toISOString(), partnerId],
@@ -53,7 +55,7 @@ export default function DashboardPage() {
     queryKey: ["metrics-timeseries", fromDate.toISOString(), toDate.toISOString(), partnerId],
     queryFn: () =>
       api.getTimeSeries({
-        interval: dateRange === "today" ? "hour" : "day",
+        interval,
         from: fromDate.toISOString(),
         to: toDate.toISOString(),
         partner_id: partnerId,
@@ -66,10 +68,86 @@ export default function DashboardPage() {
     queryFn: () => api.getPartners(),
   });
 
+  const queryClient = useQueryClient();
+
+  // Apply a coalesced metrics delta to the cached summary and time series
+  const applyMetricsDelta = (message: any) => {
+    const summaryKey = ["metrics-summary", fromDate.toISOString(), toDate.toISOString(), partnerId];
+    const timeSeriesKey = ["metrics-timeseries", fromDate.toISOString(), toDate.toISOString(), partnerId];
+
+    if (message.resync) {
+      queryClient.invalidateQueries({ queryKey: summaryKey });
+      queryClient.invalidateQueries({ queryKey: timeSeriesKey });
+      return;
+    }
+
+    // Hourly buckets fully inside the range can be added as-is. A bucket straddling
+    // either edge may hold calls outside the range, so refetch instead.
+    const hour = 60 * 60 * 1000;
+    const buckets: any[] = [];
+    let edgeChanged = false;
+    for (const bucket of message.buckets || []) {
+      if (partnerId && bucket.partner_id !== partnerId) continue;
+      const start = new Date(bucket.bucket_start).getTime();
+      if (start + hour <= fromDate.getTime() || start > toDate.getTime()) continue;
+      if (start >= fromDate.getTime() && start + hour <= toDate.getTime()) {
+        buckets.push(bucket);
+      } else {
+        edgeChanged = true;
+      }
+    }
+
+    if (edgeChanged) {
+      queryClient.invalidateQueries({ queryKey: summaryKey });
+      queryClient.invalidateQueries({ queryKey: timeSeriesKey });
+      return;
+    }
+    if (buckets.length === 0) return;
+
+    queryClient.setQueryData(summaryKey, (old: any) => {
+      if (!old) return old;
+      const next = { ...old };
+      for (const bucket of buckets) {
+        next.total_calls += bucket.total_calls;
+        next.billable_calls += bucket.billable_calls;
+        next.sales += bucket.sales;
+        next.connected += bucket.connected;
+        next.priced_sales += bucket.priced_sales;
+        next.sale_amount_cents_total += bucket.sale_amount_cents_total;
+      }
+      next.closing_percentage = next.billable_calls ? (next.sales / next.billable_calls) * 100 : 0;
+      next.answer_rate = next.total_calls ? (next.connected / next.total_calls) * 100 : 0;
+      next.aov_cents = next.priced_sales
+        ? Math.floor(next.sale_amount_cents_total / next.priced_sales)
+        : null;
+      return next;
+    });
+
+    queryClient.setQueryData(timeSeriesKey, (old: any) => {
+      if (!old) return old;
+      const points = old.points.map((point: any) => ({ ...point }));
+      for (const bucket of buckets) {
+        const start = new Date(bucket.bucket_start);
+        if (interval === "day") start.setUTCHours(0, 0, 0, 0);
+        const point = points.find(
+          (p: any) => new Date(p.timestamp).getTime() === start.getTime()
+        );
+        if (!point) continue;
+        point.total_calls += bucket.total_calls;
+        point.billable_calls += bucket.billable_calls;
+        point.sales += bucket.sales;
+        point.connected += bucket.connected;
+      }
+      return { ...old, points };
+    });
+  };
+
   // WebSocket for real-time updates
   useWebSocket({
     onMessage: (message) => {
-      if (message.type === "call_ingested") {
+      if (message.type === "metrics_delta") {
+        applyMetricsDelta(message);
+      } else if (message.type === "call_ingested") {
         refetchMetrics();
       }
     },
@@ -45,7 +45,7 @@ export function useWebSocket(options: UseWebSocketOptions = {}) {
         const message = JSON.parse(event.data);
         if (message.type === "connected") {
           console.log("WebSocket connected");
-        } else if (message.type === "call_ingested") {
+        } else if (message.type === "call_ingested" || message.type === "metrics_delta") {
           onMessage?.(message);
         }
       } catch (error) {
@@ -11,6 +11,8 @@ import json
 import gc
 from urllib.parse import urlparse, unquote, parse_qs
 from dotenv import load_dotenv
+from audio_loader import load_audio, pyannote_input
+from speaker_assignment import assign_segment_speakers, diarization_turns
 import subprocess  # Add this for running yt-dlp
 
 def check_yt_dlp_available():
@@ -559,6 +561,13 @@ def transcribe_audio_with_timestamps(file_path):
     logger.info(f"Transcribing with timestamps: {file_path}")
     start_time = datetime.datetime.now()
     
+    # Decode once; Whisper and speaker diarization share the buffer
+    try:
+        audio = load_audio(file_path)
+    except Exception as e:
+        logger.error(f"Could not decode audio from {file_path}: {e}")
+        return None, None
+    
     try:
         if USE_FASTER_WHISPER:
             config = SPEED_CONFIGS[SPEED_MODE]
@@ -575,7 +584,7 @@ def transcribe_audio_with_timestamps(file_path):
                 try:
                     logger.info("Processing in chunks to save memory...")
                     segments_gen, info = model.transcribe(
-                        file_path,
+                        audio,
                         beam_size=1,  # Minimal beam size
                         best_of=1,  # Don't generate multiple candidates
                         language="en",
@@ -627,7 +636,7 @@ def transcribe_audio_with_timestamps(file_path):
                     logger.info("Loaded tiny model for emergency processing")
                     
                     segments_gen, info = model.transcribe(
-                        file_path,
+                        audio,
                         beam_size=1,
                         language="en",
                         vad_filter=True,
@@ -650,7 +659,7 @@ def transcribe_audio_with_timestamps(file_path):
             else:
                 # Normal processing for smaller files
                 segments_gen, info = model.transcribe(
-                    file_path,
+                    audio,
                     beam_size=config["beam_size"],
                     language="en",
                     vad_filter=config["vad_filter"],
@@ -685,7 +694,7 @@ def transcribe_audio_with_timestamps(file_path):
                 logger.error("Regular whisper doesn't support chunk processing well. Install faster-whisper!")
                 logger.info("Attempting full file processing (may run out of memory)...")
             
-            result = model.transcribe(file_path, fp16=False, verbose=False, language="en")
+            result = model.transcribe(audio, fp16=False, verbose=False, language="en")
             full_transcript = result.get("text", "").strip()
             segments = result.get("segments", [])
             
@@ -703,23 +712,10 @@ def transcribe_audio_with_timestamps(file_path):
         if diarization_pipeline and SPEAKER_DIARIZATION_AVAILABLE:
             try:
                 logger.info("Identifying speakers in the audio...")
-                diarization = diarization_pipeline(file_path)
+                diarization = diarization_pipeline(pyannote_input(audio))
                 
-                # Process each segment to assign speakers
-                for segment in segments:
-                    segment_mid = (segment['start'] + segment['end']) / 2
-                    
-                    # Find which speaker this segment belongs to
-                    speaker_found = False
-                    for turn, _, speaker in diarization.itertracks(yield_label=True):
-                        if turn.start <= segment_mid <= turn.end:
-                            segment['speaker'] = speaker
-                            speaker_found = True
-                            break
-                    
-                    # Default if no speaker found
-                    if not speaker_found:
-                        segment['speaker'] = 'Unknown'
+                # Assign each segment the speaker it overlaps most
+                assign_segment_speakers(segments, diarization_turns(diarization), 'Unknown')
                 
                 # Log how many speakers were found
                 unique_speakers = set(s.get('speaker', 'Unknown') for s in segments)